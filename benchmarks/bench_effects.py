@@ -0,0 +1,70 @@
+"""
+Game tick cost as the world and inventory grow.
+Every item is carried and a fixed number of them have active effects, see
+EffectScheduler.
+
+Usage:
+    python -m benchmarks.bench_effects --rooms 1000 10000 100000 --effects 10
+"""
+
+from text_quest.core import GameCoordinator
+from text_quest.output import BufferSink
+from text_quest.worldgen import WorldSpec, generate_world
+import argparse
+import json
+from pathlib import Path
+import tempfile
+import time
+
+
+def build_effects_world(num_rooms: int, num_effects: int) -> dict:
+    """Every item starts in the player's inventory, num_effects of them charge up."""
+    game_data = generate_world(WorldSpec(num_rooms=num_rooms, items_per_room=1))
+    for item_data in game_data["items"].values():
+        item_data["current_location"] = "player_inventory"
+    game_data["player"]["inventory"] = list(game_data["items"])
+    game_data["effects"] = {
+        f"charge_{item_id}": {
+            "target": ["item", item_id],
+            "property": "charge",
+            "delta": 1,
+            "carried": True,
+        }
+        for item_id in list(game_data["items"])[:num_effects]
+    }
+    return game_data
+
+
+def bench_effects(num_rooms: int, num_effects: int, num_ticks: int) -> float:
+    """Microseconds per tick."""
+    with tempfile.TemporaryDirectory() as base_dir:
+        game_files = Path(base_dir) / "game_files"
+        game_files.mkdir()
+        with open(game_files / "BENCH_WORLD.json", mode="w", encoding="utf-8") as f:
+            json.dump(build_effects_world(num_rooms, num_effects), f)
+        game = GameCoordinator(
+            filename="BENCH_WORLD", base_dir=base_dir, output=BufferSink()
+        )
+
+    start = time.perf_counter()
+    for _ in range(num_ticks):
+        game.player_state_manager()
+    return (time.perf_counter() - start) / num_ticks * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rooms", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--effects", type=int, default=10)
+    parser.add_argument("--ticks", type=int, default=10000)
+    args = parser.parse_args()
+
+    for num_rooms in args.rooms:
+        tick_us = bench_effects(num_rooms, args.effects, args.ticks)
+        print(
+            f"rooms/items={num_rooms:>8} effects={args.effects}: {tick_us:6.1f}us/tick"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Room graph path query latency on large generated worlds, parsed or served from a store.
+- build: RoomGraph construction
+- near_query: path from a new source room to one of its neighbours (search stops early)
+- first_query: path from a new source room to the last room generated
+- cached_query: path from a source whose tree is cached
+- invalidate: change one connection, then query again
+
+Usage:
+    python -m benchmarks.bench_graph --rooms 10000 100000 250000
+"""
+
+from text_quest.graph import RoomGraph
+from text_quest.world import WorldTemplate, WorldTemplateCache
+from text_quest.worldgen import WorldSpec, generate_world, write_world
+import argparse
+from pathlib import Path
+import tempfile
+import time
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def bench_graph(world, num_rooms: int, num_queries: int = 1000) -> dict:
+    source, target = "room_0", f"room_{num_rooms - 1}"
+    neighbour = next(iter(world.rooms[source]["connections_map"].values()))
+
+    build_s, graph = timed(lambda: RoomGraph(world.rooms))
+    near_query_s, _ = timed(lambda: graph.find_path(source, neighbour))
+    graph.trees.clear()
+    graph.frontiers.clear()
+    first_query_s, path = timed(lambda: graph.find_path(source, target))
+    cached_total_s, _ = timed(
+        lambda: [graph.find_path(source, target) for _ in range(num_queries)]
+    )
+    reachable_total_s, _ = timed(
+        lambda: [graph.is_reachable(source, target) for _ in range(num_queries)]
+    )
+    # Pointing an exit of the start room at the target invalidates its tree
+    direction = next(iter(graph.get_connections(source)))
+    invalidate_s, _ = timed(lambda: graph.set_connection(source, direction, target))
+    requery_s, _ = timed(lambda: graph.find_path(source, target))
+
+    return {
+        "rooms": num_rooms,
+        "path_length": len(path),
+        "build_ms": build_s * 1000,
+        "near_query_ms": near_query_s * 1000,
+        "first_query_ms": first_query_s * 1000,
+        "cached_query_us": cached_total_s / num_queries * 1e6,
+        "is_reachable_us": reachable_total_s / num_queries * 1e6,
+        "invalidate_ms": invalidate_s * 1000,
+        "requery_ms": requery_s * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rooms", type=int, nargs="+", default=[10000, 100000])
+    args = parser.parse_args()
+
+    for num_rooms in args.rooms:
+        spec = WorldSpec(num_rooms=num_rooms, items_per_room=0)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            world_file = Path(temp_dir) / "GRAPH_WORLD.json"
+            write_world(world_file, spec)
+            worlds = {
+                "template": WorldTemplate(generate_world(spec)),
+                "store": WorldTemplateCache(store_min_bytes=0).get(world_file),
+            }
+            for name, world in worlds.items():
+                result = bench_graph(world, num_rooms)
+                print(
+                    f"{name}: "
+                    + ", ".join(
+                        (
+                            f"{key}={value:.3f}"
+                            if isinstance(value, float)
+                            else f"{key}={value}"
+                        )
+                        for key, value in result.items()
+                    )
+                )
+            worlds["store"].close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Inspect throughput for items whose numeric properties have many state description buckets.
+
+Usage:
+    python -m benchmarks.bench_inspect --buckets 4 32 256
+"""
+
+from text_quest.entities import Item
+import argparse
+import time
+
+
+def build_item(num_buckets: int) -> Item:
+    """Item with a 'charge' property described by num_buckets greater_than ranges."""
+    state_descriptions = {
+        f"greater_than_{threshold}": f"Charge is above {threshold}."
+        for threshold in range(num_buckets - 1, -1, -1)
+    }
+    state_descriptions["equals_0"] = "It is drained."
+    return Item.from_dict(
+        {
+            "id": "battery",
+            "name": "battery",
+            "base_description": "A heavy battery.",
+            "current_location": "start_room",
+            "commands": ["inspect"],
+            "properties": {"charge": 0},
+            "property_constraints": {
+                "charge": {"type": "int", "state_descriptions": state_descriptions}
+            },
+            "cmd_to_config_map": {},
+        }
+    )
+
+
+def bench_inspect(num_buckets: int, num_inspects: int = 100000) -> dict:
+    item = build_item(num_buckets)
+    start = time.perf_counter()
+    for i in range(num_inspects):
+        item.properties["charge"] = i % (num_buckets + 1)
+        item.inspect_object()
+    elapsed = time.perf_counter() - start
+    return {
+        "buckets": num_buckets,
+        "inspects": num_inspects,
+        "elapsed_s": elapsed,
+        "inspects_per_second": num_inspects / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--buckets", type=int, nargs="+", default=[4, 32, 256])
+    parser.add_argument("--inspects", type=int, default=100000)
+    args = parser.parse_args()
+
+    print(f"{'buckets':>8} {'inspects/s':>12}")
+    for num_buckets in args.buckets:
+        result = bench_inspect(num_buckets, args.inspects)
+        print(f"{result['buckets']:>8} {result['inspects_per_second']:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Cold vs warm world loads.
+- cold: JSON parsing and index building (first load in a process, no sidecar)
+- warm_memory: in-process cache hit (restart or reload of an unchanged file)
+- warm_sidecar: new process with a pickled sidecar on disk
+
+Usage:
+    python -m benchmarks.bench_load --rooms 1000 10000 100000 --items-per-room 2
+"""
+
+from text_quest.world import WorldTemplateCache
+from text_quest.worldgen import WorldSpec, write_world
+import argparse
+from pathlib import Path
+import tempfile
+import time
+
+
+def time_call(func, repeat: int) -> float:
+    """Best of repeat runs, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_world_load(num_rooms: int, items_per_room: int, repeat: int = 3) -> dict:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        world_file = Path(temp_dir) / "BENCH_WORLD.json"
+        write_world(
+            world_file, WorldSpec(num_rooms=num_rooms, items_per_room=items_per_room)
+        )
+
+        cold = time_call(lambda: WorldTemplateCache().get(world_file), repeat)
+
+        warm_cache = WorldTemplateCache()
+        warm_cache.get(world_file)
+        warm_memory = time_call(lambda: warm_cache.get(world_file), repeat)
+
+        WorldTemplateCache().get(world_file, use_sidecar=True)
+        warm_sidecar = time_call(
+            lambda: WorldTemplateCache().get(world_file, use_sidecar=True), repeat
+        )
+
+        return {
+            "rooms": num_rooms,
+            "items": num_rooms * items_per_room,
+            "file_bytes": world_file.stat().st_size,
+            "cold_s": cold,
+            "warm_memory_s": warm_memory,
+            "warm_sidecar_s": warm_sidecar,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rooms", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--items-per-room", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(
+        f"{'rooms':>8} {'items':>8} {'cold ms':>10} {'memory ms':>10} {'sidecar ms':>10}"
+    )
+    for num_rooms in args.rooms:
+        result = bench_world_load(num_rooms, args.items_per_room, args.repeat)
+        print(
+            f"{result['rooms']:>8} {result['items']:>8} {result['cold_s'] * 1000:>10.2f} "
+            f"{result['warm_memory_s'] * 1000:>10.3f} {result['warm_sidecar_s'] * 1000:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Bytes per live entity, measured with tracemalloc while a session builds entities from
+a shared world template.
+
+Usage:
+    python -m benchmarks.bench_memory --items 100000
+"""
+
+from text_quest.entities import Item, Player, Room
+from text_quest.world import WorldTemplate
+from text_quest.worldgen import WorldSpec, generate_world
+import argparse
+import tracemalloc
+
+
+def measure_bytes_per_entity(factory, entity_data) -> float:
+    """Allocated bytes (still alive) per entity built by factory from entity_data."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    entities = [factory(data) for data in entity_data]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # The list holding the entities is not part of their cost
+    list_bytes = 8 * len(entities)
+    return (after - before - list_bytes) / len(entities)
+
+
+def bench_memory(num_items: int, items_per_room: int = 1) -> dict:
+    world = WorldTemplate(
+        generate_world(
+            WorldSpec(
+                num_rooms=num_items // items_per_room, items_per_room=items_per_room
+            )
+        )
+    )
+    return {
+        "items": len(world.items),
+        "rooms": len(world.rooms),
+        "item_bytes": measure_bytes_per_entity(
+            Item.from_template, list(world.items.values())
+        ),
+        "room_bytes": measure_bytes_per_entity(
+            Room.from_template, list(world.rooms.values())
+        ),
+        "player_bytes": measure_bytes_per_entity(
+            Player.from_template, [world.player] * 1000
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=100000)
+    parser.add_argument("--items-per-room", type=int, default=1)
+    args = parser.parse_args()
+
+    result = bench_memory(args.items, args.items_per_room)
+    print(f"{result['items']} items, {result['rooms']} rooms")
+    for entity in ("item", "room", "player"):
+        print(f"{entity:>8}: {result[f'{entity}_bytes']:8.0f} bytes/entity")
+
+
+if __name__ == "__main__":
+    main()
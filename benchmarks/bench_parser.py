@@ -0,0 +1,45 @@
+"""
+Command parsing throughput.
+
+Usage:
+    python -m benchmarks.bench_parser --commands 1000000
+"""
+
+from text_quest.commands import CommandParser
+import argparse
+import time
+
+COMMANDS = [
+    "n",
+    "look",
+    "i",
+    "take lamp",
+    "pick up the lamp",
+    "inspect blank map",
+    "  move   s ",
+    "turn on lamp",
+    "travel armory",
+    "save SLOT1",
+]
+
+
+def bench_parser(num_commands: int) -> float:
+    """Commands parsed per second."""
+    parser = CommandParser()
+    commands = (COMMANDS * (num_commands // len(COMMANDS) + 1))[:num_commands]
+    parse = parser.parse
+    start = time.perf_counter()
+    for command in commands:
+        parse(command)
+    return num_commands / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--commands", type=int, default=1000000)
+    args = parser.parse_args()
+    print(f"{bench_parser(args.commands):,.0f} commands/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Session startup cost, cold vs from a warm pre-forked parent.
+- cold_process: new interpreter, imports, parses the game and builds a session
+- cold_load: first session in a process that has already imported everything
+- fork: fork a warm parent (see server.warm_up) and build a session in the child
+- prefork_session: session built in a worker forked from a warm parent, what
+  PreforkServer workers pay per connection
+
+Usage:
+    python -m benchmarks.bench_startup --rooms 0 10000 --repeat 20
+    (rooms=0 is the tutorial game)
+"""
+
+from text_quest.config import BASE_DIR, TUTORIAL_GAME_FILENAME
+from text_quest.core import GameCoordinator
+from text_quest.output import BufferSink
+from text_quest.server import warm_up
+from text_quest.world import world_template_cache
+from text_quest.worldgen import WorldSpec, write_world
+import argparse
+import gc
+import json
+import os
+from pathlib import Path
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+COLD_PROCESS_CODE = """
+import time
+start = time.perf_counter()
+from text_quest.core import GameCoordinator
+from text_quest.output import BufferSink
+GameCoordinator(filename={filename!r}, base_dir={base_dir!r}, output=BufferSink())
+print(time.perf_counter() - start)
+"""
+
+
+def build_session(filename: str, base_dir: str) -> float:
+    start = time.perf_counter()
+    GameCoordinator(filename=filename, base_dir=base_dir, output=BufferSink())
+    return time.perf_counter() - start
+
+
+def time_cold_process(filename: str, base_dir: str) -> float:
+    """Wall time of a new interpreter starting a session, including its own startup."""
+    code = COLD_PROCESS_CODE.format(filename=filename, base_dir=base_dir)
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], check=True, capture_output=True)
+    return time.perf_counter() - start
+
+
+def time_fork(filename: str, base_dir: str) -> float:
+    """Time from fork() in this (warm) process until the child's session is built."""
+    read_fd, write_fd = os.pipe()
+    start = time.monotonic()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            build_session(filename, base_dir)
+            os.write(write_fd, repr(time.monotonic()).encode())
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+    with os.fdopen(read_fd, "rb") as f:
+        ready = float(f.read())
+    os.waitpid(pid, 0)
+    return ready - start
+
+
+def time_prefork_sessions(filename: str, base_dir: str, repeat: int) -> list:
+    """Session build times measured inside one worker forked from this process."""
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            samples = [build_session(filename, base_dir) for _ in range(repeat)]
+            os.write(write_fd, json.dumps(samples).encode())
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+    with os.fdopen(read_fd, "rb") as f:
+        samples = json.loads(f.read())
+    os.waitpid(pid, 0)
+    return samples
+
+
+def bench_startup(filename: str, base_dir: str, repeat: int) -> dict:
+    cold_process = [time_cold_process(filename, base_dir) for _ in range(repeat)]
+    cold_load = []
+    for _ in range(repeat):
+        world_template_cache.clear()
+        cold_load.append(build_session(filename, base_dir))
+    warm_up(filename=filename, base_dir=base_dir)
+    fork = [time_fork(filename, base_dir) for _ in range(repeat)]
+    prefork_session = time_prefork_sessions(filename, base_dir, repeat)
+    gc.unfreeze()
+    return {
+        name: statistics.median(samples) * 1000
+        for name, samples in [
+            ("cold_process_ms", cold_process),
+            ("cold_load_ms", cold_load),
+            ("fork_ms", fork),
+            ("prefork_session_ms", prefork_session),
+        ]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rooms", type=int, nargs="+", default=[0, 10000])
+    parser.add_argument("--items-per-room", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for num_rooms in args.rooms:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            if num_rooms:
+                filename, base_dir = "BENCH_WORLD", temp_dir
+                game_files = Path(base_dir) / "game_files"
+                game_files.mkdir()
+                write_world(
+                    game_files / f"{filename}.json",
+                    WorldSpec(num_rooms=num_rooms, items_per_room=args.items_per_room),
+                )
+            else:
+                filename, base_dir = TUTORIAL_GAME_FILENAME, BASE_DIR
+            # The pickled sidecar is written by the first load, as in production
+            build_session(filename, base_dir)
+            result = bench_startup(filename, base_dir, args.repeat)
+        print(
+            f"rooms={num_rooms or 'tutorial':>8} "
+            f"cold process: {result['cold_process_ms']:7.1f}ms "
+            f"cold load: {result['cold_load_ms']:7.2f}ms "
+            f"fork: {result['fork_ms']:6.2f}ms "
+            f"prefork session: {result['prefork_session_ms']:6.3f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
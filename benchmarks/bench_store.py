@@ -0,0 +1,89 @@
+"""
+Session startup with a fully parsed WorldTemplate vs an indexed WorldStore.
+- first_load: a new process's first session (store: index already built)
+- index_build: one-off cost of building the store index
+- peak: memory allocated while starting the session and playing a few commands
+
+Usage:
+    python -m benchmarks.bench_store --rooms 10000 100000 1000000
+"""
+
+from text_quest.core import GameCoordinator
+from text_quest.output import BufferSink
+from text_quest.world import WorldTemplateCache, world_template_cache
+from text_quest.worldgen import WorldSpec, write_world
+import argparse
+from pathlib import Path
+import tempfile
+import time
+import tracemalloc
+
+
+def start_session(base_dir: str) -> dict:
+    """Starts a session and walks a few rooms, returns time and peak memory."""
+    world_template_cache.clear()
+    tracemalloc.start()
+    start = time.perf_counter()
+    game = GameCoordinator(
+        filename="BENCH_WORLD", base_dir=base_dir, output=BufferSink()
+    )
+    startup = time.perf_counter() - start
+    for _ in range(10):
+        game.process_args(["look"])
+        game.process_args(["move", next(iter(game.current_room.connections_map))])
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"startup_ms": startup * 1000, "peak_mb": peak / 1024 / 1024}
+
+
+def bench_store(num_rooms: int, items_per_room: int) -> dict:
+    with tempfile.TemporaryDirectory() as base_dir:
+        game_files = Path(base_dir) / "game_files"
+        game_files.mkdir()
+        world_file = game_files / "BENCH_WORLD.json"
+        write_world(
+            world_file, WorldSpec(num_rooms=num_rooms, items_per_room=items_per_room)
+        )
+
+        # Pickle sidecar written on the first load, so measure the second
+        world_template_cache.store_min_bytes = float("inf")
+        start_session(base_dir)
+        template = start_session(base_dir)
+
+        world_template_cache.store_min_bytes = 0
+        start = time.perf_counter()
+        WorldTemplateCache(store_min_bytes=0).get(world_file)
+        index_build = time.perf_counter() - start
+        store = start_session(base_dir)
+        world_template_cache.store_min_bytes = WorldTemplateCache().store_min_bytes
+        world_template_cache.clear()
+
+        return {
+            "rooms": num_rooms,
+            "file_mb": world_file.stat().st_size / 1024 / 1024,
+            "template": template,
+            "store": store,
+            "index_build_ms": index_build * 1000,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rooms", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--items-per-room", type=int, default=2)
+    args = parser.parse_args()
+
+    for num_rooms in args.rooms:
+        result = bench_store(num_rooms, args.items_per_room)
+        print(
+            f"rooms={result['rooms']:>8} ({result['file_mb']:.0f}MB) "
+            f"template: {result['template']['startup_ms']:8.1f}ms "
+            f"{result['template']['peak_mb']:7.1f}MB | "
+            f"store: {result['store']['startup_ms']:6.1f}ms "
+            f"{result['store']['peak_mb']:5.2f}MB "
+            f"(index build {result['index_build_ms']:.0f}ms)"
+        )
+
+
+if __name__ == "__main__":
+    main()
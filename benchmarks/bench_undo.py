@@ -0,0 +1,108 @@
+"""
+Cost of keeping undo history for the last N turns, and of undoing them.
+- history_kb: memory held by UndoHistory after N turns (diff records)
+- snapshot_kb: what a deep copy of the game state per turn would hold instead
+  (one get_game_state() copy times N)
+- undo_1_us: undoing the latest turn
+- undo_all_ms: undoing all N turns in one command
+
+Usage:
+    python -m benchmarks.bench_undo --rooms 1000 10000 --turns 1000
+"""
+
+from text_quest import history
+from text_quest.core import GameCoordinator
+from text_quest.output import BufferSink
+from text_quest.worldgen import WorldSpec, write_world
+import argparse
+from copy import deepcopy
+from pathlib import Path
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+
+def play_turns(game: GameCoordinator, num_turns: int):
+    """Wanders the world, taking the first item of every room it enters."""
+    for i in range(num_turns):
+        items = game.item_location_index.get_item_ids_at(game.current_room.get_id())
+        if items and i % 2 == 0:
+            game.handle_command(["take", items[0]])
+        else:
+            directions = list(game.current_room.connections_map)
+            game.handle_command(["move", directions[i % len(directions)]])
+        game.output.take()
+
+
+def traced_bytes(func, filename=None) -> int:
+    """Memory still allocated after func (by code in filename, if given)."""
+    tracemalloc.start()
+    # Kept alive until the snapshot is taken
+    result = func()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    if filename:
+        snapshot = snapshot.filter_traces([tracemalloc.Filter(True, filename)])
+    return sum(statistic.size for statistic in snapshot.statistics("filename"))
+
+
+def bench_undo(num_rooms: int, num_turns: int, repeat: int) -> dict:
+    with tempfile.TemporaryDirectory() as base_dir:
+        game_files = Path(base_dir) / "game_files"
+        game_files.mkdir()
+        write_world(game_files / "BENCH_WORLD.json", WorldSpec(num_rooms=num_rooms))
+        game = GameCoordinator(
+            filename="BENCH_WORLD",
+            base_dir=base_dir,
+            output=BufferSink(),
+            undo_turns=num_turns,
+        )
+
+        history_bytes = traced_bytes(
+            lambda: play_turns(game, num_turns), filename=history.__file__
+        )
+        snapshot_bytes = traced_bytes(lambda: deepcopy(game.get_game_state()))
+
+        undo_1 = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            game.handle_command(["undo"])
+            undo_1.append(time.perf_counter() - start)
+            game.output.take()
+        play_turns(game, repeat)
+
+        start = time.perf_counter()
+        game.handle_command(["undo", str(num_turns)])
+        undo_all = time.perf_counter() - start
+        turns_undone = game.output.take().split(" turn", 1)[0].rsplit(" ", 1)[-1]
+
+    return {
+        "history_kb": history_bytes / 1024,
+        "snapshot_kb": snapshot_bytes * num_turns / 1024,
+        "undo_1_us": statistics.median(undo_1) * 1e6,
+        "undo_all_ms": undo_all * 1000,
+        "turns_undone": turns_undone,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rooms", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--turns", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    for num_rooms in args.rooms:
+        result = bench_undo(num_rooms, args.turns, args.repeat)
+        print(
+            f"rooms={num_rooms:>8} turns={args.turns}: "
+            f"history {result['history_kb']:8.1f}KB "
+            f"(snapshot per turn {result['snapshot_kb'] / 1024:9.1f}MB) | "
+            f"undo 1: {result['undo_1_us']:6.1f}us "
+            f"undo {result['turns_undone']}: {result['undo_all_ms']:6.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
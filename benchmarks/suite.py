@@ -0,0 +1,302 @@
+"""
+Engine benchmark suite, results are written as JSON so releases can be compared.
+
+For each world size it measures:
+- commands: latency of look, move, take, inspect and inventory
+- construction: GameCoordinator start up, load_game_rooms/load_game_items, and
+  building every room and item
+- save_load: save_game_to_file (snapshot and journal) and load_game_from_file
+- memory: peak and retained bytes for one session
+
+Usage:
+    python -m benchmarks.suite --rooms 100 1000 10000 --output results.json
+    python -m benchmarks.suite --output new.json --compare results.json
+"""
+
+from text_quest.core import GameCoordinator
+from text_quest.output import BufferSink
+from text_quest.headless import HeadlessSession
+from text_quest.saves import get_journal_path
+from text_quest.world import world_template_cache
+from text_quest.worldgen import OPPOSITE_DIRECTIONS, WorldSpec, write_world
+import argparse
+from datetime import datetime, timezone
+import json
+from pathlib import Path
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List
+
+WORLD_NAME = "BENCH_WORLD"
+SAVE_NAME = "BENCH_SAVE"
+COMMAND_VERBS = ["look", "move", "take", "inspect", "inventory"]
+
+# Metrics where a larger value is an improvement, everything else is a cost
+HIGHER_IS_BETTER = ("_per_second",)
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Latency summary in microseconds."""
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean_us": sum(ordered) / len(ordered) * 1e6,
+        "p50_us": ordered[len(ordered) // 2] * 1e6,
+        "p95_us": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1e6,
+        "max_us": ordered[-1] * 1e6,
+    }
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def build_command_script(
+    num_commands: int, items_per_room: int, direction: str
+) -> List[str]:
+    """
+    Walks back and forth between room_0 and its neighbour in direction, taking
+    room_0's items on the way and inspecting the first one once it is carried.
+    """
+    script = []
+    for i in range(num_commands):
+        item_id = f"item_0_{min(i // 2, items_per_room - 1)}"
+        script.extend(["look", f"take {item_id}", "inspect item_0_0", "inventory"])
+        script.append(
+            f"move {direction}"
+            if i % 2 == 0
+            else f"move {OPPOSITE_DIRECTIONS[direction]}"
+        )
+    return script
+
+
+def bench_commands(
+    game: GameCoordinator, num_commands: int, items_per_room: int, direction: str
+):
+    session = HeadlessSession(game=game)
+    samples: Dict[str, List[float]] = {verb: [] for verb in COMMAND_VERBS}
+    for command in build_command_script(num_commands, items_per_room, direction):
+        elapsed, _ = timed(lambda: session.execute(command))
+        samples[command.split(" ")[0]].append(elapsed)
+    return {verb: summarize(verb_samples) for verb, verb_samples in samples.items()}
+
+
+def bench_construction(base_dir: str) -> dict:
+    world_template_cache.clear()
+    cold_s, game = timed(
+        lambda: GameCoordinator(
+            filename=WORLD_NAME, base_dir=base_dir, output=BufferSink()
+        )
+    )
+    warm_s, game = timed(
+        lambda: GameCoordinator(
+            filename=WORLD_NAME, base_dir=base_dir, output=BufferSink()
+        )
+    )
+    rooms_s, room_map = timed(game.load_game_rooms)
+    items_s, item_map = timed(game.load_game_items)
+    build_all_rooms_s, _ = timed(lambda: [room_map[room_id] for room_id in room_map])
+    build_all_items_s, _ = timed(lambda: [item_map[item_id] for item_id in item_map])
+    return {
+        "session_cold_ms": cold_s * 1000,
+        "session_warm_ms": warm_s * 1000,
+        "load_game_rooms_ms": rooms_s * 1000,
+        "load_game_items_ms": items_s * 1000,
+        "build_all_rooms_ms": build_all_rooms_s * 1000,
+        "build_all_items_ms": build_all_items_s * 1000,
+    }
+
+
+def bench_save_load(game: GameCoordinator, base_dir: str, repeat: int) -> dict:
+    save_path = Path(base_dir) / "save_files" / f"{SAVE_NAME}.json"
+
+    # Saves are written in the background, *_call_ms is the time the command waits
+    snapshot_call_s, _ = timed(lambda: game.save_game_to_file(SAVE_NAME))
+    flush_s, _ = timed(game.flush_saves)
+    snapshot_s = snapshot_call_s + flush_s
+    snapshot_bytes = save_path.stat().st_size
+
+    journal_samples = []
+    journal_call_samples = []
+    for i in range(repeat):
+        game.process_args(["move", "n" if i % 2 == 0 else "s"])
+        call_s, _ = timed(lambda: game.save_game_to_file(SAVE_NAME))
+        flush_s, _ = timed(game.flush_saves)
+        journal_call_samples.append(call_s)
+        journal_samples.append(call_s + flush_s)
+    journal_path = get_journal_path(save_path, game.save_journal.generation)
+    journal_bytes = journal_path.stat().st_size if journal_path.exists() else 0
+
+    world_template_cache.clear()
+    load_cold_s, _ = timed(
+        lambda: game.load_game_from_file(SAVE_NAME, dir="save_files")
+    )
+    load_warm_s, _ = timed(
+        lambda: game.load_game_from_file(SAVE_NAME, dir="save_files")
+    )
+    return {
+        "snapshot_ms": snapshot_s * 1000,
+        "snapshot_call_ms": snapshot_call_s * 1000,
+        "snapshot_bytes": snapshot_bytes,
+        "snapshot_bytes_per_second": snapshot_bytes / snapshot_s,
+        "journal_save_ms": sum(journal_samples) / len(journal_samples) * 1000,
+        "journal_call_ms": sum(journal_call_samples) / len(journal_call_samples) * 1000,
+        "journal_bytes": journal_bytes,
+        "load_cold_ms": load_cold_s * 1000,
+        "load_warm_ms": load_warm_s * 1000,
+        "load_bytes_per_second": (snapshot_bytes + journal_bytes) / load_cold_s,
+    }
+
+
+def bench_session_memory(
+    base_dir: str, num_commands: int, items_per_room: int, direction: str
+):
+    """Bytes allocated by one session on top of the shared (already loaded) template."""
+    GameCoordinator(filename=WORLD_NAME, base_dir=base_dir, output=BufferSink())
+    tracemalloc.start()
+    session = HeadlessSession(
+        game=GameCoordinator(
+            filename=WORLD_NAME, base_dir=base_dir, output=BufferSink()
+        )
+    )
+    session.run_script(build_command_script(num_commands, items_per_room, direction))
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"session_peak_bytes": peak, "session_retained_bytes": retained}
+
+
+def bench_world(num_rooms: int, items_per_room: int, num_commands: int) -> dict:
+    with tempfile.TemporaryDirectory() as base_dir:
+        (Path(base_dir) / "game_files").mkdir()
+        (Path(base_dir) / "save_files").mkdir()
+        world_file = Path(base_dir) / "game_files" / f"{WORLD_NAME}.json"
+        write_world(
+            world_file, WorldSpec(num_rooms=num_rooms, items_per_room=items_per_room)
+        )
+
+        construction = bench_construction(base_dir)
+        game = GameCoordinator(
+            filename=WORLD_NAME, base_dir=base_dir, output=BufferSink()
+        )
+        # Generated worlds start in room_0, which always has at least one exit
+        direction = next(iter(game.current_room.connections_map))
+        commands = bench_commands(game, num_commands, items_per_room, direction)
+        save_load = bench_save_load(game, base_dir, repeat=num_commands)
+        memory = bench_session_memory(base_dir, num_commands, items_per_room, direction)
+        world_template_cache.clear()
+
+        return {
+            "world": {
+                "rooms": num_rooms,
+                "items": num_rooms * items_per_room,
+                "file_bytes": world_file.stat().st_size,
+            },
+            "commands": commands,
+            "construction": construction,
+            "save_load": save_load,
+            "memory": memory,
+        }
+
+
+def get_git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def run_suite(room_counts: List[int], items_per_room: int, num_commands: int) -> dict:
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": get_git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+        },
+        "results": [
+            bench_world(num_rooms, items_per_room, num_commands)
+            for num_rooms in room_counts
+        ],
+    }
+
+
+def flatten(result: dict, prefix: str = "") -> Dict[str, float]:
+    """{'commands': {'look': {'p50_us': 1.0}}} -> {'commands.look.p50_us': 1.0}"""
+    flat = {}
+    for key, value in result.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, prefix=f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def find_regressions(baseline: dict, current: dict, tolerance: float) -> List[str]:
+    """Metrics that got worse by more than tolerance (ex: 0.2 = 20%), matched by room count."""
+    baseline_by_rooms = {r["world"]["rooms"]: flatten(r) for r in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        rooms = result["world"]["rooms"]
+        old_metrics = baseline_by_rooms.get(rooms)
+        if old_metrics is None:
+            continue
+        for metric, new_value in flatten(result).items():
+            old_value = old_metrics.get(metric)
+            if metric.startswith("world.") or metric.endswith(".count"):
+                continue
+            if not old_value or not isinstance(new_value, (int, float)):
+                continue
+            change = (new_value - old_value) / old_value
+            if metric.endswith(HIGHER_IS_BETTER):
+                change = -change
+            if change > tolerance:
+                regressions.append(
+                    f"rooms={rooms} {metric}: {old_value:.2f} -> {new_value:.2f} ({change:+.0%})"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rooms", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--items-per-room", type=int, default=2)
+    parser.add_argument("--commands", type=int, default=200)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", default=None, help="baseline results JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = run_suite(args.rooms, args.items_per_room, args.commands)
+    with open(args.output, mode="w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4)
+    for result in results["results"]:
+        commands = ", ".join(
+            f"{verb} {stats['p50_us']:.1f}us"
+            for verb, stats in result["commands"].items()
+        )
+        print(f"rooms={result['world']['rooms']}: {commands}")
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, mode="r", encoding="utf-8") as f:
+            regressions = find_regressions(json.load(f), results, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Tests for command parsing, aliases and item commands.
+"""
+
+from text_quest.commands import CommandParser
+from text_quest.core import GameCoordinator
+
+
+def test_parser_expands_aliases_and_abbreviations():
+    parser = CommandParser()
+
+    # Case 1: Aliases, abbreviations and full verbs
+    assert parser.parse("n") == ["move", "n"]
+    assert parser.parse("i") == ["inventory"]
+    assert parser.parse("inve") == ["inventory"]
+    assert parser.parse("tr armory") == ["travel", "armory"]
+    assert parser.parse("load SLOT1") == ["load", "SLOT1"]
+
+    # Case 2: Ambiguous prefixes are left for the game to reject
+    assert parser.parse("in") == ["in"]
+
+    # Case 3: Whitespace, case, two word verbs, articles and multi-word names
+    assert parser.parse("  TAKE \t lamp \r\n") == ["take", "lamp"]
+    assert parser.parse("pick up the lamp") == ["take", "lamp"]
+    assert parser.parse("inspect blank   map") == ["inspect", "blank map"]
+    assert parser.parse("turn on lamp") == ["on", "lamp"]
+    assert parser.parse("   ") == []
+
+
+def test_item_commands_and_multi_word_names():
+    game = GameCoordinator()
+
+    # Case 1: Item verbs come from the item's commands and cmd_to_config_map
+    assert game.process_args(game.parse_command("on lamp")) == (
+        "The lamp is already glowing brightly!"
+    )
+    assert game.process_args(game.parse_command("turn off the lamp")) == (
+        "You extinguish the lamp. Darkness surrounds you."
+    )
+    assert game.item_map["lamp"].get_property_value("is_lit") is False
+
+    # Case 2: Prerequisites are checked before the property changes
+    game.item_map["lamp"].set_property("fuel_remaining", 0)
+    assert game.process_args(["on", "lamp"]) == (
+        "The lamp is out of fuel and cannot be lit."
+    )
+    assert game.process_args(["eat", "lamp"]) == "You can't eat the lamp."
+
+    # Case 3: Names are matched case insensitively against visible items
+    game.process_args(game.parse_command("take the LAMP"))
+    assert "lamp" in game.player.get_inventory_items_by_id()
@@ -0,0 +1,130 @@
+"""
+Tests for timed effects declared in the game file.
+"""
+
+import json
+from pathlib import Path
+import pytest
+from text_quest.core import GameCoordinator
+from text_quest.output import BufferSink
+from text_quest.effects import EffectScheduler
+from text_quest.entities import Player
+
+REPO_GAME_FILES = Path(__file__).resolve().parent.parent / "game_files"
+
+LAMP_GOES_OUT = {
+    "target": ["item", "lamp"],
+    "property": "fuel_remaining",
+    "delta": -1,
+    "every": 1,
+    "while": [{"property": "is_lit", "condition": "equals", "value": True}],
+    "carried": True,
+    "min": 0,
+    "on_limit": {
+        "set": {"is_lit": False},
+        "message": "Your lamp sputters and goes out.",
+    },
+}
+
+
+@pytest.fixture
+def lamp_goes_out_game(tmp_path):
+    """Tutorial game whose lamp burn stops at 0 and puts the lamp out."""
+    with open(REPO_GAME_FILES / "TUTORIAL_GAME.json", encoding="utf-8") as f:
+        game_data = json.load(f)
+    game_data["effects"] = {"lamp_burns_fuel": LAMP_GOES_OUT}
+    (tmp_path / "game_files").mkdir()
+    with open(
+        tmp_path / "game_files" / "TUTORIAL_GAME.json", mode="w", encoding="utf-8"
+    ) as f:
+        json.dump(game_data, f)
+    return GameCoordinator(base_dir=str(tmp_path), output=BufferSink())
+
+
+def test_lamp_burns_fuel_only_while_lit_and_carried():
+    game = GameCoordinator(output=BufferSink())
+    lamp = game.item_map["lamp"]
+
+    # Case 1: Lamp is lit but still in start_room
+    game.process_args(["move", "n"])
+    assert lamp.get_property_value("fuel_remaining") == 10
+    assert game.effects.active == {}
+
+    # Case 2: Carried and lit, burns one unit per move
+    game.process_args(["move", "s"])
+    game.process_args(["take", "lamp"])
+    game.process_args(["move", "n"])
+    game.process_args(["move", "s"])
+    assert lamp.get_property_value("fuel_remaining") == 8
+
+    # Case 3: Turned off, stops burning until lit again
+    game.process_args(["off", "lamp"])
+    game.process_args(["move", "n"])
+    assert lamp.get_property_value("fuel_remaining") == 8
+    game.process_args(["on", "lamp"])
+    game.process_args(["move", "s"])
+    assert lamp.get_property_value("fuel_remaining") == 7
+
+    # Case 4: The tutorial lamp has no limit, it keeps burning past empty
+    lamp.set_property("fuel_remaining", 0)
+    game.process_args(["move", "n"])
+    assert lamp.get_property_value("fuel_remaining") == -1
+    assert lamp.get_property_value("is_lit") is True
+
+
+def test_effect_limit_puts_lamp_out(lamp_goes_out_game):
+    game = lamp_goes_out_game
+    lamp = game.item_map["lamp"]
+    game.process_args(["take", "lamp"])
+
+    # Case 1: Goes out when the fuel runs out, and can't be lit again
+    lamp.set_property("fuel_remaining", 1)
+    game.output.take()
+    game.process_args(["move", "n"])
+    assert "Your lamp sputters and goes out." in game.output.take()
+    assert lamp.get_property_value("fuel_remaining") == 0
+    assert lamp.get_property_value("is_lit") is False
+    assert game.effects.active == {}
+    assert game.process_args(["on", "lamp"]) == (
+        "The lamp is out of fuel and cannot be lit."
+    )
+
+
+def test_player_effect_period_and_limit():
+    player = Player.from_dict(
+        {
+            "health": 100,
+            "total_moves": 0,
+            "inventory": [],
+            "current_location": "start_room",
+            "properties": {"poisoned": True, "vigor": 3},
+        }
+    )
+    effects = {
+        "poison": {
+            "target": ["player"],
+            "property": "vigor",
+            "delta": -1,
+            "every": 2,
+            "while": [{"property": "poisoned", "condition": "equals", "value": True}],
+            "min": 0,
+            "on_limit": {"set": {"poisoned": False}, "message": "The poison fades."},
+        }
+    }
+    scheduler = EffectScheduler(effects, lambda kind, entity_id: player)
+    player.on_change = lambda kind, entity_id, *change: scheduler.refresh(
+        kind, entity_id
+    )
+    scheduler.refresh_all()
+
+    # Case 1: Applied every second tick
+    assert scheduler.tick() == []
+    assert player.properties["vigor"] == 3
+    scheduler.tick()
+    assert player.properties["vigor"] == 2
+
+    # Case 2: Stops at its limit and runs on_limit
+    messages = [message for _ in range(4) for message in scheduler.tick()]
+    assert messages == ["The poison fades."]
+    assert player.properties == {"poisoned": False, "vigor": 0}
+    assert scheduler.active == {}
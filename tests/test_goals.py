@@ -0,0 +1,61 @@
+"""
+Tests for goals declared in the game file.
+"""
+
+from text_quest.core import GameCoordinator
+from text_quest.goals import GoalTracker
+
+GOALS = {
+    "lit_lamp_in_hand": {
+        "conditions": [
+            {"type": "has_item", "params": ["lamp"]},
+            {"type": "item_property", "params": ["lamp", "is_lit", "equals", True]},
+        ],
+        "message": "Your lamp lights the way.",
+    },
+    "armory": {
+        "conditions": [{"type": "at_location", "params": ["armory"]}],
+        "message": "You found the armory.",
+    },
+}
+
+
+def test_goals_report_once_when_reached(capsys):
+    game = GameCoordinator()
+    game.goals = GoalTracker(GOALS, game.get_entity)
+    game.goals.reset()
+    assert game.goals.reached == set()
+
+    # Case 1: Reported when reached, not on every command after
+    capsys.readouterr()
+    game.handle_command(["take", "lamp"])
+    assert "Your lamp lights the way." in capsys.readouterr().out
+    game.handle_command(["look"])
+    assert "Your lamp lights the way." not in capsys.readouterr().out
+
+    # Case 2: Reported again after being lost and reached again
+    game.handle_command(["off", "lamp"])
+    assert game.goals.reached == set()
+    game.handle_command(["on", "lamp"])
+    assert "Your lamp lights the way." in capsys.readouterr().out
+
+    # Case 3: Only goals depending on the changed state are re-evaluated, moves only
+    # affect goals at the rooms left and entered
+    game.process_args(["move", "n"])
+    assert game.goals.stale == {}
+    game.process_args(["move", "s"])
+    game.process_args(["move", "w"])
+    assert list(game.goals.stale) == ["armory"]
+    game.goals.check()
+    game.process_args(["move", "e"])
+    assert list(game.goals.stale) == ["armory"]
+    game.goals.check()
+    game.process_args(["inspect", "lamp"])
+    assert game.goals.stale == {}
+
+
+def test_tutorial_goals_are_loaded_from_game_file():
+    game = GameCoordinator()
+    assert set(game.goals.goals) == {"ready_to_explore", "trophy_returned"}
+    assert game.goals.dependents[("inventory", "trophy")] == ["trophy_returned"]
+    assert "goals" in game.get_game_state()
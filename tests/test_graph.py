@@ -0,0 +1,79 @@
+"""
+Tests for RoomGraph shortest paths and the travel command.
+"""
+
+import pytest
+from text_quest.core import GameCoordinator
+from text_quest.graph import RoomGraph
+
+ROOMS = {
+    "start_room": {"connections_map": {"w": "armory", "n": "dark_maze_a"}},
+    "armory": {"connections_map": {"e": "start_room"}},
+    "dark_maze_a": {"connections_map": {"n": "dark_maze_b", "s": "start_room"}},
+    "dark_maze_b": {"connections_map": {"s": "dark_maze_a", "n": "boss_room"}},
+    "boss_room": {"connections_map": {"s": "dark_maze_b"}},
+}
+
+
+def test_shortest_path_and_invalidation():
+    graph = RoomGraph(ROOMS)
+
+    # Case 1: Path from the armory to the boss room
+    assert graph.find_path("armory", "boss_room") == [
+        ("e", "start_room"),
+        ("n", "dark_maze_a"),
+        ("n", "dark_maze_b"),
+        ("n", "boss_room"),
+    ]
+
+    # Case 2: A shortcut only drops trees it shortens, the template is untouched
+    graph.get_path_tree("boss_room")
+    graph.set_connection("start_room", "e", "boss_room")
+    assert "boss_room" in graph.trees
+    assert graph.get_distance("armory", "boss_room") == 2
+    assert "e" not in ROOMS["start_room"]["connections_map"]
+
+    # Case 3: Removing the only way back makes rooms unreachable
+    graph.set_connection("boss_room", "s", None)
+    assert not graph.is_reachable("boss_room", "start_room")
+    assert graph.get_reachable_rooms("boss_room") == ["boss_room"]
+
+
+def test_search_stops_at_target_and_resumes():
+    rooms = {
+        f"room_{i}": {"connections_map": {"e": f"room_{i + 1}"} if i < 99 else {}}
+        for i in range(100)
+    }
+    graph = RoomGraph(rooms)
+
+    # Case 1: Only rooms up to the target are searched
+    assert len(graph.find_path("room_0", "room_3")) == 3
+    assert "room_10" not in graph.trees["room_0"]
+
+    # Case 2: Later queries from the same source resume the cached search
+    assert graph.get_distance("room_0", "room_50") == 50
+    assert "room_99" not in graph.trees["room_0"]
+    assert graph.get_reachable_rooms("room_0")[-1] == "room_99"
+    assert "room_0" not in graph.frontiers
+
+    # Case 3: A shortcut out of a partly searched tree is followed
+    graph.find_path("room_1", "room_2")
+    graph.set_connection("room_1", "w", "room_60")
+    assert graph.get_distance("room_1", "room_60") == 1
+
+
+def test_travel_moves_player_along_path():
+    game = GameCoordinator()
+    total_moves = game.player.get_total_moves()
+
+    game.process_args(["travel", "dark_maze_b"])
+
+    assert game.current_room.get_id() == "dark_maze_b"
+    assert game.player.get_total_moves() > total_moves
+    assert game.room_map["dark_maze_a"].num_player_visits == 1
+
+    # Changed connections are followed by travel
+    game.room_map["dark_maze_b"].set_connection("w", "armory")
+    game.process_args(["travel", "armory"])
+    assert game.current_room.get_id() == "armory"
+    assert game.room_map["dark_maze_a"].num_player_visits == 1
@@ -0,0 +1,34 @@
+"""
+Tests for running TUTORIAL_GAME without a TTY via HeadlessSession.
+"""
+
+import pytest
+from text_quest.headless import HeadlessSession
+
+
+def test_script_outputs_and_quit():
+    session = HeadlessSession()
+    report = session.run_script(["take lamp", "inventory", "q", "look"])
+
+    # Case 1: Script stops at 'q' without exiting the process
+    assert report.finished
+    assert report.num_commands == 3
+
+    # Case 2: Output of each command is captured
+    outputs = report.get_outputs()
+    assert "lamp added to pack." in outputs[0]
+    assert "lamp" in outputs[1]
+    assert "Exiting game ..." in outputs[2]
+    assert report.commands_per_second > 0
+
+
+def test_restart_is_confirmed_by_next_command():
+    session = HeadlessSession()
+    session.execute("take lamp")
+
+    prompt_output = session.execute("restart")
+    assert "Are you sure you want to RESTART?" in prompt_output
+
+    restart_output = session.execute("y")
+    assert "Game restarted" in restart_output
+    assert "lamp" not in session.game.player.get_inventory_items_by_id()
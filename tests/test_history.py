@@ -0,0 +1,136 @@
+"""
+Tests for undoing turns with UndoHistory.
+"""
+
+import shutil
+from pathlib import Path
+from text_quest.core import GameCoordinator
+from text_quest.entities import ABSENT
+from text_quest.history import UndoHistory
+from text_quest.output import BufferSink
+from text_quest.saves import read_journal
+
+REPO_GAME_FILES = Path(__file__).resolve().parent.parent / "game_files"
+
+
+def test_undo_reverts_turns_in_order():
+    game = GameCoordinator(output=BufferSink())
+    game.handle_command(["take", "lamp"])
+    game.handle_command(["move", "n"])
+    game.handle_command(["look"])
+    assert len(game.history) == 2
+    game.output.take()
+
+    # Case 1: Latest turn first, the player is back where they were
+    game.handle_command(["undo"])
+    assert "Undid 1 turn." in game.output.take()
+    assert game.current_room.get_id() == "start_room"
+    assert "lamp" in game.player.get_inventory_items_by_id()
+
+    # Case 2: Undo isn't a turn, so the next undo goes further back
+    game.handle_command(["undo"])
+    assert "lamp" not in game.player.get_inventory_items_by_id()
+    assert game.item_map["lamp"].get_current_location() == "start_room"
+    assert "lamp" in game.get_items_in_current_room()
+    assert game.player.get_total_moves() == 0
+
+    # Case 3: Nothing left
+    game.handle_command(["undo"])
+    assert "Nothing to undo." in game.output.take()
+
+
+def test_undo_many_turns_at_once():
+    game = GameCoordinator(output=BufferSink())
+    game.handle_command(["take", "lamp"])
+    start_visits = game.current_room.num_player_visits
+    fuel = game.item_map["lamp"].get_property_value("fuel_remaining")
+    for direction in ["n", "s"] * 2:
+        game.handle_command(["move", direction])
+    game.handle_command(["off", "lamp"])
+    game.output.take()
+
+    game.handle_command(game.parse_command("rewind 5"))
+    assert "Undid 5 turns." in game.output.take()
+    assert game.current_room.get_id() == "start_room"
+    assert game.current_room.num_player_visits == start_visits
+    assert "lamp" in game.player.get_inventory_items_by_id()
+    assert game.item_map["lamp"].get_property_value("is_lit") is True
+    assert game.item_map["lamp"].get_property_value("fuel_remaining") == fuel
+    assert len(game.history) == 1
+
+    game.handle_command(["undo", "none"])
+    assert "Undo how many turns?" in game.output.take()
+    assert len(game.history) == 1
+
+
+def test_undone_changes_are_saved_and_loads_clear_history(tmp_path):
+    shutil.copytree(REPO_GAME_FILES, tmp_path / "game_files")
+    (tmp_path / "save_files").mkdir()
+    game = GameCoordinator(base_dir=str(tmp_path), output=BufferSink())
+    game.handle_command(["save", "SLOT1"])
+    game.handle_command(["take", "lamp"])
+    game.handle_command(["save", "SLOT1"])
+    game.handle_command(["undo"])
+    game.handle_command(["save", "SLOT1"])
+
+    game.handle_command(["load", "SLOT1"])
+    assert len(game.history) == 0
+    assert game.item_map["lamp"].get_current_location() == "start_room"
+    assert "lamp" not in game.player.get_inventory_items_by_id()
+
+
+def test_undo_goes_through_entity_setters():
+    game = GameCoordinator(output=BufferSink())
+    game.handle_command(["take", "lamp"])
+    game.history.begin_turn()
+    game.player.set_property("poisoned", True)
+    game.item_map["lamp"].set_property("fuel_remaining", 3)
+    game.history.end_turn()
+
+    # Case 1: Properties that weren't set before are removed, not set to None
+    game.handle_command(["undo"])
+    assert "poisoned" not in game.player.properties
+    assert game.item_map["lamp"].get_property_value("fuel_remaining") == 10
+    assert (
+        game.save_journal.pending[("player", None, "properties", "poisoned")] is ABSENT
+    )
+
+    # Case 2: Values are checked like any other change, ex: ints are coerced
+    game.apply_state_change("item", "lamp", "properties", "fuel_remaining", "7")
+    assert game.item_map["lamp"].get_property_value("fuel_remaining") == 7
+
+
+def test_removed_properties_are_journaled_without_a_value(tmp_path):
+    shutil.copytree(REPO_GAME_FILES, tmp_path / "game_files")
+    (tmp_path / "save_files").mkdir()
+    snapshot_path = tmp_path / "save_files" / "SLOT1.json"
+    game = GameCoordinator(base_dir=str(tmp_path), output=BufferSink())
+    game.handle_command(["save", "SLOT1"])
+    game.player.set_property("poisoned", True)
+    game.handle_command(["save", "SLOT1"])
+    game.player.delete_property("poisoned")
+    game.handle_command(["save", "SLOT1"])
+    game.flush_saves()
+    assert read_journal(snapshot_path, game.save_journal.generation) == [
+        ["player", None, "properties", "poisoned", True],
+        ["player", None, "properties", "poisoned"],
+    ]
+
+    game.handle_command(["load", "SLOT1"])
+    assert "poisoned" not in game.player.properties
+
+
+def test_history_keeps_the_latest_turns_with_changes():
+    history = UndoHistory(max_turns=2)
+    for turn in range(3):
+        history.begin_turn()
+        history.record("player", None, "total_moves", None, turn, turn + 1)
+        history.record("player", None, "total_moves", None, turn + 1, turn + 2)
+        history.end_turn()
+    history.begin_turn()
+    history.end_turn()
+
+    assert history.pop(5) == [
+        {("player", None, "total_moves", None): 2},
+        {("player", None, "total_moves", None): 1},
+    ]
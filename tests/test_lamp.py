@@ -3,7 +3,7 @@ Tests for Item class functionality using lamp.
 """
 
 import pytest
-from text_quest.entities import Item
+from text_quest.entities import Item, ItemLocationIndex, StateDescriptionTable
 
 LAMP_DATA = {
     "id": "lamp",
@@ -74,3 +74,39 @@ def test_lamp_inspect_command():
         lamp_inspect_result
         == "An old storm lantern bearing the stamp of 'Cloman Co-makers of reliable products'. It sits dark and unlit."
     )
+
+
+def test_lamp_location_index_follows_location_updates():
+    lamp = Item.from_dict(LAMP_DATA)
+    index = ItemLocationIndex(items=[lamp])
+    lamp.location_index = index
+    assert index.get_item_ids_at("start_room") == ["lamp"]
+
+    lamp.set_current_location(location="player_inventory")
+    assert index.get_item_ids_at("start_room") == []
+    assert index.get_item_ids_at("player_inventory") == ["lamp"]
+
+
+def test_fuel_state_descriptions_first_match_wins():
+    fuel_states = StateDescriptionTable(
+        {
+            "equals_0": "It is out of fuel.",
+            "less_than_3": "It sputters weakly.",
+            "greater_than_8": "It is nearly full.",
+            "greater_than_2": "It burns steadily.",
+        }
+    )
+    assert fuel_states.lookup(0) == "It is out of fuel."
+    assert fuel_states.lookup(-1) == "It sputters weakly."
+    assert fuel_states.lookup(2.5) == "It sputters weakly."
+    assert fuel_states.lookup(3) == "It burns steadily."
+    assert fuel_states.lookup(8) == "It burns steadily."
+    assert fuel_states.lookup(9) == "It is nearly full."
+    assert fuel_states.lookup("full") is None
+
+
+def test_lamp_is_slotted_and_round_trips():
+    lamp = Item.from_dict(LAMP_DATA)
+    assert not hasattr(lamp, "__dict__")
+    assert lamp.to_dict() == LAMP_DATA
+    assert lamp.execute_command("inspect") == lamp.inspect_object()
@@ -0,0 +1,71 @@
+"""
+Tests for the queued logging setup.
+"""
+
+import json
+import logging
+import pytest
+from text_quest.logger_config import (
+    JsonFormatter,
+    RateLimitFilter,
+    setup_logging,
+    stop_logging,
+)
+
+
+@pytest.fixture
+def restore_root_logger():
+    root_logger = logging.getLogger()
+    handlers, level = list(root_logger.handlers), root_logger.level
+    yield
+    for handler in list(root_logger.handlers):
+        root_logger.removeHandler(handler)
+        handler.close()
+    for handler in handlers:
+        root_logger.addHandler(handler)
+    root_logger.setLevel(level)
+
+
+def make_record(name: str, msg: str = "moved to %s", args=("armory",)):
+    return logging.LogRecord(name, logging.INFO, "core.py", 1, msg, args, None)
+
+
+def test_rate_limit_filter_limits_named_loggers_and_children():
+    rate_limit = RateLimitFilter({"text_quest.core": 2})
+
+    # Case 1: Burst of up to rate records, the rest are dropped
+    passed = [
+        rate_limit.filter(make_record("text_quest.core.GameCoordinator"))
+        for _ in range(5)
+    ]
+    assert passed == [True, True, False, False, False]
+    assert rate_limit.dropped == 3
+
+    # Case 2: Other loggers are not limited, records are only charged once
+    assert all(rate_limit.filter(make_record("text_quest.saves")) for _ in range(5))
+    record = make_record("text_quest.core")
+    assert rate_limit.filter(record) and rate_limit.filter(record)
+    assert rate_limit.filter(make_record("text_quest.core"))
+    assert not rate_limit.filter(make_record("text_quest.core"))
+
+
+def test_json_formatter_formats_lazily_built_message():
+    entry = json.loads(JsonFormatter().format(make_record("text_quest.core")))
+    assert entry["message"] == "moved to armory"
+    assert entry["logger"] == "text_quest.core"
+    assert entry["level"] == "INFO"
+
+
+def test_queued_logging_writes_json_lines(tmp_path, restore_root_logger):
+    log_file = tmp_path / "logs" / "text_quest.log"
+    listener = setup_logging(
+        log_level=logging.WARNING, log_file=str(log_file), json_format=True
+    )
+    logger = logging.getLogger("text_quest.test")
+    logger.info("below the level: %s", "dropped")
+    logger.warning("Game save: %s", "PROT01")
+    stop_logging(listener)
+    stop_logging(listener)
+
+    entries = [json.loads(line) for line in log_file.read_text().splitlines()]
+    assert [entry["message"] for entry in entries] == ["Game save: PROT01"]
@@ -0,0 +1,81 @@
+"""
+Tests for command, load and save metrics.
+"""
+
+from pathlib import Path
+import shutil
+from text_quest.core import GameCoordinator
+from text_quest.metrics import Histogram, MetricsRegistry
+
+REPO_GAME_FILES = Path(__file__).resolve().parent.parent / "game_files"
+
+
+def test_histogram_buckets_and_prometheus_text():
+    histogram = Histogram(bounds=[0.001, 0.01])
+    for value in [0.0005, 0.001, 0.005, 1.0]:
+        histogram.observe(value)
+    assert histogram.bucket_counts == [2, 1, 1]
+    assert histogram.quantile(0.5) == 0.001
+    assert histogram.quantile(0.99) == float("inf")
+
+    registry = MetricsRegistry()
+    registry.describe("requests_total", "Requests.")
+    registry.inc("requests_total", handler='say "hi"')
+    registry.observe("latency_seconds", 0.002, handler="handle_move")
+    text = registry.render_prometheus()
+    assert "# HELP requests_total Requests.\n# TYPE requests_total counter\n" in text
+    assert 'requests_total{handler="say \\"hi\\""} 1\n' in text
+    assert 'latency_seconds_bucket{handler="handle_move",le="0.001"} 0\n' in text
+    assert 'latency_seconds_bucket{handler="handle_move",le="0.0025"} 1\n' in text
+    assert 'latency_seconds_bucket{handler="handle_move",le="+Inf"} 1\n' in text
+    assert 'latency_seconds_count{handler="handle_move"} 1\n' in text
+
+    registry.const_labels = (("worker", "2"),)
+    text = registry.render_prometheus()
+    assert 'latency_seconds_count{worker="2",handler="handle_move"} 1\n' in text
+
+
+def test_commands_loads_and_saves_are_recorded(tmp_path):
+    shutil.copytree(REPO_GAME_FILES, tmp_path / "game_files")
+    (tmp_path / "save_files").mkdir()
+    game = GameCoordinator(base_dir=str(tmp_path))
+    game.metrics = MetricsRegistry()
+
+    # Case 1: Latency per handler, errors for unknown and failed commands
+    game.process_args(["move", "n"])
+    game.process_args(["move", "s"])
+    game.process_args(["dance"])
+    game.process_args(["load", "MISSING"])
+    summary = game.metrics.summary()
+    assert summary['text_quest_command_seconds{handler="handle_move"}']["count"] == 2
+    assert summary['text_quest_command_errors_total{handler="unknown"}'] == {"value": 1}
+    assert summary['text_quest_command_errors_total{handler="handle_load"}'] == {
+        "value": 1
+    }
+
+    # Case 2: Save and load bytes
+    game.process_args(["save", "SLOT1"])
+    game.flush_saves()
+    game.process_args(["load", "SLOT1"])
+    summary = game.metrics.summary()
+    size = (tmp_path / "save_files" / "SLOT1.json").stat().st_size
+    assert summary['text_quest_save_bytes_total{operation="write_snapshot"}'] == {
+        "value": size
+    }
+    assert summary['text_quest_load_bytes_total{source="save"}'] == {"value": size}
+
+
+def test_stats_command_is_admin_only():
+    game = GameCoordinator()
+    game.metrics = MetricsRegistry()
+
+    # Case 1: Admins see the metrics
+    game.process_args(game.parse_command("look"))
+    assert 'handler="handle_look"' in game.process_args(game.parse_command("stats"))
+
+    # Case 2: Players are told it doesn't exist, and it is counted as unknown
+    game.admin = False
+    assert game.process_args(["stats"]) == "Unknown command: stats"
+    summary = game.metrics.summary()
+    assert summary['text_quest_command_errors_total{handler="unknown"}'] == {"value": 1}
+    assert 'text_quest_command_errors_total{handler="handle_stats"}' not in summary
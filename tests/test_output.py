@@ -0,0 +1,51 @@
+"""
+Tests for output sinks and per-command flushing.
+"""
+
+import pytest
+from text_quest.core import GameCoordinator
+from text_quest.output import BufferSink, OutputSink
+
+
+class CountingSink(BufferSink):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def _write(self, data: str):
+        self.writes += 1
+        super()._write(data)
+
+
+def test_command_output_is_written_once():
+    sink = CountingSink()
+    game = GameCoordinator(output=sink)
+    assert sink.writes == 1
+    assert "DUNGEON ENTRANCE" in sink.take()
+
+    # Case 1: Several lines (room name, description, effects) in one write
+    game.handle_command(["take", "lamp"])
+    game.handle_command(["move", "n"])
+    assert sink.writes == 3
+    output = sink.take()
+    assert "lamp added to pack." in output
+    assert output.count("\n") > 2
+
+    # Case 2: Nothing printed, nothing written
+    sink.flush()
+    assert sink.writes == 3
+
+
+def test_print_arguments():
+    sink = BufferSink()
+    sink.print("a", 1, sep="-", end="")
+    sink.print("b")
+    assert sink.parts == ["a-1", "b\n"]
+    sink.flush()
+    assert sink.flushed == ["a-1b\n"]
+    assert sink.parts == []
+
+
+def test_sink_without_backend_cannot_be_created():
+    with pytest.raises(TypeError, match="_write"):
+        OutputSink()
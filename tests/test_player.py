@@ -3,7 +3,7 @@ Tests for Player class functionalities.
 """
 
 import pytest
-from text_quest.entities import Player
+from text_quest.entities import Item, Player
 
 PLAYER_DATA = {
     "health": 100,
@@ -29,3 +29,30 @@ def test_player_moves_from_start_room_to_dark_maze_1():
 def test_darkness_property():
     player = Player.from_dict(PLAYER_DATA)
     assert player.properties.get("in_darkness") == False
+
+
+def test_inventory_counts_order_and_serialization():
+    player = Player.from_dict(PLAYER_DATA)
+    coin, lamp = (
+        Item(item_id, item_id, "", "start_room", [], {}, {}, {})
+        for item_id in ["coin", "lamp"]
+    )
+
+    # Case 1: Stackable items are counted, listed once in pick up order
+    player.add_item_to_inventory(coin)
+    player.add_item_to_inventory(lamp)
+    player.add_item_to_inventory(coin)
+    assert list(player.get_inventory_items_by_id()) == ["blank_map", "coin", "lamp"]
+    assert player.inventory.count("coin") == 2
+    assert player.to_dict()["inventory"] == ["blank_map", "coin", "coin", "lamp"]
+
+    # Case 2: Removing takes one at a time, unknown items are left alone
+    assert player.remove_item_from_inventory(coin)
+    assert player.remove_item_from_inventory(coin)
+    assert not player.remove_item_from_inventory(coin)
+    assert "coin" not in player.get_inventory_items_by_id()
+
+    # Case 3: Round trips through to_dict/from_dict
+    restored = Player.from_dict(player.to_dict())
+    assert restored.inventory == player.inventory
+    assert PLAYER_DATA["inventory"] == ["blank_map"]
@@ -0,0 +1,34 @@
+"""
+Tests for the profiling mode.
+"""
+
+from text_quest.entities import Player
+from text_quest.profiling import FunctionIndex, profile_script
+
+
+def test_function_index_maps_lines_to_methods():
+    index = FunctionIndex()
+    code = Player.set_current_location.__code__
+    assert index.lookup(code.co_filename, code.co_firstlineno + 1) == (
+        "Player.set_current_location",
+        "entity",
+    )
+    assert index.lookup(code.co_filename, -1) is None
+    # handle_command wraps every handler, so it isn't one
+    assert ("GameCoordinator.handle_command", "handler") not in index.functions.values()
+
+
+def test_profile_groups_cpu_and_allocations_by_handler():
+    profile = profile_script(["take lamp", "n", "s", "inventory"])
+
+    # Case 1: Calls and time per handler and entity method
+    assert profile.num_commands == 4
+    assert profile.handlers["GameCoordinator.handle_move"].calls == 2
+    assert profile.handlers["GameCoordinator.handle_take"].cpu_seconds > 0
+    assert profile.entity_methods["Player.set_current_location"].calls == 2
+
+    # Case 2: Allocations are attributed and top sites listed
+    assert sum(group.allocations for group in profile.handlers.values()) > 0
+    assert profile.top_sites and profile.top_sites[0][1] > 0
+    report = profile.format(top=5)
+    assert "Handlers" in report and "Top allocation sites" in report
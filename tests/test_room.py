@@ -34,3 +34,72 @@ def test_room_creation_and_modified_description():
     # Case 2: Lamp is NOT present in the room
     desc_without_lamp = room.generate_modified_description(items_in_room=[])
     assert "An old lamp sits on the workbench" not in desc_without_lamp
+
+
+def test_room_description_cached_by_dependencies():
+    room_data = {
+        "id": "boss_room",
+        "name": "OGRE'S DEN",
+        "base_description": "A large ogre awaits.",
+        "num_player_visits": 0,
+        "connections_map": {"s": "dark_maze_b"},
+        "properties": {
+            "conditional_descriptions": {
+                "first_visit": {
+                    "condition": {"type": "visit_count_less", "params": [2]},
+                    "description_modifier": "The ogre grabs you.",
+                }
+            }
+        },
+    }
+    room = Room.from_dict(room_data)
+
+    # Case 1: Unrelated items and visits below the threshold share one cached description
+    first_look = room.generate_modified_description(items_in_room=["lamp"])
+    room.increment_num_player_visits()
+    assert room.generate_modified_description(items_in_room=[]) is first_look
+
+    # Case 2: Crossing the visit threshold renders a new description
+    room.increment_num_player_visits()
+    assert room.generate_modified_description() == "A large ogre awaits."
+
+
+def test_room_description_rebuilt_after_set_property():
+    room_data = {
+        "id": "armory",
+        "name": "ARMORY",
+        "base_description": "Racks of rusted weapons line the walls.",
+        "num_player_visits": 0,
+        "connections_map": {"e": "start_room"},
+        "properties": {"conditional_descriptions": {}},
+    }
+    room = Room.from_template(room_data)
+    base_description = room.generate_modified_description(items_in_room=["sword"])
+
+    # Case 1: Without a change the description stays the same
+    room.set_property("flooded", True)
+    assert room.generate_modified_description(items_in_room=["sword"]) == (
+        base_description
+    )
+
+    # Case 2: New conditional descriptions are rendered on the next call
+    room.set_property(
+        "conditional_descriptions",
+        {
+            "sword_present": {
+                "condition": {"type": "has_item", "params": ["sword"]},
+                "description_modifier": "A sword gleams on the top rack.",
+            }
+        },
+    )
+    assert room.generate_modified_description(items_in_room=["sword"]) == (
+        "Racks of rusted weapons line the walls. A sword gleams on the top rack."
+    )
+    assert room.generate_modified_description(items_in_room=[]) == base_description
+
+    # Case 3: Removing them restores the base description, the template is untouched
+    room.delete_property("conditional_descriptions")
+    assert room.generate_modified_description(items_in_room=["sword"]) == (
+        base_description
+    )
+    assert room_data["properties"] == {"conditional_descriptions": {}}
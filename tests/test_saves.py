@@ -0,0 +1,268 @@
+"""
+Tests for journaled saves (snapshot + journal of changes).
+"""
+
+import shutil
+from pathlib import Path
+import pytest
+import sqlite3
+import threading
+from text_quest.core import GameCoordinator
+from text_quest.output import BufferSink
+from text_quest.saves import (
+    FileSaveStore,
+    InvalidSlotError,
+    SaveStore,
+    SqliteSaveDatabase,
+    background_saver,
+    get_journal_path,
+    new_generation,
+    read_journal,
+)
+
+REPO_GAME_FILES = Path(__file__).resolve().parent.parent / "game_files"
+
+
+@pytest.fixture
+def game(tmp_path):
+    """GameCoordinator that reads and writes under tmp_path instead of the repo."""
+    shutil.copytree(REPO_GAME_FILES, tmp_path / "game_files")
+    (tmp_path / "save_files").mkdir()
+    return GameCoordinator(base_dir=str(tmp_path))
+
+
+def test_saves_append_changes_to_journal(game, tmp_path):
+    snapshot_path = tmp_path / "save_files" / "SLOT1.json"
+
+    # Case 1: First save writes a full snapshot
+    game.process_args(["save", "SLOT1"])
+    game.flush_saves()
+    assert snapshot_path.exists()
+    generation = game.save_journal.generation
+    assert read_journal(snapshot_path, generation) == []
+
+    # Case 2: Later saves only append what changed
+    game.process_args(["take", "lamp"])
+    game.process_args(["move", "n"])
+    snapshot_before = snapshot_path.read_text(encoding="utf-8")
+    game.process_args(["save", "SLOT1"])
+    game.flush_saves()
+    assert snapshot_path.read_text(encoding="utf-8") == snapshot_before
+    records = read_journal(snapshot_path, generation)
+    assert ["item", "lamp", "current_location", None, "player_inventory"] in records
+    assert ["player", None, "current_location", None, "dark_maze_a"] in records
+
+
+def test_load_replays_journal_onto_snapshot(game):
+    game.process_args(["save", "SLOT1"])
+    game.process_args(["take", "lamp"])
+    game.process_args(["move", "n"])
+    game.process_args(["save", "SLOT1"])
+    total_moves = game.player.get_total_moves()
+
+    game.process_args(["move", "s"])
+    game.process_args(["load", "SLOT1"])
+
+    assert game.current_room.get_id() == "dark_maze_a"
+    assert game.player.get_total_moves() == total_moves
+    assert "lamp" in game.player.get_inventory_items_by_id()
+    assert game.item_map["lamp"].get_current_location() == "player_inventory"
+    assert game.room_map["dark_maze_a"].num_player_visits == 1
+
+
+def test_journal_is_compacted_into_snapshot(game, tmp_path):
+    snapshot_path = tmp_path / "save_files" / "SLOT1.json"
+    game.save_journal.compact_after = 2
+    game.process_args(["save", "SLOT1"])
+    game.process_args(["take", "lamp"])
+    game.process_args(["move", "n"])
+    generation = game.save_journal.generation
+    game.process_args(["save", "SLOT1"])
+    game.flush_saves()
+
+    assert game.save_journal.generation != generation
+    assert not get_journal_path(snapshot_path, generation).exists()
+    assert '"current_location":"dark_maze_a"' in snapshot_path.read_text(
+        encoding="utf-8"
+    )
+
+
+def test_slots_outside_the_save_directory_are_rejected(tmp_path):
+    shutil.copytree(REPO_GAME_FILES, tmp_path / "game_files")
+    game = GameCoordinator(base_dir=str(tmp_path), output=BufferSink())
+    game.output.take()
+
+    # Case 1: Save and load refuse slots that aren't plain names
+    for command in ["save", "load"]:
+        for slot in ["../game_files/escaped", "../game_files/TUTORIAL_GAME", ""]:
+            assert isinstance(game.process_args([command, slot]), InvalidSlotError)
+            assert f"Invalid save name '{slot}'" in game.output.take()
+    game.flush_saves()
+    assert sorted(path.name for path in (tmp_path / "game_files").iterdir()) == [
+        "TUTORIAL_GAME.json",
+        "__cache__",
+    ]
+    assert not (tmp_path / "save_files").exists()
+
+    # Case 2: Stores enforce the same rule for callers that skip the commands
+    store = FileSaveStore(tmp_path / "save_files")
+    with pytest.raises(InvalidSlotError):
+        store.write_snapshot("../escaped", {"generation": new_generation()})
+    database = SqliteSaveDatabase(tmp_path / "saves.sqlite")
+    with pytest.raises(InvalidSlotError):
+        database.get_store("alice").read("a/b")
+    database.close()
+
+
+def test_incomplete_save_store_cannot_be_created(tmp_path):
+    class SnapshotOnlyStore(SaveStore):
+        def write_snapshot(self, slot, game_state):
+            return 0
+
+    with pytest.raises(TypeError, match="append_journal"):
+        SnapshotOnlyStore()
+
+
+def test_sqlite_store_batches_saves_by_player(tmp_path):
+    database = SqliteSaveDatabase(tmp_path / "saves.sqlite", batch_delay=60)
+    alice = GameCoordinator(save_store=database.get_store("alice"))
+    bob = GameCoordinator(save_store=database.get_store("bob"))
+
+    # Case 1: Saves from both sessions are queued and committed in one transaction
+    alice.process_args(["save", "SLOT1"])
+    alice.process_args(["take", "lamp"])
+    alice.process_args(["save", "SLOT1"])
+    bob.process_args(["move", "n"])
+    bob.process_args(["save", "SLOT1"])
+    with sqlite3.connect(tmp_path / "saves.sqlite") as connection:
+        assert connection.execute("SELECT COUNT(*) FROM saves").fetchone()[0] == 0
+    alice.flush_saves()
+    bob.flush_saves()
+    database.flush()
+    with sqlite3.connect(tmp_path / "saves.sqlite") as connection:
+        assert connection.execute("SELECT COUNT(*) FROM saves").fetchone()[0] == 2
+
+    # Case 2: Each player loads their own save, rebuilt from snapshot and journal
+    alice.process_args(["move", "n"])
+    alice.process_args(["load", "SLOT1"])
+    assert alice.current_room.get_id() == "start_room"
+    assert "lamp" in alice.player.get_inventory_items_by_id()
+    bob.process_args(["load", "SLOT1"])
+    assert bob.current_room.get_id() == "dark_maze_a"
+    assert "lamp" not in bob.player.get_inventory_items_by_id()
+
+    # Case 3: Missing saves fail to load without changing the game
+    assert database.get_store("alice").list_slots() == ["SLOT1"]
+    assert isinstance(bob.process_args(["load", "SLOT2"]), FileNotFoundError)
+    assert bob.current_room.get_id() == "dark_maze_a"
+    database.close()
+
+
+def test_saves_are_written_in_background_and_crash_safe(game, tmp_path, monkeypatch):
+    snapshot_path = tmp_path / "save_files" / "SLOT1.json"
+    game.process_args(["save", "SLOT1"])
+    game.flush_saves()
+    snapshot_before = snapshot_path.read_text(encoding="utf-8")
+
+    # Case 1: A write failing part way leaves the previous snapshot intact
+    def fail_fsync(fd):
+        raise OSError("disk full")
+
+    monkeypatch.setattr("os.fsync", fail_fsync)
+    game.save_journal.compact_after = 0
+    game.process_args(["take", "lamp"])
+    game.process_args(["save", "SLOT1"])
+    assert game.flush_saves(timeout=5)
+    assert snapshot_path.read_text(encoding="utf-8") == snapshot_before
+    assert list(snapshot_path.parent.glob("*.tmp")) == []
+
+    # Case 2: The next save rewrites the snapshot, journal records lost are included
+    monkeypatch.undo()
+    game.save_journal.compact_after = 1000
+    game.process_args(["move", "n"])
+    game.process_args(["save", "SLOT1"])
+    game.process_args(["load", "SLOT1"])
+    assert game.current_room.get_id() == "dark_maze_a"
+    assert "lamp" in game.player.get_inventory_items_by_id()
+
+    # Case 3: A torn journal line doesn't swallow records appended after it
+    generation = game.save_journal.generation
+    with open(
+        get_journal_path(snapshot_path, generation), mode="a", encoding="utf-8"
+    ) as f:
+        f.write('["player", null, "tot')
+    game.process_args(["move", "s"])
+    game.process_args(["save", "SLOT1"])
+    game.flush_saves()
+    assert ["player", None, "current_location", None, "start_room"] in read_journal(
+        snapshot_path, generation
+    )
+
+
+def test_load_only_waits_for_own_saves(game):
+    game.process_args(["save", "SLOT1"])
+    game.process_args(["move", "n"])
+    game.process_args(["save", "SLOT1"])
+    game.flush_saves()
+    # Another session's save still being written
+    release = threading.Event()
+    background_saver.submit(release.wait, 5)
+    try:
+        game.process_args(["load", "SLOT1"])
+        assert game.current_room.get_id() == "dark_maze_a"
+        assert not background_saver.flush(timeout=0)
+        assert game.flush_saves(timeout=0)
+    finally:
+        release.set()
+    assert background_saver.flush(timeout=5)
+
+
+def test_saves_replaced_by_another_session_are_not_appended_to(game, tmp_path):
+    snapshot_path = tmp_path / "save_files" / "SLOT1.json"
+    other_game = GameCoordinator(base_dir=str(tmp_path))
+    game.process_args(["save", "SLOT1"])
+    game.flush_saves()
+
+    # Case 1: Appending to a snapshot another session replaced fails, and the next
+    # save writes a full snapshot instead
+    other_game.process_args(["move", "n"])
+    other_game.process_args(["save", "SLOT1"])
+    other_game.flush_saves()
+    game.process_args(["take", "lamp"])
+    game.process_args(["save", "SLOT1"])
+    game.flush_saves()
+    assert read_journal(snapshot_path, other_game.save_journal.generation) == []
+    assert game.save_journal.needs_snapshot(game.save_store.get_save_id("SLOT1"))
+    game.process_args(["save", "SLOT1"])
+    game.process_args(["load", "SLOT1"])
+    assert game.current_room.get_id() == "start_room"
+    assert "lamp" in game.player.get_inventory_items_by_id()
+
+    # Case 2: Journals of other generations are ignored on load
+    with open(
+        get_journal_path(snapshot_path, new_generation()), mode="w", encoding="utf-8"
+    ) as f:
+        f.write('["player",null,"current_location",null,"dark_maze_a"]\n')
+    game.process_args(["load", "SLOT1"])
+    assert game.current_room.get_id() == "start_room"
+
+
+def test_sqlite_saves_replaced_by_another_session_are_not_appended_to(tmp_path):
+    database = SqliteSaveDatabase(tmp_path / "saves.sqlite")
+    game = GameCoordinator(save_store=database.get_store("alice"))
+    other_game = GameCoordinator(save_store=database.get_store("alice"))
+    game.process_args(["save", "SLOT1"])
+    other_game.process_args(["move", "n"])
+    other_game.process_args(["save", "SLOT1"])
+    game.process_args(["take", "lamp"])
+    game.process_args(["save", "SLOT1"])
+    game.flush_saves()
+
+    other_game.process_args(["load", "SLOT1"])
+    assert other_game.current_room.get_id() == "dark_maze_a"
+    assert "lamp" not in other_game.player.get_inventory_items_by_id()
+    game.process_args(["save", "SLOT1"])
+    game.process_args(["load", "SLOT1"])
+    assert game.current_room.get_id() == "start_room"
+    assert "lamp" in game.player.get_inventory_items_by_id()
+    database.close()
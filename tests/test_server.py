@@ -0,0 +1,195 @@
+"""
+Tests for hosting concurrent sessions with GameServer.
+"""
+
+import asyncio
+from pathlib import Path
+import pytest
+import socket
+import subprocess
+import sys
+import threading
+import time
+from text_quest.core import PROMPT, GameCoordinator
+from text_quest.headless import HeadlessSession
+from text_quest.saves import FileSaveStore
+from text_quest.server import (
+    GameServer,
+    PreforkServer,
+    get_player_save_store,
+    get_worker_path,
+)
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+
+async def read_until_prompt(reader, prompt=PROMPT):
+    data = await reader.readuntil(prompt.encode("utf-8"))
+    return data.decode("utf-8")
+
+
+def test_sessions_are_independent():
+    async def scenario():
+        game_server = GameServer()
+        server = await game_server.start(host="127.0.0.1", port=0)
+        port = server.sockets[0].getsockname()[1]
+
+        reader_a, writer_a = await asyncio.open_connection("127.0.0.1", port)
+        reader_b, writer_b = await asyncio.open_connection("127.0.0.1", port)
+        assert "DUNGEON ENTRANCE" in await read_until_prompt(reader_a)
+        await read_until_prompt(reader_b)
+
+        # Case 1: Player A waits on the restart prompt, player B keeps playing
+        writer_a.write(b"restart\n")
+        assert "RESTART?" in await read_until_prompt(reader_a, prompt="(y/n): ")
+        writer_b.write(b"take lamp\n")
+        assert "lamp added to pack." in await read_until_prompt(reader_b)
+
+        # Case 2: Player A quits, player B is still connected
+        writer_a.write(b"n\nq\n")
+        assert "Very well" in await read_until_prompt(reader_a)
+        assert "Exiting game" in (await reader_a.read()).decode("utf-8")
+        writer_b.write(b"inventory\n")
+        assert "lamp" in await read_until_prompt(reader_b)
+
+        writer_b.close()
+        await writer_b.wait_closed()
+        server.close()
+        await server.wait_closed()
+        return game_server
+
+    game_server = asyncio.run(scenario())
+    assert game_server.total_sessions == 2
+    assert game_server.latency.summary()["take"]["count"] == 1
+
+
+class BlockingSaveStore(FileSaveStore):
+    """Reads wait until release is set, ex: a load stuck on a slow disk."""
+
+    def __init__(self, save_dir, release: threading.Event):
+        super().__init__(save_dir)
+        self.release = release
+
+    def read(self, slot):
+        self.release.wait(10)
+        return super().read(slot)
+
+
+def test_slow_command_does_not_delay_other_sessions(tmp_path):
+    release = threading.Event()
+
+    def session_factory():
+        return HeadlessSession(
+            game_factory=lambda output: GameCoordinator(
+                save_store=BlockingSaveStore(tmp_path, release), output=output
+            )
+        )
+
+    async def scenario():
+        game_server = GameServer(session_factory=session_factory)
+        server = await game_server.start(host="127.0.0.1", port=0)
+        port = server.sockets[0].getsockname()[1]
+        reader_a, writer_a = await asyncio.open_connection("127.0.0.1", port)
+        reader_b, writer_b = await asyncio.open_connection("127.0.0.1", port)
+        await read_until_prompt(reader_a)
+        await read_until_prompt(reader_b)
+
+        # Case 1: Player A's load is blocked, player B is still answered
+        writer_a.write(b"load SLOT1\n")
+        await writer_a.drain()
+        start = time.monotonic()
+        writer_b.write(b"look\n")
+        assert "basement" in await read_until_prompt(reader_b)
+        assert time.monotonic() - start < 5
+
+        # Case 2: Player A gets their answer once the load finishes
+        release.set()
+        assert "ERROR" in await read_until_prompt(reader_a)
+
+        for writer in (writer_a, writer_b):
+            writer.close()
+            await writer.wait_closed()
+        server.close()
+        await server.wait_closed()
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        release.set()
+
+
+def test_players_have_their_own_save_files(tmp_path):
+    alice = get_player_save_store("alice", base_dir=str(tmp_path))
+    bob = get_player_save_store("bob", base_dir=str(tmp_path))
+    assert alice.get_snapshot_path("SLOT1") == tmp_path / "save_files/alice/SLOT1.json"
+    assert bob.get_snapshot_path("SLOT1") == tmp_path / "save_files/bob/SLOT1.json"
+
+
+def read_socket_until(sock, prompt=PROMPT):
+    data = b""
+    while not data.endswith(prompt.encode("utf-8")):
+        chunk = sock.recv(4096)
+        assert chunk, f"connection closed after {data!r}"
+        data += chunk
+    return data.decode("utf-8")
+
+
+# Run in a fresh interpreter, forking this multi-threaded test process isn't safe
+PREFORK_SCRIPT = """
+import socket
+from text_quest.server import PreforkServer
+from tests.test_server import read_socket_until
+
+prefork = PreforkServer(num_workers=2)
+prefork.restart_delay = 0
+host, port = prefork.bind(host="127.0.0.1", port=0).getsockname()
+prefork.start()
+try:
+    assert len(prefork.workers) == 2
+    connections = [socket.create_connection((host, port), timeout=10) for _ in range(3)]
+    for connection in connections:
+        assert "DUNGEON ENTRANCE" in read_socket_until(connection)
+    connections[0].sendall(b"take lamp\\n")
+    assert "lamp added to pack." in read_socket_until(connections[0])
+    connections[1].sendall(b"inventory\\n")
+    assert "lamp" not in read_socket_until(connections[1])
+    for connection in connections:
+        connection.close()
+finally:
+    prefork.stop()
+    prefork.supervise()
+    prefork.sock.close()
+assert prefork.workers == {}
+"""
+
+
+def test_prefork_workers_share_the_listening_socket():
+    result = subprocess.run(
+        [sys.executable, "-W", "error", "-c", PREFORK_SCRIPT],
+        cwd=REPO_DIR,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+
+
+def test_prefork_refuses_to_fork_with_threads_running():
+    prefork = PreforkServer(num_workers=1)
+    release = threading.Event()
+    thread = threading.Thread(target=release.wait, args=(5,))
+    thread.start()
+    try:
+        with pytest.raises(RuntimeError, match="threads are running"):
+            prefork.spawn_worker(0)
+    finally:
+        release.set()
+        thread.join()
+    assert prefork.workers == {}
+
+
+def test_worker_path():
+    assert (
+        get_worker_path("metrics/text_quest.prom", 2)
+        == "metrics/text_quest.worker2.prom"
+    )
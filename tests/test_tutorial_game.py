@@ -23,3 +23,16 @@ def test_game_loads_and_starts(monkeypatch):
     # Run the game loop (should exit immediately due to 'q' input)
     with pytest.raises(SystemExit):
         game.run_game()
+
+
+def test_items_in_current_room_after_take():
+    game = GameCoordinator()
+    assert "lamp" in game.get_items_in_current_room()
+
+    game.process_args(["take", "lamp"])
+    game.process_args(["move", "w"])
+
+    # Lamp travels with the player into the armory
+    items_in_armory = game.get_items_in_current_room()
+    assert "lamp" in items_in_armory
+    assert game.item_location_index.get_item_ids_at("start_room") == []
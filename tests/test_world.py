@@ -0,0 +1,177 @@
+"""
+Tests for sharing a WorldTemplate between game sessions.
+"""
+
+from copy import deepcopy
+import json
+import os
+import pytest
+from text_quest.core import GameCoordinator
+from text_quest.store import EntityTable, ItemLocationTable, WorldStore
+from text_quest.world import (
+    EntityMap,
+    OverlayWorld,
+    WorldTemplate,
+    WorldTemplateCache,
+    world_template_cache,
+)
+from text_quest.worldgen import WorldSpec, write_world
+
+SMALL_WORLD = {
+    "rooms": {},
+    "items": {"key": {"current_location": "hall"}},
+    "player": {"current_location": "hall"},
+}
+
+
+def test_sessions_share_template_without_sharing_state():
+    game_a = GameCoordinator()
+    game_b = GameCoordinator()
+
+    # Case 1: Both sessions are built from the same parsed game file
+    assert game_a.world is game_b.world
+
+    # Case 2: Changes in one session are not seen by the other or the template
+    game_a.process_args(["take", "lamp"])
+    assert "lamp" in game_a.player.get_inventory_items_by_id()
+    assert "lamp" not in game_b.player.get_inventory_items_by_id()
+    assert "lamp" in game_b.get_items_in_current_room()
+    assert game_a.world.items["lamp"]["current_location"] == "start_room"
+    assert game_a.world.player["inventory"] == ["blank_map"]
+
+
+def test_session_only_builds_touched_entities():
+    game = GameCoordinator()
+    assert set(game.room_map.live) == {"start_room"}
+    # Effect targets are checked on load, see EffectScheduler.refresh_all
+    assert set(game.item_map.live) == {"lamp"}
+
+    game.process_args(["move", "n"])
+    assert set(game.room_map.live) == {"start_room", "dark_maze_a"}
+    assert len(game.get_game_state()["rooms"]) == len(game.world.rooms)
+
+
+def test_template_cache_invalidated_by_file_change(tmp_path):
+    world_file = tmp_path / "SMALL_WORLD.json"
+    world_file.write_text(json.dumps(SMALL_WORLD), encoding="utf-8")
+    cache = WorldTemplateCache()
+
+    # Case 1: Unchanged file is only parsed once
+    world = cache.get(world_file)
+    assert cache.get(world_file) is world
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Case 2: Rewritten file is parsed again
+    moved_key_world = deepcopy(SMALL_WORLD)
+    moved_key_world["items"]["key"]["current_location"] = "cellar"
+    world_file.write_text(json.dumps(moved_key_world), encoding="utf-8")
+    os.utime(world_file, ns=(0, 1))
+    assert cache.get(world_file).item_locations == {"cellar": ("key",)}
+
+
+def test_template_sidecar_skips_json_parsing(tmp_path, monkeypatch):
+    world_file = tmp_path / "SMALL_WORLD.json"
+    world_file.write_text(json.dumps(SMALL_WORLD), encoding="utf-8")
+    WorldTemplateCache().get(world_file, use_sidecar=True)
+    assert WorldTemplateCache.get_sidecar_path(world_file).exists()
+
+    # A fresh cache (ex: new process) reads the sidecar instead of the JSON file
+    monkeypatch.setattr("json.load", lambda f: pytest.fail("JSON was parsed"))
+    world = WorldTemplateCache().get(world_file, use_sidecar=True)
+    assert world.items["key"]["current_location"] == "hall"
+
+
+def test_large_world_served_from_store(tmp_path, monkeypatch):
+    world_file = tmp_path / "GENERATED.json"
+    write_world(world_file, WorldSpec(num_rooms=50, items_per_room=2, seed=3))
+    template = WorldTemplate.from_file(world_file)
+
+    # Case 1: The store serves the same data as a fully parsed template
+    store = WorldTemplateCache(store_min_bytes=0).get(world_file, use_sidecar=True)
+    assert isinstance(store, WorldStore)
+    assert WorldTemplateCache.get_sidecar_path(world_file, suffix=".sqlite").exists()
+    assert dict(store.rooms.items()) == dict(template.rooms)
+    assert dict(store.items) == dict(template.items)
+    assert dict(store.item_locations) == dict(template.item_locations)
+    assert "room_49" in store.rooms and "room_50" not in store.rooms
+    assert dict(store.player) == dict(template.player)
+
+    # Case 2: A fresh cache (ex: new process) reuses the index without parsing JSON
+    monkeypatch.setattr("json.load", lambda f: pytest.fail("JSON was parsed"))
+    monkeypatch.setattr(
+        "text_quest.store.build_world_index",
+        lambda *args: pytest.fail("Index was rebuilt"),
+    )
+    store = WorldTemplateCache(store_min_bytes=0).get(world_file, use_sidecar=True)
+    assert store.items["item_0_1"]["current_location"] == "room_0"
+
+
+def test_session_plays_and_saves_from_store(tmp_path, monkeypatch):
+    (tmp_path / "game_files").mkdir()
+    (tmp_path / "save_files").mkdir()
+    write_world(tmp_path / "game_files" / "GENERATED.json", WorldSpec(num_rooms=50))
+    # The game file is served from a store, saves holding only changes are parsed
+    monkeypatch.setattr(world_template_cache, "store_min_bytes", 10000)
+
+    # Neither starting a session nor saving reads every entity in the store
+    def read_all(*args):
+        raise AssertionError("read every row of the store")
+
+    monkeypatch.setattr(EntityTable, "__iter__", read_all)
+    monkeypatch.setattr(EntityTable, "__len__", read_all)
+    monkeypatch.setattr(EntityTable, "iter_rows", read_all)
+    monkeypatch.setattr(ItemLocationTable, "__iter__", read_all)
+    monkeypatch.setattr(ItemLocationTable, "__len__", read_all)
+    game = GameCoordinator(filename="GENERATED", base_dir=str(tmp_path))
+    assert isinstance(game.world, WorldStore)
+
+    # Case 1: Saves only hold the entities that changed
+    direction = next(iter(game.current_room.connections_map))
+    game.process_args(["take", "item_0_0"])
+    game.process_args(["move", direction])
+    room_id = game.player.get_current_location()
+    game.process_args(["save", "STORE_SAVE"])
+    game.flush_saves()
+    with open(tmp_path / "save_files" / "STORE_SAVE.json", encoding="utf-8") as f:
+        save_data = json.load(f)
+    assert list(save_data["items"]) == ["item_0_0"]
+    assert list(save_data["rooms"]) == [room_id]
+
+    # Case 2: Loading layers the changes over the game file
+    loaded = GameCoordinator(filename="GENERATED", base_dir=str(tmp_path))
+    loaded.process_args(["load", "STORE_SAVE"])
+    assert isinstance(loaded.world, OverlayWorld)
+    assert loaded.world.base is game.world
+    assert loaded.player.get_current_location() == room_id
+    assert "item_0_0" in loaded.player.get_inventory_items_by_id()
+    assert "item_0_0" not in loaded.item_location_index.get_item_ids_at("room_0")
+
+    # Case 3: Later saves keep the changes loaded from the save
+    loaded.process_args(["save", "STORE_SAVE"])
+    loaded.process_args(["load", "STORE_SAVE"])
+    assert "item_0_0" in loaded.player.get_inventory_items_by_id()
+
+
+def test_entity_map_evicts_unchanged_entities():
+    built = []
+    template_data = {f"room_{i}": {"id": f"room_{i}"} for i in range(5)}
+
+    class Entity:
+        def __init__(self, data):
+            built.append(data["id"])
+
+    entity_map = EntityMap(template_data, factory=Entity, max_clean=2)
+    held = entity_map["room_0"]
+    entity_map["room_1"]
+    entity_map.mark_dirty("room_1")
+    for room_id in ["room_2", "room_3", "room_4"]:
+        entity_map[room_id]
+
+    # Case 1: Only the most recently used clean entities and changed ones stay built
+    assert set(entity_map.live) == {"room_1", "room_3", "room_4"}
+
+    # Case 2: An evicted entity still in use elsewhere is reused, not rebuilt
+    assert entity_map["room_0"] is held
+    assert built.count("room_0") == 1
+    entity_map["room_2"]
+    assert built.count("room_2") == 2
@@ -0,0 +1,47 @@
+"""
+Tests for the synthetic world generator.
+"""
+
+import json
+from text_quest.core import GameCoordinator
+from text_quest.graph import RoomGraph
+from text_quest.worldgen import WorldSpec, generate_world, write_world
+
+SPEC = WorldSpec(num_rooms=200, branching=3, items_per_room=2, seed=7)
+
+
+def test_generated_world_is_reproducible_and_connected(tmp_path):
+    world = generate_world(SPEC)
+
+    # Case 1: Same seed, same world, whether built in memory or streamed to a file
+    world_file = tmp_path / "GENERATED.json"
+    write_world(world_file, SPEC)
+    assert json.loads(world_file.read_text(encoding="utf-8")) == world
+    assert generate_world(WorldSpec(num_rooms=200, seed=8)) != world
+
+    # Case 2: Exits are paired and every room is reachable from the start
+    for room_id, room in world["rooms"].items():
+        for direction, next_room_id in room["connections_map"].items():
+            opposite = {"n": "s", "s": "n", "e": "w", "w": "e"}[direction]
+            assert world["rooms"][next_room_id]["connections_map"][opposite] == room_id
+    graph = RoomGraph(world["rooms"])
+    assert len(graph.get_reachable_rooms("room_0")) == SPEC.num_rooms
+
+    # Case 3: Branching sets the average number of exits
+    num_exits = sum(len(r["connections_map"]) for r in world["rooms"].values())
+    assert 2.5 < num_exits / SPEC.num_rooms <= 3
+    assert len(world["items"]) == SPEC.num_rooms * SPEC.items_per_room
+
+
+def test_generated_world_is_playable(tmp_path):
+    (tmp_path / "game_files").mkdir()
+    (tmp_path / "save_files").mkdir()
+    write_world(tmp_path / "game_files" / "GENERATED.json", SPEC)
+    game = GameCoordinator(filename="GENERATED", base_dir=str(tmp_path))
+
+    direction = next(iter(game.current_room.connections_map))
+    game.process_args(["take", "item_0_0"])
+    game.process_args(["inspect", "item_0_0"])
+    game.process_args(["move", direction])
+    assert game.player.current_location != "room_0"
+    game.process_args(["save", "GENERATED_SAVE"])
@@ -0,0 +1,129 @@
+"""
+Command parsing.
+- CommandParser: turns a line of input into GameCoordinator args, with aliases,
+  abbreviations and multi-word object names.
+- command_parser: default parser shared by every session.
+"""
+
+from text_quest.config import VALID_DIRECTIONS
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+VERBS = [
+    "save",
+    "load",
+    "restart",
+    "look",
+    "take",
+    "move",
+    "inventory",
+    "inspect",
+    "travel",
+    "stats",
+    "undo",
+    "q",
+]
+
+ALIASES = {
+    "i": ("inventory",),
+    "inv": ("inventory",),
+    "l": ("look",),
+    "x": ("inspect",),
+    "examine": ("inspect",),
+    "get": ("take",),
+    "grab": ("take",),
+    "go": ("move",),
+    "walk": ("move",),
+    "quit": ("q",),
+    "exit": ("q",),
+    "rewind": ("undo",),
+    "north": ("move", "n"),
+    "east": ("move", "e"),
+    "south": ("move", "s"),
+    "west": ("move", "w"),
+    **{direction: ("move", direction) for direction in VALID_DIRECTIONS},
+}
+
+# Two word verbs, first word -> second word -> expansion
+PHRASES = {
+    "pick": {"up": ("take",)},
+    "look": {"at": ("look",)},
+    "turn": {"on": ("on",), "off": ("off",)},
+}
+
+# Dropped from the start of object names, ex: 'take the lamp' -> ['take', 'lamp']
+ARTICLES = frozenset(["the", "a", "an"])
+
+
+def build_prefix_table(
+    verbs: Iterable[str], min_length: int = 2
+) -> Dict[str, Tuple[str, ...]]:
+    """
+    Every unambiguous prefix (at least min_length long) of every verb, ex: 'inv',
+    'inve', ... -> ('inventory',). Prefixes shared by two verbs (ex: 'in' for inventory
+    and inspect) are left out.
+    """
+    owners: Dict[str, Optional[str]] = {}
+    for verb in verbs:
+        for end in range(min_length, len(verb) + 1):
+            prefix = verb[:end]
+            owners[prefix] = verb if owners.get(prefix, verb) == verb else None
+    return {prefix: (verb,) for prefix, verb in owners.items() if verb is not None}
+
+
+class CommandParser:
+    """
+    Parses input into args for GameCoordinator.process_args:
+        'n'                  -> ['move', 'n']
+        '  inv '             -> ['inventory']
+        'pick up the  lamp'  -> ['take', 'lamp']
+        'inspect blank map'  -> ['inspect', 'blank map']
+        'on lamp'            -> ['on', 'lamp']  (item verb, see Item.commands)
+    Verbs are case insensitive, anything after the verb is kept as one argument with
+    its words separated by single spaces. Unknown verbs are passed through so items
+    can handle their own commands.
+
+    Verbs, aliases and abbreviations are compiled into one lookup table up front, so
+    parsing a command is a split and one or two dict lookups.
+    """
+
+    def __init__(
+        self,
+        verbs: Iterable[str] = VERBS,
+        aliases: Mapping[str, Tuple[str, ...]] = ALIASES,
+        phrases: Mapping[str, Mapping[str, Tuple[str, ...]]] = PHRASES,
+    ):
+        verbs = list(verbs)
+        # Prefixes lose to aliases and full verbs, ex: 'l' is look, not load
+        self.verb_table: Dict[str, Tuple[str, ...]] = build_prefix_table(verbs)
+        self.verb_table.update(aliases)
+        self.verb_table.update({verb: (verb,) for verb in verbs})
+        self.phrases = phrases
+
+    def parse(self, line: str) -> List[str]:
+        """Returns [] for blank input."""
+        words = line.split()
+        if not words:
+            return []
+
+        verb = words[0].lower()
+        rest = words[1:]
+        second_words = self.phrases.get(verb)
+        if second_words is not None and rest:
+            expansion = second_words.get(rest[0].lower())
+            if expansion is not None:
+                rest = rest[1:]
+                return self._join(list(expansion), rest)
+
+        expansion = self.verb_table.get(verb)
+        return self._join(list(expansion) if expansion else [verb], rest)
+
+    @staticmethod
+    def _join(args: List[str], rest: List[str]) -> List[str]:
+        if rest and rest[0].lower() in ARTICLES and len(rest) > 1:
+            rest = rest[1:]
+        if rest:
+            args.append(" ".join(rest))
+        return args
+
+
+command_parser = CommandParser()
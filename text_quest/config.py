@@ -2,7 +2,12 @@
 Game configurations.
 """
 
-BASE_DIR = "C:/Users/mccle/dev/repos/text_quest"
+import os
+from pathlib import Path
+
+BASE_DIR = os.environ.get(
+    "TEXT_QUEST_BASE_DIR", str(Path(__file__).resolve().parent.parent)
+)
 TUTORIAL_GAME_FILENAME = "TUTORIAL_GAME"
-GAME_FILE_DIR = "C:/Users/mccle/dev/repos/text_quest/game_files/"
+GAME_FILE_DIR = str(Path(BASE_DIR) / "game_files")
 VALID_DIRECTIONS = ["n", "e", "s", "w"]
@@ -3,197 +3,480 @@ Core components for running the game.
 - GameCoordinator
 """
 
+from text_quest.commands import CommandParser, command_parser
 from text_quest.config import BASE_DIR, TUTORIAL_GAME_FILENAME, VALID_DIRECTIONS
-from text_quest.entities import Item, Player, Room
-from copy import deepcopy
-import json
+from text_quest.effects import EffectScheduler
+from text_quest.goals import GoalTracker
+from text_quest.entities import ABSENT, Item, ItemLocationIndex, Player, Room
+from text_quest.graph import RoomGraph
+from text_quest.history import DEFAULT_UNDO_TURNS, UndoHistory
+from text_quest.metrics import MetricsRegistry, metrics
+from text_quest.output import OutputSink, StdoutSink
+from text_quest.saves import (
+    BackgroundSaver,
+    FileSaveStore,
+    InvalidSlotError,
+    SaveJournal,
+    SaveStore,
+    StaleSaveError,
+    background_saver,
+    new_generation,
+)
+from text_quest.store import WorldStore
+from text_quest.world import EntityMap, OverlayWorld, load_world_template
+from concurrent.futures import Future, wait
 import logging
 from pathlib import Path
 import sys
-from typing import List
+import time
+from typing import Dict, List, Optional
 
 
 PROMPT = "\n> "
+RESTART_WARNING = (
+    "WARNING: Unsaved progress will be lost, Are you sure you want to RESTART? (y/n): "
+)
+# Commands whose argument names an item, resolved by resolve_item_id
+ITEM_TARGET_VERBS = frozenset(["look", "take", "inspect"])
+# Commands only available with admin=True, unknown commands to everyone else
+ADMIN_VERBS = frozenset(["stats"])
 
 
 class GameCoordinator:
-    def __init__(self):
+    def __init__(
+        self,
+        filename: str = TUTORIAL_GAME_FILENAME,
+        base_dir: Optional[str] = None,
+        save_store: Optional[SaveStore] = None,
+        saver: Optional[BackgroundSaver] = None,
+        admin: bool = True,
+        output: Optional[OutputSink] = None,
+        undo_turns: int = DEFAULT_UNDO_TURNS,
+    ):
+        """
+        filename: game file (in base_dir/game_files) to start, and restart, from.
+        base_dir: directory holding game_files/ and save_files/, defaults to config.BASE_DIR.
+        save_store: where save/load keep saves, defaults to files in base_dir/save_files.
+        saver: worker that writes saves, defaults to the one shared by the process.
+        admin: allows admin commands (stats), servers turn it off for players.
+        output: where responses go, defaults to stdout. Flushed once per command.
+        undo_turns: how many of the latest turns 'undo' can revert.
+        """
         self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
-        self.game_data = (
-            self.load_game_from_file(filename=TUTORIAL_GAME_FILENAME, dir="game_files")
-            or {}
+        self.game_filename = filename
+        self.base_dir = base_dir or BASE_DIR
+        self.save_store = save_store or FileSaveStore(
+            Path(self.base_dir) / "save_files"
         )
-        # Game State
-        self.player = Player.from_dict(self.game_data["player"])
-        self.current_room = Room.from_dict(self.game_data["rooms"]["start_room"])
-        self.room_map = self.load_game_rooms()
-        self.item_map = self.load_game_items()
+        self.saver = saver or background_saver
+        # save_id -> this session's latest write to it, the saver runs writes in order
+        self.pending_saves: Dict[str, Future] = {}
+        self.admin = admin
+        self.output = output or StdoutSink()
+        self.metrics: MetricsRegistry = metrics
+        self.parser: CommandParser = command_parser
+        self.command_handlers = {
+            "save": self.handle_save,
+            "load": self.handle_load,
+            "restart": self.handle_restart,
+            "look": self.handle_look,
+            "take": self.handle_take,
+            "move": self.handle_move,
+            "inventory": self.handle_inventory,
+            "inspect": self.handle_item_inspection,
+            "travel": self.handle_travel,
+            "stats": self.handle_stats,
+            "undo": self.handle_undo,
+        }
+        # Source of answers for yes/no prompts, replaced by headless sessions.
+        self.confirm = input
+        # Changes since the last save, written by save_game_to_file
+        self.save_journal = SaveJournal()
+        # Changes made by each of the latest turns, reverted by handle_undo
+        self.history = UndoHistory(max_turns=undo_turns)
+        # Game State (player, current_room, room_map, item_map) is built from the
+        # shared WorldTemplate in post_load_game_file_processing.
+        self.world = None
+        loaded = self.load_game_from_file(filename=self.game_filename, dir="game_files")
+        self.output.flush()
+        if isinstance(loaded, Exception):
+            raise loaded
 
         self.logger.info("GameCoordinator initialized.")
 
     # CommandProcessor
     def get_args_from_user(self) -> List[str]:
-        """Expects user to pass two cmds separated by a space and returns a list."""
-        return input(PROMPT).split(" ")
+        """Reads a command from the user and parses it into args, see parse_command."""
+        return self.parse_command(input(PROMPT))
+
+    def parse_command(self, line: str) -> List[str]:
+        """ex: 'pick up the lamp' -> ['take', 'lamp'], 'n' -> ['move', 'n']"""
+        return self.parser.parse(line)
 
     def validate_args(self, args: List[str]) -> bool:
         """Ensures args are not blank or greater than expected length.
         NOTE: Onus is on user to pass valid args only.
         """
         if len(args) == 0 or args == [""]:
-            print(f"Blank command, please enter a valid command")
+            self.output.print(f"Blank command, please enter a valid command")
             return False
         elif args[0] == "q":
-            print("Exiting game ...")
+            self.output.print("Exiting game ...")
+            self.flush_saves()
             sys.exit()
         elif len(args) > 2:
-            print(f"Functionality not yet implemented, please enter 1 or 2 args.")
+            self.output.print(
+                f"Functionality not yet implemented, please enter 1 or 2 args."
+            )
             return False
         else:
             return True
 
     def process_args(self, args):
-        """Routes args to handler based on args[0] via dispatch table."""
-        arg_to_function = {
-            "save": self.handle_save,
-            "load": self.handle_load,
-            "restart": self.handle_restart,
-            "look": self.handle_look,
-            "take": self.handle_take,
-            "move": self.handle_move,
-            "inventory": self.handle_inventory,
-            "inspect": self.handle_item_inspection,
-            # "stats": self.display_player_stats
-        }
-
+        """
+        Routes args to handler based on args[0] via dispatch table, other verbs with a
+        target are item commands (ex: ['on', 'lamp']).
+        Latency and errors (handlers raising or returning an Exception) are recorded in
+        self.metrics per handler.
+        """
+        start = time.perf_counter()
+        func_to_call = None
+        failed = True
         try:
-            func_to_call = arg_to_function[args[0]]
-            return func_to_call(args)
+            if args[0] in ADMIN_VERBS and not self.admin:
+                msg = f"Unknown command: {args[0]}"
+                self.output.print(msg)
+                return msg
+            func_to_call = self.command_handlers.get(args[0])
+            if func_to_call is None and len(args) == 2:
+                func_to_call = self.handle_item_command
+            elif func_to_call is None:
+                raise KeyError(args[0])
+            if len(args) == 2 and args[0] in ITEM_TARGET_VERBS:
+                args = [args[0], self.resolve_item_id(args[1])]
+            result = func_to_call(args)
+            failed = isinstance(result, Exception)
+            return result
         except KeyError as e:
-            self.logger.error(f"Invalid cmd ERROR: {args[0], {e}}")
+            self.logger.error("Invalid cmd ERROR: %s, %s", args[0], e)
             return e
+        finally:
+            handler = func_to_call.__name__ if func_to_call else "unknown"
+            self.metrics.observe(
+                "text_quest_command_seconds",
+                time.perf_counter() - start,
+                handler=handler,
+            )
+            if failed:
+                self.metrics.inc("text_quest_command_errors_total", handler=handler)
 
     # Game File handlers (save, load, restart)
     def handle_load(self, args):
         try:
-            filename = args[1]
+            filename = SaveStore.check_slot(args[1])
             return self.load_game_from_file(filename=filename, dir="save_files")
         except IndexError as e:
-            self.logger.error(
-                print(f"Invalid cmd ERROR: Please provide filename to load")
-            )
+            self.output.print("Invalid cmd ERROR: Please provide filename to load")
+            self.logger.error("Invalid cmd ERROR: Please provide filename to load")
+            return e
+        except InvalidSlotError as e:
+            self.output.print(e)
             return e
 
     def load_game_from_file(self, filename: str, dir: str = "save_files"):
-        """Updates state of current game from filename and directory provided."""
-        load_file_path = Path(BASE_DIR) / dir / f"{filename}.json"
-
+        """
+        Updates state of current game from filename and directory provided, saves
+        ('save_files') are read from self.save_store.
+        Parsed files are cached and shared between sessions until they change on disk,
+        game files also keep a pickled sidecar so new processes skip JSON parsing. Very
+        large files are indexed into a WorldStore, so only the entities used are parsed.
+        Saves are rebuilt from their snapshot plus the changes in their journal.
+        """
         try:
-            with open(load_file_path, mode="r", encoding="utf-8") as f:
-                game_data = json.load(f)
-                self.game_data = game_data
-                self.logger.info(f"Game loaded: {filename}\n")
-                print(f"Game loaded: {filename}\n")
-                self.post_load_game_file_processing()
-                return game_data
+            start = time.perf_counter()
+            checkpoint = generation = None
+            journal_records = []
+            if dir == "save_files":
+                self.flush_saves(save_id=self.save_store.get_save_id(filename))
+                self.world, journal_records = self.save_store.read(filename)
+                checkpoint = self.save_store.get_save_id(filename)
+                generation = self.world.generation
+                source, size = "save", self.save_store.get_size(filename)
+            else:
+                file_path = Path(self.base_dir) / dir / f"{filename}.json"
+                self.world = load_world_template(file_path, use_sidecar=True)
+                source, size = "game_file", file_path.stat().st_size
+            self.game_data = self.world.game_data
+            self.logger.info("Game loaded: %s\n", filename)
+            self.output.print(f"Game loaded: {filename}\n")
+            self.post_load_game_file_processing(journal_records=journal_records)
+            self.save_journal.reset(
+                checkpoint=checkpoint,
+                generation=generation,
+                records_on_disk=len(journal_records),
+            )
+            self.metrics.observe(
+                "text_quest_load_seconds", time.perf_counter() - start, source=source
+            )
+            self.metrics.inc("text_quest_load_bytes_total", size, source=source)
+            return self.game_data
         except Exception as e:
-            print(f"ERROR: {e}")
+            self.output.print(f"ERROR: {e}")
             return e
 
     def load_game_items(self):
         """
-        Reads 'items' in from game_data and creates a map in below format so that
-        items objects can be accessed via keyword:
+        Reads 'items' in from the world template and creates a map in below format so that
+        items objects can be accessed via keyword, and indexes items by location:
         {
          'item_id_A': Item_A,
          'item_id_B': Item_B
         }
+        NOTE: items are built on first access, untouched items stay in the shared template.
         """
-        game_items = deepcopy(self.game_data["items"])
-        return {
-            item_id: Item.from_dict(item_dict)
-            for item_id, item_dict in game_items.items()
-        }
+        self.item_location_index = ItemLocationIndex(base=self.world.item_locations)
+        return EntityMap(self.world.items, factory=self._create_item)
+
+    def _create_item(self, item_data) -> Item:
+        item = Item.from_template(item_data)
+        item.location_index = self.item_location_index
+        item.on_change = self.on_state_change
+        return item
+
+    def _create_room(self, room_data) -> Room:
+        room = Room.from_template(room_data)
+        room.on_change = self.on_state_change
+        return room
 
     def load_game_rooms(self):
         """
-        Reads 'rooms' in from game_data and creates a map in below format so that
+        Reads 'rooms' in from the world template and creates a map in below format so that
         rooms objects can be accessed via keyword:
         {
          'room_id_A: Room_A,
          'room_id_B: Room_B,
         }
+        NOTE: rooms are built on first access, untouched rooms stay in the shared template.
         """
-        game_rooms = deepcopy(self.game_data["rooms"])
-        return {
-            room_id: Room.from_dict(room_dict)
-            for room_id, room_dict in game_rooms.items()
-        }
+        return EntityMap(self.world.rooms, factory=self._create_room)
 
     def convert_item_map_to_dict(self):
-        return {item_id: item.to_dict() for item_id, item in self.item_map.items()}
+        return self.item_map.to_dict()
 
-    def post_load_game_file_processing(self):
+    def post_load_game_file_processing(self, journal_records=()):
         "Generate live state for objects from loaded game_data, should be called anytime game is loaded/restarted."
-        self.player = Player.from_dict(self.game_data["player"])
-        current_room_id = self.player.get_current_location()
-        self.current_room = Room.from_dict(self.game_data["rooms"][current_room_id])
+        self.player = Player.from_template(self.world.player)
+        self.player.on_change = self.on_state_change
         self.item_map = self.load_game_items()
         self.room_map = self.load_game_rooms()
-        self.current_room.display_room(items_in_room=self.get_items_in_current_room())
+        self.room_graph = RoomGraph(self.world.rooms)
+        self.effects = EffectScheduler(self.world.effects, self.get_entity)
+        self.goals = GoalTracker(self.world.goals, self.get_entity)
+        for record in journal_records:
+            self.apply_state_change(*record)
+        self.effects.refresh_all()
+        self.goals.reset()
+        self.current_room = self.room_map[self.player.get_current_location()]
+        self.current_room.display_room(
+            items_in_room=self.get_items_in_current_room(), output=self.output
+        )
+        self.history.clear()
+
+    def get_entity(self, kind: str, entity_id: Optional[str]):
+        """Live entity, ex: ('item', 'lamp') -> Item, ('player', None) -> Player"""
+        if kind == "item":
+            return self.item_map[entity_id]
+        elif kind == "room":
+            return self.room_map[entity_id]
+        return self.player
 
     def handle_restart(self, args):
-        get_user_validation = input(
-            "WARNING: Unsaved progress will be lost, Are you sure you want to RESTART? (y/n): "
-        )
+        # Anything printed so far goes out before the question
+        self.output.flush()
+        get_user_validation = self.confirm(RESTART_WARNING)
 
         if get_user_validation in ["y", "Y", "yes", "YES"]:
             self.game_data = self.load_game_from_file(
-                filename=TUTORIAL_GAME_FILENAME, dir="game_files"
+                filename=self.game_filename, dir="game_files"
             )
             self.logger.info("Game restarted")
-            print("Game restarted")
+            self.output.print("Game restarted")
         else:
-            print("Very well, continue on ...")
+            self.output.print("Very well, continue on ...")
 
     def handle_save(self, args):
         if len(args) > 1:
-            return self.save_game_to_file(filename=args[1])
+            try:
+                filename = SaveStore.check_slot(args[1])
+            except InvalidSlotError as e:
+                self.output.print(e)
+                return e
+            return self.save_game_to_file(filename=filename)
         else:
             return self.save_game_to_file()
 
     def get_game_state(self):
-        return {
-            "items": {
-                item_id: item.to_dict() for item_id, item in self.item_map.items()
-            },
+        """
+        Worlds served from a WorldStore are too large to copy whole, their state only
+        holds the entities changed since the game file (named in 'base'), see
+        world.OverlayWorld.
+        """
+        base_world = self.world
+        item_ids = room_ids = None
+        if isinstance(self.world, OverlayWorld):
+            base_world = self.world.base
+        if isinstance(base_world, WorldStore):
+            item_ids = set(self.item_map.dirty)
+            room_ids = set(self.room_map.dirty)
+            if isinstance(self.world, OverlayWorld):
+                item_ids.update(self.world.game_data["items"])
+                room_ids.update(self.world.game_data["rooms"])
+        game_state = {
+            "items": self.item_map.to_dict(item_ids),
             "player": self.player.to_dict(),
-            "rooms": {
-                room_id: room.to_dict() for room_id, room in self.room_map.items()
-            },
+            "rooms": self.room_map.to_dict(room_ids),
+            "effects": dict(self.world.effects),
+            "goals": dict(self.world.goals),
         }
+        if isinstance(base_world, WorldStore):
+            game_state["base"] = {
+                "source": base_world.source,
+                "stamp": list(base_world.stamp),
+            }
+        return game_state
 
     def save_game_to_file(
         self, filename: str = "PROT01", dir: str = "save_files"
     ) -> str:
-        file_path = Path(BASE_DIR) / dir / f"{filename}.json"
+        """
+        Appends changes made since the last save to the save's journal. A full snapshot
+        is written instead when saving to a new file, once the journal needs compacting,
+        or after a write to the save failed (ex: another session replaced the snapshot).
+        Saves ('save_files') go to self.save_store, other directories are written as files.
+
+        Only the state is copied here, it is serialized and written by self.saver in the
+        background, see flush_saves.
+        """
+        if dir == "save_files":
+            store = self.save_store
+        else:
+            store = FileSaveStore(Path(self.base_dir) / dir)
+        save_id = store.get_save_id(filename)
 
         try:
-            with open(file_path, mode="w", encoding="utf-8") as f:
+            if self.save_journal.needs_snapshot(save_id):
+                generation = new_generation()
                 game_state = self.get_game_state()
-                json.dump(game_state, f, indent=4, sort_keys=True)
-                print((f"Game save: {file_path}"))
-                self.logger.info(f"Game save: {file_path}")
-                return file_path
+                game_state["generation"] = generation
+                future = self.saver.submit(
+                    self._write_save,
+                    save_id,
+                    store.write_snapshot,
+                    filename,
+                    game_state,
+                )
+                self.save_journal.reset(checkpoint=save_id, generation=generation)
+            else:
+                records = self.save_journal.drain()
+                future = self.saver.submit(
+                    self._write_save,
+                    save_id,
+                    store.append_journal,
+                    filename,
+                    records,
+                    self.save_journal.generation,
+                )
+                self.save_journal.records_on_disk += len(records)
+            # Checked by the next save on this thread, see SaveJournal.needs_snapshot
+            self.save_journal.track(future)
+            self.pending_saves[save_id] = future
+            self.output.print(f"Game save: {save_id}")
+            self.logger.info("Game save: %s", save_id)
+            return save_id
         except Exception as e:
-            self.logger.error(f"Save game error: {file_path}, {e}")
+            self.logger.error("Save game error: %s, %s", save_id, e)
             return e
 
+    def _write_save(self, save_id: str, write, *args):
+        """Runs on the saver's thread, write is SaveStore.write_snapshot/append_journal."""
+        operation = write.__name__
+        try:
+            start = time.perf_counter()
+            size = write(*args)
+            self.metrics.observe(
+                "text_quest_save_seconds",
+                time.perf_counter() - start,
+                operation=operation,
+            )
+            self.metrics.inc("text_quest_save_bytes_total", size, operation=operation)
+            return size
+        except StaleSaveError as e:
+            self.metrics.inc("text_quest_save_errors_total", operation=operation)
+            self.logger.warning("Save game replaced: %s, %s", save_id, e)
+            raise
+        except Exception as e:
+            self.metrics.inc("text_quest_save_errors_total", operation=operation)
+            self.logger.error("Save game error: %s, %s", save_id, e)
+            raise
+
+    def flush_saves(
+        self, timeout: Optional[float] = None, save_id: Optional[str] = None
+    ) -> bool:
+        """
+        Waits for this session's saves (to save_id only, if given) still being written,
+        False if timeout expired first. Saves of other sessions sharing the saver are not
+        waited on, see BackgroundSaver.flush.
+        """
+        save_ids = list(self.pending_saves) if save_id is None else [save_id]
+        futures = [
+            self.pending_saves[save_id]
+            for save_id in save_ids
+            if save_id in self.pending_saves
+        ]
+        _, not_done = wait(futures, timeout=timeout)
+        for save_id in save_ids:
+            if self.pending_saves.get(save_id) not in not_done:
+                self.pending_saves.pop(save_id, None)
+        return not not_done
+
     # Player Command handlers
     """
     Generally handlers pass args to game functionality methods after performing basic input validation.
     """
 
+    def resolve_item_id(self, name: str) -> str:
+        """
+        Item id for a name the player typed, ex: 'blank map' -> 'blank_map'. Ids are
+        tried first, then names of items the player can see. Unknown names are returned
+        as-is for the handler to report.
+        """
+        if name in self.item_map:
+            return name
+        item_id = name.replace(" ", "_")
+        if item_id in self.item_map:
+            return item_id
+        lowered_name = name.lower()
+        for item_id in self.get_items_in_current_room():
+            if self.item_map[item_id].name.lower() == lowered_name:
+                return item_id
+        return name
+
+    def handle_item_command(self, args):
+        """Item specific commands (see Item.commands), ex: ['on', 'lamp']"""
+        verb, target = args
+        item_id = self.resolve_item_id(target)
+        if item_id not in self.get_items_in_current_room():
+            msg = f"No {target} here."
+            self.output.print(msg)
+            return msg
+        item = self.item_map[item_id]
+        if verb not in item.commands:
+            msg = f"You can't {verb} the {item.name}."
+        else:
+            msg = item.execute_command(verb)
+        self.output.print(msg)
+        return msg
+
     def handle_item_inspection(self, args) -> str:
         """
         Dynamic property interaction handler that uses command mappings
@@ -204,7 +487,7 @@ class GameCoordinator:
 
         if len(args) != 2:
             self.logger.info("move cmd ERROR: move expects exactly 2 args.")
-            print("Invalid command format!")
+            self.output.print("Invalid command format!")
             return "Invalid command format!"
         else:
             target_item = args[1]
@@ -212,14 +495,27 @@ class GameCoordinator:
                 item_description = self.item_map[
                     target_item
                 ].generate_modified_description()
-                print(item_description)
+                self.output.print(item_description)
                 return item_description
             else:
-                self.logger.info(f"Player inspected invalid item: {target_item}")
+                self.logger.info("Player inspected invalid item: %s", target_item)
                 msg = f"No {target_item} here, try picking it up first."
-                print(msg)
+                self.output.print(msg)
                 return msg
 
+    def handle_stats(self, args):
+        """Admin command, shows the process wide metrics (see metrics.MetricsRegistry)."""
+        lines = []
+        for metric, stats in self.metrics.summary().items():
+            values = ", ".join(
+                f"{name}={value:.3f}" if isinstance(value, float) else f"{name}={value}"
+                for name, value in stats.items()
+            )
+            lines.append(f"{metric}: {values}")
+        stats_description = "\n".join(lines) or "No metrics recorded yet."
+        self.output.print(stats_description)
+        return stats_description
+
     def handle_inventory(self, args):
         if len(args) == 1:
             player_inventory = self.player.get_inventory_items_by_id()
@@ -227,16 +523,19 @@ class GameCoordinator:
             if player_inventory:
                 inventory_description += "Items in pack:"
                 for item in player_inventory:
+                    count = player_inventory.count(item)
                     inventory_description += f"\n\t{item}"
+                    if count > 1:
+                        inventory_description += f" (x{count})"
             else:
                 inventory_description = "Your pockets are empty."
-            print(inventory_description)
+            self.output.print(inventory_description)
         else:
-            self.logger.error(f"Unexpected args passed: {args}")
+            self.logger.error("Unexpected args passed: %s", args)
 
     def handle_look(self, args):
         if len(args) == 1:
-            print(
+            self.output.print(
                 self.current_room.generate_modified_description(
                     items_in_room=self.get_items_in_current_room()
                 )
@@ -245,20 +544,44 @@ class GameCoordinator:
             target = args[1]
             self.generate_description(target=target)
         else:
-            self.logger.error(f"ERROR-Unexpected args passed: {args}")
+            self.logger.error("ERROR-Unexpected args passed: %s", args)
 
     def handle_move(self, args):
         if len(args) != 2:
             self.logger.info("move cmd ERROR: move expects exactly 2 args.")
         elif args[1] not in VALID_DIRECTIONS:
-            print(
+            self.output.print(
                 f"Invalid direction provided: {args[1]}\nChoose from the following: {VALID_DIRECTIONS}"
             )
         else:
-            self.player_state_manager()
-            if self.validate_player_movement(direction=args[1]):
-                next_room_id = self.current_room.get_adjacent_room_id(direction=args[1])
-                self.update_current_room(room_id=next_room_id)
+            self.move_player(direction=args[1])
+
+    def handle_travel(self, args):
+        """
+        Moves the player to any reachable room (travel <room_id>) along the shortest path,
+        one move at a time, and displays the room they arrive in.
+        """
+        if len(args) != 2:
+            self.output.print("Travel where? ex: travel armory")
+            return
+        target_room_id = args[1]
+        current_room_id = self.current_room.get_id()
+        if target_room_id not in self.room_map:
+            self.output.print(f"Unknown room: {target_room_id}")
+            return
+
+        path = self.room_graph.find_path(current_room_id, target_room_id)
+        if path is None:
+            self.output.print(f"There is no way to {target_room_id} from here.")
+        elif not path:
+            self.output.print("You are already there.")
+        else:
+            for direction, _ in path:
+                if not self.move_player(direction=direction, display=False):
+                    break
+            self.current_room.display_room(
+                items_in_room=self.get_items_in_current_room(), output=self.output
+            )
 
     def generate_description(self, target):
         """
@@ -266,7 +589,7 @@ class GameCoordinator:
         NOTE: anything you know exists can be 'looked' for.
         """
         if target in self.item_map:
-            print(self.item_map[target].get_description())
+            self.output.print(self.item_map[target].get_description())
         else:
             self.logger.info(
                 "Only 'item' objects are currently supported, please try again."
@@ -278,7 +601,7 @@ class GameCoordinator:
         the same room_id, then the item location will be changed to the player's inventory.
         """
         if len(args) == 1:
-            print(
+            self.output.print(
                 "Take what? Me out, on me, to the ball game? None of which will work mind you."
             )
         elif len(args) == 2:
@@ -287,7 +610,7 @@ class GameCoordinator:
             try:
                 valid_target_item = self.item_map[target]
             except KeyError as e:
-                self.logger.info(f"Unknown item: {valid_target_item}")
+                self.logger.info("Unknown item: %s", valid_target_item)
             if valid_target_item and (
                 valid_target_item.get_current_location()
                 == self.player.get_current_location()
@@ -295,7 +618,7 @@ class GameCoordinator:
                 # STATE CHANGE #
                 self.player.increment_total_moves(n=1)
                 self.player.add_item_to_inventory(
-                    valid_target_item
+                    valid_target_item, output=self.output
                 )  # This just adds id of target
                 self.item_map[valid_target_item.id].set_current_location(
                     "player_inventory"
@@ -304,104 +627,188 @@ class GameCoordinator:
                 # NOTE: may be desirable to move this to higher level function (so player_moves can be counted in post_processing.)
                 # self.game_data = self.update_game_data()
             elif valid_target_item:
-                print(
+                self.output.print(
                     f"No {valid_target_item.name} here, why don't you look somewhere else."
                 )
             else:
-                print(f"Can't take that: {target}.")
+                self.output.print(f"Can't take that: {target}.")
         else:
-            self.logger.error(f"ERROR-Unexpected args passed: {args}")
+            self.logger.error("ERROR-Unexpected args passed: %s", args)
 
     # Negotiators
     """
     Methods that rely on multiple objects.
     """
 
+    def on_state_change(self, kind, entity_id, field, key, old_value, new_value):
+        """Receives every change made to live entities (see entities.ObservableEntity)."""
+        self.save_journal.record(kind, entity_id, field, key, old_value, new_value)
+        self.history.record(kind, entity_id, field, key, old_value, new_value)
+        if kind == "item":
+            self.item_map.mark_dirty(entity_id)
+        elif kind == "room":
+            self.room_map.mark_dirty(entity_id)
+        if field == "connections_map":
+            self.room_graph.set_connection(entity_id, key, new_value)
+        if (kind, entity_id) in self.effects.targets:
+            self.effects.refresh(kind, entity_id)
+        self.goals.on_state_change(kind, entity_id, field, key, old_value, new_value)
+
+    def apply_state_change(self, kind, entity_id, field, key, value=ABSENT):
+        """
+        Sets a single field of an entity through its setter, ex: when replaying a save
+        journal or undoing a turn, so it is validated and reported to on_state_change
+        like any change made during play. A value of ABSENT (journal records without a
+        value) removes a player or room property.
+        """
+        if kind == "item" and field == "current_location":
+            self.item_map[entity_id].set_current_location(value)
+        elif kind == "item" and field == "properties":
+            self.item_map[entity_id].set_property(key, value)
+        elif kind == "room" and field == "connections_map":
+            self.room_map[entity_id].set_connection(key, value)
+        elif kind == "room" and field == "properties":
+            if value is ABSENT:
+                self.room_map[entity_id].delete_property(key)
+            else:
+                self.room_map[entity_id].set_property(key, value)
+        elif kind == "room" and field == "num_player_visits":
+            room = self.room_map[entity_id]
+            if value != room.num_player_visits:
+                room.increment_num_player_visits(n=value - room.num_player_visits)
+        elif kind == "player" and field == "current_location":
+            self.player.set_current_location(value)
+        elif kind == "player" and field == "inventory":
+            self.player.set_inventory_count(item_id=key, count=value)
+        elif kind == "player" and field == "properties":
+            if value is ABSENT:
+                self.player.delete_property(key)
+            else:
+                self.player.set_property(key, value)
+        elif kind == "player" and field == "total_moves":
+            if value != self.player.total_moves:
+                self.player.increment_total_moves(n=value - self.player.total_moves)
+        else:
+            raise ValueError(f"Unknown state change: {kind}, {entity_id}, {field}")
+
+    def handle_undo(self, args):
+        """
+        Reverts the last n turns (default 1), ex: ['undo', '3']. Turns are merged first,
+        so each changed field is set once to its value from before the oldest of them.
+        NOTE: like loads, effects restart their period (see EffectScheduler).
+        """
+        try:
+            n = int(args[1]) if len(args) == 2 else 1
+        except ValueError:
+            n = 0
+        if n < 1:
+            msg = "Undo how many turns? ex: undo 3"
+            self.output.print(msg)
+            return msg
+
+        # Reverting is not a turn of its own, so undo can't undo itself
+        self.history.cancel_turn()
+        turns = self.history.pop(n)
+        if not turns:
+            msg = "Nothing to undo."
+            self.output.print(msg)
+            return msg
+        changes = {}
+        for turn in turns:
+            changes.update(turn)
+        for (kind, entity_id, field, key), old_value in changes.items():
+            self.apply_state_change(kind, entity_id, field, key, old_value)
+
+        self.current_room = self.room_map[self.player.get_current_location()]
+        msg = f"Undid {len(turns)} turn{'s' if len(turns) > 1 else ''}."
+        self.output.print(msg)
+        self.current_room.display_room(
+            items_in_room=self.get_items_in_current_room(), output=self.output
+        )
+        return msg
+
     def get_items_in_current_room(self) -> List[str]:
-        """Identify items (via item_id) in current room based on either their location or player's location (if in player_inventory)."""
-        items_in_room = []
-        for item_id, item in self.item_map.items():
-            current_room_id = self.current_room.get_id()
-            item_location_id = item.get_current_location()
-            if item_location_id == "player_inventory" and (
-                self.player.get_current_location() == current_room_id
-            ):
-                items_in_room.append(
-                    item_id
-                )  # BUG: To be changed when Room objects are introduced (Feature #1)
-                self.logger.info("Functionality to be implemented.")
-            elif item_location_id == current_room_id:
-                items_in_room.append(item_id)
+        """
+        Identify items (via item_id) in current room based on either their location or player's location (if in player_inventory).
+        Uses item_location_index, so cost depends on the items in the room rather than every item in the game.
+        """
+        current_room_id = self.current_room.get_id()
+        items_in_room = self.item_location_index.get_item_ids_at(current_room_id)
+        if self.player.get_current_location() == current_room_id:
+            # BUG: To be changed when Room objects are introduced (Feature #1)
+            items_in_room.extend(
+                self.item_location_index.get_item_ids_at("player_inventory")
+            )
         return items_in_room
 
     def player_state_manager(self):
         """
-        Increment total player moves, and calculate usage for any items in the player's inventory.
+        Increment total player moves, and advance timed effects (see EffectScheduler),
+        ex: a lit lamp in the player's inventory burns fuel.
         Invoked during below events that 'advance game state':
-        - take
-        - look
         - move
         """
-        self.logger.info(
-            f"Incrementing player_total_moves from {self.player.total_moves}"
+        self.logger.debug(
+            "Incrementing player_total_moves from %s", self.player.total_moves
         )
         self.player.increment_total_moves()
-        self.logger.info(f"player_total_moves incremented to {self.player.total_moves}")
-        # Update lamp fuel
-        if self.player._has_item_in_inventory("lamp"):
-            if self.item_map["lamp"].properties.get("is_lit", False):
-                current_fuel_remaining = self.item_map["lamp"].get_property_value(
-                    "fuel_remaining"
-                )
-                new_value = current_fuel_remaining - 1
-                self.logger.info(f"lamp fuel remaining: {current_fuel_remaining}")
-                self.item_map["lamp"].set_property(
-                    property_name="fuel_remaining", value=(new_value)
-                )
+        self.logger.debug(
+            "player_total_moves incremented to %s", self.player.total_moves
+        )
+        for message in self.effects.tick():
+            self.output.print(message)
 
     def validate_player_movement(self, direction) -> bool:
         """Checks validity of player movement, and increments move regardless of validity."""
         self.player.increment_total_moves(
             n=1
         )  # NOTE: move this to player_actions once actions become more complicated
-        return self.current_room.validate_direction(direction=direction)
+        return self.current_room.validate_direction(
+            direction=direction, output=self.output
+        )
 
-    def update_current_room(self, room_id: str):
-        self.logger.info(
-            f"Moving from current_room_id: {self.current_room.get_id()} to next_room_id: {room_id}"
+    def move_player(self, direction: str, display: bool = True) -> bool:
+        """Advances game state and moves the player one room in direction, if possible."""
+        self.player_state_manager()
+        if not self.validate_player_movement(direction=direction):
+            return False
+        next_room_id = self.current_room.get_adjacent_room_id(direction=direction)
+        self.update_current_room(room_id=next_room_id, display=display)
+        return True
+
+    def update_current_room(self, room_id: str, display: bool = True):
+        self.logger.debug(
+            "Moving from current_room_id: %s to next_room_id: %s",
+            self.current_room.id,
+            room_id,
         )
-        self.room_map[self.current_room.get_id()] = self.current_room
         self.current_room = self.room_map[room_id]
         self.player.set_current_location(room_id=room_id)
         self.current_room.increment_num_player_visits(n=1)
-        self.current_room.display_room(items_in_room=self.get_items_in_current_room())
-
-    # GameState conditions
-    def ready_to_explore_condition_reached(self):
-        """Returns True if player has obtained both the 'lamp' and the 'sword' and is in the start room."""
-        all_items_obtained = True
-        items_to_obtain = ["lamp", "sword"]
-        for item in items_to_obtain:
-            if item not in self.player.get_inventory_items_by_id():
-                return False
-        return all_items_obtained and (
-            self.player.get_current_location() == "start_room"
-        )
-
-    def trophy_returned(self):
-        return (
-            self.player.get_current_location() == "armory"
-        ) and "trophy" in self.player.get_inventory_items_by_id()
+        if display:
+            self.current_room.display_room(
+                items_in_room=self.get_items_in_current_room(), output=self.output
+            )
 
     # Run game
-    def run_game(self):
-        while True:
-            args = self.get_args_from_user()
+    def handle_command(self, args: List[str]):
+        """
+        Validates and processes a single command, then reports goals it reached.
+        Everything the command printed is written out together at the end, and the
+        changes it made are kept for undo (see UndoHistory).
+        """
+        self.history.begin_turn()
+        try:
             if self.validate_args(args=args):
                 self.process_args(args=args)
-                if self.ready_to_explore_condition_reached():
-                    print("You feel prepared, proceed into the dungeon")
-                if self.trophy_returned():
-                    print("YOU ARE VICTORIOUS, THE OGRE HAS BEEN SLAIN! ... right?")
+                for message in self.goals.check():
+                    self.output.print(message)
             else:
                 self.logger.error("Invalid cmd, try again.")
+        finally:
+            self.history.end_turn()
+            self.output.flush()
+
+    def run_game(self):
+        while True:
+            self.handle_command(args=self.get_args_from_user())
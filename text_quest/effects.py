@@ -0,0 +1,147 @@
+"""
+Timed effects declared in a game file's 'effects' section.
+- EffectScheduler: applies effects to entities as game ticks pass.
+
+ex: the lamp burns one unit of fuel per tick while it is lit and carried:
+    "effects": {
+        "lamp_burns_fuel": {
+            "target": ["item", "lamp"],
+            "property": "fuel_remaining",
+            "delta": -1,
+            "every": 1,
+            "while": [{"property": "is_lit", "condition": "equals", "value": true}],
+            "carried": true,
+            "min": 0,
+            "on_limit": {"set": {"is_lit": false}, "message": "Your lamp goes out."}
+        }
+    }
+- target: ["item", item_id] or ["player"]
+- property: property changed by delta every `every` ticks, clamped to min/max
+- while, carried: the effect only runs while all of these hold (carried: items only)
+- on_limit: properties set, and message shown, when property reaches min/max
+"""
+
+from text_quest.entities import Item
+import heapq
+from itertools import count
+import logging
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+# (kind, entity_id) of an effect's target, entity_id is None for the player
+Target = Tuple[str, Optional[str]]
+
+
+class EffectScheduler:
+    """
+    Keeps a heap of (due tick, sequence, effect_id) for active effects only, so a tick
+    costs O(log n) per effect due on it, however large the world or the inventory.
+
+    Effects are (de)activated when their target changes (see refresh), effects whose
+    conditions don't hold, or whose property is at its limit, are not in the heap.
+    Entries for deactivated effects are skipped when popped rather than removed.
+    NOTE: the tick count is not saved, effects restart their period after a load.
+    """
+
+    def __init__(
+        self,
+        effects: Mapping[str, Mapping[str, Any]],
+        get_entity: Callable[[str, Optional[str]], Any],
+    ):
+        """
+        effects: the game file's 'effects' section.
+        get_entity: (kind, entity_id) -> live entity, ex: ('item', 'lamp') -> Item
+        """
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        self.effects = effects
+        self.get_entity = get_entity
+        self.tick_count = 0
+        # Effect ids by target, the only entities whose changes are checked
+        self.targets: Dict[Target, List[str]] = {}
+        for effect_id, effect in effects.items():
+            kind, *entity_id = effect["target"]
+            target = (kind, entity_id[0] if entity_id else None)
+            self.targets.setdefault(target, []).append(effect_id)
+        # effect_id -> due tick of its entry in the heap
+        self.active: Dict[str, int] = {}
+        self.heap: List[Tuple[int, int, str]] = []
+        self._sequence = count()
+
+    def refresh_all(self):
+        """Activates every effect whose conditions hold, ex: after a game is loaded."""
+        for target in self.targets:
+            self.refresh(*target)
+
+    def refresh(self, kind: str, entity_id: Optional[str]):
+        """(De)activates the effects on an entity after it changes."""
+        for effect_id in self.targets.get((kind, entity_id), ()):
+            should_run = self._should_run(self.effects[effect_id])
+            if should_run and effect_id not in self.active:
+                self._schedule(effect_id, self.tick_count)
+            elif not should_run and effect_id in self.active:
+                del self.active[effect_id]
+
+    def _schedule(self, effect_id: str, from_tick: int):
+        due = from_tick + self.effects[effect_id].get("every", 1)
+        self.active[effect_id] = due
+        heapq.heappush(self.heap, (due, next(self._sequence), effect_id))
+
+    def _entity(self, effect: Mapping[str, Any]):
+        kind, *entity_id = effect["target"]
+        return self.get_entity(kind, entity_id[0] if entity_id else None)
+
+    def _should_run(self, effect: Mapping[str, Any]) -> bool:
+        entity = self._entity(effect)
+        if effect.get("carried") and entity.current_location != "player_inventory":
+            return False
+        for condition in effect.get("while", ()):
+            compare = Item.prerequisite_conditions[condition["condition"]]
+            value = entity.properties.get(condition["property"])
+            if value is None or not compare(value, condition["value"]):
+                return False
+        return not self._at_limit(effect, entity.properties.get(effect["property"]))
+
+    @staticmethod
+    def _at_limit(effect: Mapping[str, Any], value) -> bool:
+        delta = effect["delta"]
+        if delta < 0 and "min" in effect:
+            return value <= effect["min"]
+        if delta > 0 and "max" in effect:
+            return value >= effect["max"]
+        return False
+
+    def tick(self) -> List[str]:
+        """Advances one tick and applies the effects due, returns messages to show."""
+        self.tick_count += 1
+        messages = []
+        heap = self.heap
+        while heap and heap[0][0] <= self.tick_count:
+            due, _, effect_id = heapq.heappop(heap)
+            if self.active.get(effect_id) != due:
+                continue  # deactivated since it was scheduled
+            message = self._apply(effect_id)
+            if message:
+                messages.append(message)
+            # Applying may have deactivated it, ex: on_limit turned the lamp off
+            if self.active.get(effect_id) == due:
+                self._schedule(effect_id, due)
+        return messages
+
+    def _apply(self, effect_id: str) -> Optional[str]:
+        effect = self.effects[effect_id]
+        entity = self._entity(effect)
+        property_name = effect["property"]
+        value = entity.properties[property_name] + effect["delta"]
+        if "min" in effect:
+            value = max(value, effect["min"])
+        if "max" in effect:
+            value = min(value, effect["max"])
+        self.logger.debug("%s: %s -> %s", effect_id, property_name, value)
+        entity.set_property(property_name, value)
+
+        if not self._at_limit(effect, value):
+            return None
+        self.active.pop(effect_id, None)
+        on_limit = effect.get("on_limit", {})
+        for limit_property, limit_value in on_limit.get("set", {}).items():
+            entity.set_property(limit_property, limit_value)
+        return on_limit.get("message")
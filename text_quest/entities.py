@@ -1,16 +1,288 @@
 """
 Game entities:
-- Player
+- Player (and its Inventory)
 - Rooms
 - Items
 """
 
-from dataclasses import dataclass, asdict
-from typing import Any, Callable, Dict, List, Optional
+from text_quest.output import OutputSink
+from bisect import bisect_left, bisect_right
+from copy import deepcopy
+from dataclasses import dataclass, field, fields
+import logging
+import sys
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Set,
+)
+
+# Upper bound on rendered descriptions cached per room
+MAX_CACHED_DESCRIPTIONS = 64
+
+# Entities are slotted dataclasses, so they share one logger instead of self.logger
+logger = logging.getLogger(__name__)
+
+
+class _Absent:
+    """Type of ABSENT, the old or new value reported for a property that isn't set."""
+
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return "ABSENT"
+
+
+ABSENT = _Absent()
+
+
+class ItemLocationIndex:
+    """
+    Reverse index of item locations so items can be found by room without scanning
+    every item in the game:
+    {
+     'room_id_A': {'item_id_A': None, 'item_id_B': None},
+     'player_inventory': {'item_id_C': None}
+    }
+    NOTE: dicts are used as insertion ordered sets so item listings stay stable.
+
+    An optional base (ex: WorldTemplate.item_locations) holds starting locations shared
+    between sessions. It is never modified, only items that moved are tracked here.
+    """
+
+    def __init__(
+        self,
+        items: Iterable["Item"] = (),
+        base: Optional[Mapping[str, Iterable[str]]] = None,
+    ):
+        # Not truthiness, a store-backed base would count every location
+        self.base = base if base is not None else {}
+        # Items that have left their base location
+        self.moved_from_base: Set[str] = set()
+        self.locations: Dict[str, Dict[str, None]] = {}
+        for item in items:
+            self.add(item_id=item.id, location=item.get_current_location())
+
+    def add(self, item_id: str, location: str):
+        self.locations.setdefault(location, {})[item_id] = None
+
+    def remove(self, item_id: str, location: str):
+        items_at_location = self.locations.get(location)
+        if items_at_location is not None and item_id in items_at_location:
+            del items_at_location[item_id]
+            if not items_at_location:
+                del self.locations[location]
+        elif location in self.base:
+            self.moved_from_base.add(item_id)
+
+    def move(self, item_id: str, old_location: str, new_location: str):
+        self.remove(item_id=item_id, location=old_location)
+        self.add(item_id=item_id, location=new_location)
+
+    def get_item_ids_at(self, location: str) -> List[str]:
+        item_ids = [
+            item_id
+            for item_id in self.base.get(location, ())
+            if item_id not in self.moved_from_base
+        ]
+        item_ids.extend(self.locations.get(location, ()))
+        return item_ids
+
+
+class Inventory:
+    """
+    Item ids held by the player, with a count per id for stackable items:
+        Inventory(['blank_map', 'coin', 'coin']) -> {'blank_map': 1, 'coin': 2}
+    Membership, counts, adding and removing are O(1), iteration yields each id once in
+    the order it was first added. Serialized as a list of ids with repeats (to_list),
+    the format game files and saves use.
+    """
+
+    __slots__ = ("counts",)
+
+    def __init__(self, item_ids: Iterable[str] = ()):
+        self.counts: Dict[str, int] = {}
+        for item_id in item_ids:
+            self.counts[item_id] = self.counts.get(item_id, 0) + 1
+
+    def __contains__(self, item_id) -> bool:
+        return item_id in self.counts
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.counts)
+
+    def __len__(self) -> int:
+        """Number of distinct items."""
+        return len(self.counts)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Inventory):
+            return self.counts == other.counts
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"Inventory({self.to_list()!r})"
+
+    def count(self, item_id: str) -> int:
+        return self.counts.get(item_id, 0)
+
+    def set_count(self, item_id: str, count: int):
+        """Removes item_id once count reaches 0, re-added items go to the end."""
+        if count > 0:
+            self.counts[item_id] = count
+        else:
+            self.counts.pop(item_id, None)
+
+    def add(self, item_id: str, n: int = 1):
+        self.set_count(item_id, self.count(item_id) + n)
+
+    def remove(self, item_id: str, n: int = 1):
+        if item_id not in self.counts:
+            raise KeyError(item_id)
+        self.set_count(item_id, self.counts[item_id] - n)
+
+    def to_list(self) -> List[str]:
+        return [item_id for item_id, count in self.counts.items() for _ in range(count)]
+
+
+class StateDescriptionTable:
+    """
+    A property's state_descriptions compiled for lookup without string parsing:
+    - 'true'/'false' describe bool values
+    - 'greater_than_<n>', 'less_than_<n>' and 'equals_<n>' describe numbers, the first
+      matching condition (in declaration order) wins
+    Numeric thresholds are sorted once and split numbers into regions, ex: thresholds
+    [0, 5] -> (-inf, 0), 0, (0, 5), 5, (5, inf). The winning description of every region
+    is resolved up front, so a lookup is a single bisect.
+    """
+
+    NUMERIC_CONDITIONS = {
+        "greater_than_": lambda value, threshold: value > threshold,
+        "less_than_": lambda value, threshold: value < threshold,
+        "equals_": lambda value, threshold: value == threshold,
+    }
+
+    def __init__(self, state_descriptions: Mapping[str, str]):
+        self.bool_descriptions = (
+            state_descriptions.get("false"),
+            state_descriptions.get("true"),
+        )
+
+        conditions = []
+        for condition, description in state_descriptions.items():
+            for prefix, compare in self.NUMERIC_CONDITIONS.items():
+                if condition.startswith(prefix):
+                    try:
+                        threshold = float(condition.split("_")[-1])
+                    except ValueError:
+                        break
+                    conditions.append((compare, threshold, description))
+                    break
+
+        self.thresholds = sorted({threshold for _, threshold, _ in conditions})
+        self.region_descriptions = [
+            self._first_match(conditions, value)
+            for value in self._region_representatives()
+        ]
+
+    def _region_representatives(self) -> List[float]:
+        """One value per region, alternating open intervals and thresholds."""
+        thresholds = self.thresholds
+        if not thresholds:
+            return []
+        values = [thresholds[0] - 1]
+        for lower, upper in zip(thresholds, thresholds[1:]):
+            values.extend([lower, (lower + upper) / 2])
+        values.extend([thresholds[-1], thresholds[-1] + 1])
+        return values
+
+    @staticmethod
+    def _first_match(conditions, value) -> Optional[str]:
+        for compare, threshold, description in conditions:
+            if compare(value, threshold):
+                return description
+        return None
+
+    def lookup(self, value: Any) -> Optional[str]:
+        """Get appropriate state description based on property value"""
+        if isinstance(value, bool):
+            return self.bool_descriptions[value]
+        elif isinstance(value, (int, float)):
+            if not self.thresholds or value != value:  # no numeric states, or NaN
+                return None
+            index = bisect_left(self.thresholds, value)
+            if index < len(self.thresholds) and self.thresholds[index] == value:
+                return self.region_descriptions[2 * index + 1]
+            return self.region_descriptions[2 * index]
+        return None
+
+
+def _copy_fields(data: Mapping[str, Any], *field_names: str) -> Dict[str, Any]:
+    """Shallow copy of data with a private (deep) copy of each of field_names."""
+    copied = dict(data)
+    for field_name in field_names:
+        copied[field_name] = deepcopy(data[field_name])
+    return copied
+
+
+def _intern_fields(data: Mapping[str, Any], *field_names: str) -> Dict[str, Any]:
+    """Copy of data with field_names interned, so every entity shares one copy of each id."""
+    interned = dict(data)
+    for field_name in field_names:
+        interned[field_name] = sys.intern(data[field_name])
+    return interned
+
+
+def transient(default=None):
+    """
+    Per-instance runtime state (indexes, callbacks, caches). Transient fields are slotted
+    like any other field but are not init arguments and are never serialized by to_dict.
+    """
+    return field(
+        default=default,
+        init=False,
+        repr=False,
+        compare=False,
+        metadata={"transient": True},
+    )
+
+
+class ObservableEntity:
+    """
+    Base for the slotted entity dataclasses below.
+
+    Entities report every change of game state to on_change (a transient field set per
+    instance by GameCoordinator) as:
+        on_change(kind, entity_id, field, key, old_value, new_value)
+    ex: ('item', 'lamp', 'properties', 'fuel_remaining', 10, 9)
+    key is None unless field is a dict/collection (ex: 'properties', 'inventory').
+    """
+
+    __slots__ = ()
+    kind = None
+
+    def _notify_change(self, field: str, key: Any, old_value: Any, new_value: Any):
+        if self.on_change is not None:
+            self.on_change(
+                self.kind, getattr(self, "id", None), field, key, old_value, new_value
+            )
 
+    def to_dict(self):
+        return {
+            f.name: deepcopy(getattr(self, f.name))
+            for f in fields(self)
+            if not f.metadata.get("transient")
+        }
 
-@dataclass
-class Item:
+
+@dataclass(slots=True, weakref_slot=True)
+class Item(ObservableEntity):
     id: str
     name: str
     base_description: str
@@ -20,43 +292,63 @@ class Item:
     property_constraints: Dict[str, Dict]
     cmd_to_config_map: Dict[str, Dict]
 
-    # Command function registry
-    command_functions: Dict[str, Callable] = None
+    # Runtime state, not serialized
+    on_change: Optional[Callable] = transient()
+    # Shared ItemLocationIndex kept in sync by set_current_location
+    location_index: Optional[ItemLocationIndex] = transient()
+    _state_tables: Optional[Dict[str, StateDescriptionTable]] = transient()
 
-    def __post_init__(self):
+    kind = "item"
+
+    # Command function registry, shared by every item: command -> method name
+    command_functions = {
+        "inspect": "inspect_object",
+    }
+
+    # Prerequisite conditions used in cmd_to_config_map
+    prerequisite_conditions = {
+        "greater_than": lambda value, threshold: value > threshold,
+        "less_than": lambda value, threshold: value < threshold,
+        "equals": lambda value, threshold: value == threshold,
+    }
+
+    def execute_command(self, command: str):
         """
-        Initialize command functions after object creation.
-        Needed because command_functions will be different on a per-instance level.
+        Runs a command from command_functions, or one configured in cmd_to_config_map,
+        ex: item.execute_command('inspect'), item.execute_command('on')
         """
-        if not self.command_functions:
-            self._initialize_command_functions()
-
-    def _initialize_command_functions(self):
-        # Shared command_functions
-        self.command_functions = {
-            "inspect": self.inspect_object,
-            # "toggle_property": self.execute_property_command,
-            # "set_property": self.execute_property_command,
-            # "increment_property": self.execute_property_command
-        }
+        if command in self.command_functions:
+            return getattr(self, self.command_functions[command])()
+        return self.run_configured_command(self.cmd_to_config_map[command])
 
-        # Map specific commands based on action type
-        # for cmd_name, cmd_config in self.cmd_to_config_map.items():
-        #     if cmd_config.get("action_type") == "toggle":
-        #         self.command_functions[cmd_name] = self.execute_property_command
-        #     elif cmd_config.get("action_type") == "set_value":
-        #         self.command_functions[cmd_name] = self.execute_property_command
-        #     elif cmd_config.get("action_type") == "increment":
-        #         self.command_functions[cmd_name] = self.execute_property_command
+    def run_configured_command(self, config: Mapping[str, Any]) -> str:
+        """
+        Applies a cmd_to_config_map entry and returns the message to show, ex:
+        {'property': 'is_lit', 'action_type': 'toggle', 'target_value': True,
+         'prerequisites': [...], 'already_message': ..., 'success_message': ...}
+        """
+        property_name = config["property"]
+        for prerequisite in config.get("prerequisites", ()):
+            condition = self.prerequisite_conditions[prerequisite["condition"]]
+            value = self.properties.get(prerequisite["property"])
+            if value is None or not condition(value, prerequisite["value"]):
+                return prerequisite["fail_message"]
+
+        if config["action_type"] == "toggle":
+            if self.properties.get(property_name) == config["target_value"]:
+                return config["already_message"]
+            self.set_property(property_name, config["target_value"])
+            return config["success_message"]
+        raise ValueError(f"Unknown action_type: {config['action_type']}")
 
     @classmethod
     def from_dict(cls, item_data: dict):
-        return cls(**item_data)
+        return cls(**_intern_fields(item_data, "id", "current_location"))
 
-    def to_dict(self):
-        data = asdict(self)
-        data.pop("command_functions", None)
-        return data
+    @classmethod
+    def from_template(cls, item_data: Mapping[str, Any]):
+        """Builds an item that shares static fields with item_data and owns its properties."""
+        return cls.from_dict(_copy_fields(item_data, "properties"))
 
     def get_description(self):
         return self.base_description
@@ -67,43 +359,27 @@ class Item:
 
         state_descriptions = []
 
-        for prop_name, prop_value in self.properties.items():
-            if prop_name in self.property_constraints:
-                constraints = self.property_constraints[prop_name]
-
-                if "state_descriptions" in constraints:
-                    state_desc = self._format_property_description(
-                        prop_value, constraints["state_descriptions"]
-                    )
-                    if state_desc:
-                        state_descriptions.append(state_desc)
+        for prop_name, state_table in self._get_state_tables().items():
+            if prop_name in self.properties:
+                state_desc = state_table.lookup(self.properties[prop_name])
+                if state_desc:
+                    state_descriptions.append(state_desc)
 
         if state_descriptions:
             return f"{base_description} {'\n'.join(state_descriptions)}"
         return base_description
 
-    def _format_property_description(
-        self, value: Any, state_descriptions: Dict
-    ) -> Optional[str]:
-        """Get appropriate state description based on property value"""
-        if isinstance(value, bool):
-            return state_descriptions.get("true" if value else "false")
-        elif isinstance(value, (int, float)):
-            # Handle numeric ranges
-            for condition, description in state_descriptions.items():
-                if condition.startswith("greater_than_"):
-                    threshold = float(condition.split("_")[-1])
-                    if value > threshold:
-                        return description
-                elif condition.startswith("less_than_"):
-                    threshold = float(condition.split("_")[-1])
-                    if value < threshold:
-                        return description
-                elif condition.startswith("equals_"):
-                    threshold = float(condition.split("_")[-1])
-                    if value == threshold:
-                        return description
-        return None
+    def _get_state_tables(self) -> Dict[str, StateDescriptionTable]:
+        """Compiles the state_descriptions in property_constraints on first use."""
+        state_tables = self._state_tables
+        if state_tables is None:
+            state_tables = {
+                prop_name: StateDescriptionTable(constraints["state_descriptions"])
+                for prop_name, constraints in self.property_constraints.items()
+                if "state_descriptions" in constraints
+            }
+            self._state_tables = state_tables
+        return state_tables
 
     def inspect_object(self):
         return self.generate_modified_description()
@@ -134,8 +410,13 @@ class Item:
             if value is None:
                 raise ValueError(f"Integer property '{property_name}' requires a value")
             new_value = int(value)
+        elif expected_type == "bool":
+            new_value = bool(value)
+        else:
+            new_value = value
 
         self.properties[property_name] = new_value
+        self._notify_change("properties", property_name, current_value, new_value)
         return new_value
 
     def get_current_location(self):
@@ -146,24 +427,48 @@ class Item:
         - 'room_id'
         - 'player_inventory'
         """
-        self.current_location = location
+        if self.location_index is not None:
+            self.location_index.move(
+                item_id=self.id,
+                old_location=self.current_location,
+                new_location=location,
+            )
+        old_location, self.current_location = self.current_location, location
+        self._notify_change("current_location", None, old_location, location)
         return self.current_location
 
 
-@dataclass
-class Player:
+@dataclass(slots=True, weakref_slot=True)
+class Player(ObservableEntity):
     health: int
     total_moves: int
-    inventory: list
+    inventory: Inventory
     current_location: str
     properties: dict
 
+    # Runtime state, not serialized
+    on_change: Optional[Callable] = transient()
+
+    kind = "player"
+
+    def __post_init__(self):
+        # Game files and saves hold the inventory as a list of ids
+        if not isinstance(self.inventory, Inventory):
+            self.inventory = Inventory(self.inventory)
+
     @classmethod
     def from_dict(cls, player_data: dict):
-        return cls(**player_data)
+        return cls(**_intern_fields(player_data, "current_location"))
+
+    @classmethod
+    def from_template(cls, player_data: Mapping[str, Any]):
+        """Builds a player that owns its inventory (see __post_init__) and properties."""
+        return cls.from_dict(_copy_fields(player_data, "properties"))
 
     def to_dict(self):
-        return asdict(self)
+        player_data = ObservableEntity.to_dict(self)
+        player_data["inventory"] = self.inventory.to_list()
+        return player_data
 
     def get_total_moves(self):
         return self.total_moves
@@ -178,33 +483,73 @@ class Player:
         """
         return item_id in self.inventory
 
-    def get_inventory_items_by_id(self) -> List[str]:
+    def get_inventory_items_by_id(self) -> Inventory:
         """
-        Example return -> ['lamp', 'sword', 'trophy']
-        NOTE: currently inventory is a list of items referenced by their id. This will need to be changed to support future functionalities
-        (player inspecting item, displaying item by name).
+        Example return -> Inventory(['lamp', 'sword', 'trophy']), iterates ids in the
+        order they were picked up and supports O(1) `in` checks.
         """
         return self.inventory
 
     def set_current_location(self, room_id: str):
-        self.current_location = room_id
+        old_location, self.current_location = self.current_location, room_id
+        self._notify_change("current_location", None, old_location, room_id)
         return self.current_location
 
-    def add_item_to_inventory(self, item):
-        self.inventory.append(item.id)
-        print(f"{item.id} added to pack.")
+    def add_item_to_inventory(self, item, output: Optional[OutputSink] = None):
+        """output: told about the new item, if given."""
+        old_count = self.inventory.count(item.id)
+        self.inventory.add(item.id)
+        self._notify_change("inventory", item.id, old_count, old_count + 1)
+        if output is not None:
+            output.print(f"{item.id} added to pack.")
+
+    def set_inventory_count(self, item_id: str, count: int):
+        """Adds or removes copies of item_id so the inventory holds exactly count of them."""
+        old_count = self.inventory.count(item_id)
+        self.inventory.set_count(item_id, count)
+        if count != old_count:
+            self._notify_change("inventory", item_id, old_count, count)
 
-    def remove_item_from_inventory(self, item):
-        if item in self.inventory:
-            print(f"{item.id} removed from pack.")
+    def set_property(self, property_name: str, value: Any):
+        """
+        Sets one of the player's properties, ex: ('poisoned', True). Properties that
+        weren't set before are reported with an old value of ABSENT.
+        """
+        old_value = self.properties.get(property_name, ABSENT)
+        self.properties[property_name] = value
+        self._notify_change("properties", property_name, old_value, value)
+        return value
+
+    def delete_property(self, property_name: str):
+        """Removes one of the player's properties, ex: when undoing set_property."""
+        if property_name in self.properties:
+            old_value = self.properties.pop(property_name)
+            self._notify_change("properties", property_name, old_value, ABSENT)
+
+    def remove_item_from_inventory(
+        self, item, output: Optional[OutputSink] = None
+    ) -> bool:
+        """
+        Removes one of item from the inventory, False if the player doesn't have it.
+        output: told about the removed item, if given.
+        """
+        if item.id not in self.inventory:
+            return False
+        old_count = self.inventory.count(item.id)
+        self.inventory.remove(item.id)
+        self._notify_change("inventory", item.id, old_count, old_count - 1)
+        if output is not None:
+            output.print(f"{item.id} removed from pack.")
+        return True
 
     def increment_total_moves(self, n: int = 1):
         """Increments total moves taken by player by given number (n) or 1."""
         self.total_moves += n
+        self._notify_change("total_moves", None, self.total_moves - n, self.total_moves)
 
 
-@dataclass
-class Room:
+@dataclass(slots=True, weakref_slot=True)
+class Room(ObservableEntity):
     id: str
     name: str
     base_description: str
@@ -212,77 +557,130 @@ class Room:
     connections_map: dict
     properties: dict
 
-    # Define condition functions as a class variable
-    condition_functions = None
+    # Runtime state, not serialized
+    on_change: Optional[Callable] = transient()
+    # Compiled conditional descriptions, see _compile_conditional_descriptions
+    _conditions: List[tuple] = transient()
+    _relevant_items: tuple = transient(default=())
+    _visit_thresholds: List[Any] = transient()
+    _description_cache: Dict[tuple, str] = transient()
+
+    kind = "room"
+
+    # Define condition compilers as a class variable, keyed by condition 'type'.
+    # Each is called with the condition's params and returns (evaluator, depends_on):
+    # - evaluator(room, items_present) -> bool
+    # - depends_on: inputs the result depends on, ('item', item_id) or ('visits', n)
+    condition_compilers = None
 
     @classmethod
     def _initialize_condition_functions(cls):
-        """Initialize condition functions - call this once when setting up the class"""
-        cls.condition_functions = {
+        """Initialize condition compilers - call this once when setting up the class"""
+        cls.condition_compilers = {
             "has_item": cls._has_item,
             "visit_count_less": cls._visit_count_less,
         }
 
-    def _has_item(self, item_name: str, items_in_room: List[str]) -> bool:
+    @staticmethod
+    def _has_item(item_name: str):
         """Check if a specific item is present in the room"""
-        return item_name in items_in_room
+        return (
+            lambda room, items_present: item_name in items_present,
+            [("item", item_name)],
+        )
 
-    def _visit_count_less(self, n: int, items_in_room: List[str]) -> bool:
+    @staticmethod
+    def _visit_count_less(n: int):
         """Check if player has visited less than n (number) times"""
-        return self.num_player_visits < n
+        return (
+            lambda room, items_present: room.num_player_visits < n,
+            [("visits", n)],
+        )
 
-    def generate_modified_description(
-        self, items_in_room: Optional[List[str]] = None
-    ) -> str:
-        """Generate dynamic description based on conditions"""
-        if items_in_room is None:
-            items_in_room = []
+    def __post_init__(self):
+        if self.condition_compilers is None:
+            self._initialize_condition_functions()
+        self._compile_conditional_descriptions()
 
-        description = self.base_description
+    def _compile_conditional_descriptions(self):
+        """
+        Compiles properties['conditional_descriptions'] once into evaluators, and records
+        which items and visit counts the rendered description depends on.
+        """
+        self._conditions = []
+        relevant_items: Dict[str, None] = {}
+        visit_thresholds = set()
 
-        # Get conditional descriptions from properties
         conditional_descriptions = self.properties.get("conditional_descriptions", {})
-
         for condition_name, condition_data in conditional_descriptions.items():
-            if isinstance(condition_data, dict) and "condition" in condition_data:
-                condition_config = condition_data["condition"]
-                modifier = condition_data["description_modifier"]
+            if not (isinstance(condition_data, dict) and "condition" in condition_data):
+                continue
+            condition_config = condition_data["condition"]
+            if not isinstance(condition_config, dict):
+                continue
+            condition_type = condition_config.get("type")
+            compiler = self.condition_compilers.get(condition_type)
+            if compiler is None:
+                continue
 
-                if self._evaluate_condition(condition_config, items_in_room):
-                    description += " " + modifier
+            try:
+                evaluator, depends_on = compiler(*condition_config.get("params", []))
+            except Exception as e:
+                logger.warning("Error evaluating condition '%s': %s", condition_type, e)
+                continue
+            for dependency_type, value in depends_on:
+                if dependency_type == "item":
+                    relevant_items[value] = None
+                else:
+                    visit_thresholds.add(value)
+            self._conditions.append(
+                (condition_type, evaluator, condition_data["description_modifier"])
+            )
+
+        self._relevant_items = tuple(relevant_items)
+        self._visit_thresholds = sorted(visit_thresholds)
+        # Rendered descriptions keyed by (relevant items present, visit threshold bucket)
+        self._description_cache = {}
 
+    def generate_modified_description(
+        self, items_in_room: Optional[List[str]] = None
+    ) -> str:
+        """Generate dynamic description based on conditions"""
+        items_present = set(items_in_room) if items_in_room else set()
+        cache_key = (
+            tuple(item in items_present for item in self._relevant_items),
+            bisect_right(self._visit_thresholds, self.num_player_visits),
+        )
+        description = self._description_cache.get(cache_key)
+        if description is None:
+            description = self._render_description(items_present)
+            if len(self._description_cache) >= MAX_CACHED_DESCRIPTIONS:
+                self._description_cache.clear()
+            self._description_cache[cache_key] = description
         return description
 
-    def _evaluate_condition(
-        self, condition_data: dict, items_in_room: List[str]
-    ) -> bool:
-        """Evaluate a condition based on its configuration"""
-        if not isinstance(condition_data, dict):
-            return False
-
-        condition_type = condition_data.get("type")
-        params = condition_data.get("params", [])
-
-        if condition_type in self.condition_functions:
+    def _render_description(self, items_present: Set[str]) -> str:
+        description = self.base_description
+        for condition_type, evaluator, modifier in self._conditions:
             try:
-                return self.condition_functions[condition_type](
-                    self, *params, items_in_room
-                )
+                if evaluator(self, items_present):
+                    description += " " + modifier
             except Exception as e:
-                print(f"Error evaluating condition '{condition_type}': {e}")
-                return False
-
-        return False
+                logger.warning("Error evaluating condition '%s': %s", condition_type, e)
+        return description
 
     @classmethod
     def from_dict(cls, room_data: dict):
-        if cls.condition_functions is None:
-            cls._initialize_condition_functions()
-
-        return cls(**room_data)
+        return cls(**_intern_fields(room_data, "id"))
 
-    def to_dict(self):
-        return asdict(self)
+    @classmethod
+    def from_template(cls, room_data: Mapping[str, Any]):
+        """
+        Builds a room that shares static fields with room_data.
+        NOTE: fields that change during play are replaced rather than mutated (see
+        set_connection, set_property), so nothing is copied.
+        """
+        return cls.from_dict(room_data)
 
     def get_base_description(self):
         return self.base_description
@@ -294,25 +692,70 @@ class Room:
         """Returns room_id, ex: -> 'start_room'"""
         return self.id
 
-    def display_room(self, items_in_room: List[str]):
+    def display_room(self, items_in_room: List[str], output: OutputSink):
         """Displays in following format when rooms are first entered.
         ROOM NAME
         You are in a dark, dank room.
         """
-        print(self.get_name())
-        print(self.generate_modified_description(items_in_room=items_in_room))
+        output.print(self.get_name())
+        output.print(self.generate_modified_description(items_in_room=items_in_room))
 
-    def validate_direction(self, direction: str):
-        """Check connections map for attempted direction and return True if player can travel to that room."""
+    def validate_direction(self, direction: str, output: Optional[OutputSink] = None):
+        """
+        Check connections map for attempted direction and return True if player can travel to that room.
+        output: told why the player can't move, if given.
+        """
         try:
             self.connections_map[direction]
             return True
         except KeyError as e:
-            print(f"Unable to move: {direction} The way is blocked!")
+            if output is not None:
+                output.print(f"Unable to move: {direction} The way is blocked!")
             return False
 
     def get_adjacent_room_id(self, direction: str):
         return self.connections_map[direction]
 
+    def set_connection(self, direction: str, room_id: Optional[str]):
+        """Connects this room to room_id via direction, or removes the connection if room_id is None."""
+        # Copied on write, connections_map is shared with the world template
+        connections_map = dict(self.connections_map)
+        old_room_id = connections_map.get(direction)
+        if room_id is None:
+            connections_map.pop(direction, None)
+        else:
+            connections_map[direction] = room_id
+        self.connections_map = connections_map
+        self._notify_change("connections_map", direction, old_room_id, room_id)
+
+    def set_property(self, property_name: str, value: Any):
+        """
+        Sets one of the room's properties, ex: ('flooded', True). Properties that
+        weren't set before are reported with an old value of ABSENT.
+        """
+        old_value = self.properties.get(property_name, ABSENT)
+        # Copied on write, properties is shared with the world template
+        self.properties = {**self.properties, property_name: value}
+        if property_name == "conditional_descriptions":
+            self._compile_conditional_descriptions()
+        self._notify_change("properties", property_name, old_value, value)
+        return value
+
+    def delete_property(self, property_name: str):
+        """Removes one of the room's properties, ex: when undoing set_property."""
+        if property_name in self.properties:
+            properties = dict(self.properties)
+            old_value = properties.pop(property_name)
+            self.properties = properties
+            if property_name == "conditional_descriptions":
+                self._compile_conditional_descriptions()
+            self._notify_change("properties", property_name, old_value, ABSENT)
+
     def increment_num_player_visits(self, n=1):
         self.num_player_visits += n
+        self._notify_change(
+            "num_player_visits",
+            None,
+            self.num_player_visits - n,
+            self.num_player_visits,
+        )
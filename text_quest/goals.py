@@ -0,0 +1,133 @@
+"""
+Goals (win conditions, achievements) declared in a game file's 'goals' section.
+- GoalTracker: reports goals as they are reached.
+
+ex: reached when the player is back in the armory carrying the trophy:
+    "goals": {
+        "trophy_returned": {
+            "conditions": [
+                {"type": "at_location", "params": ["armory"]},
+                {"type": "has_item", "params": ["trophy"]}
+            ],
+            "message": "YOU ARE VICTORIOUS, THE OGRE HAS BEEN SLAIN! ... right?"
+        }
+    }
+A goal is reached when all of its conditions hold, see GoalTracker.condition_compilers.
+"""
+
+from text_quest.entities import Item
+import logging
+from typing import Any, Callable, Dict, List, Mapping, Optional, Set, Tuple
+
+# State a condition reads, matched against changes reported by entities:
+# ('location', room_id), ('inventory', item_id) or ('item', item_id, property)
+Dependency = Tuple[str, ...]
+
+
+class GoalTracker:
+    """
+    Goals are compiled once into predicates plus the state they depend on. Changes to
+    that state mark the goal stale (see on_state_change) and only stale goals are
+    evaluated by check, so goals that nothing touched cost nothing per command.
+
+    Messages are shown when a goal becomes reached, not on every command after.
+    """
+
+    def __init__(
+        self,
+        goals: Mapping[str, Mapping[str, Any]],
+        get_entity: Callable[[str, Optional[str]], Any],
+    ):
+        """
+        goals: the game file's 'goals' section.
+        get_entity: (kind, entity_id) -> live entity, ex: ('item', 'lamp') -> Item
+        """
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        self.goals = goals
+        self.get_entity = get_entity
+        self.predicates: Dict[str, List[Callable[[], bool]]] = {}
+        # Goal ids to re-evaluate when a dependency changes
+        self.dependents: Dict[Dependency, List[str]] = {}
+        for goal_id, goal in goals.items():
+            self.predicates[goal_id] = []
+            for condition in goal["conditions"]:
+                compiler = self.condition_compilers[condition["type"]]
+                predicate, depends_on = compiler(self, *condition.get("params", []))
+                self.predicates[goal_id].append(predicate)
+                self.dependents.setdefault(depends_on, []).append(goal_id)
+        self.reached: Set[str] = set()
+        # Insertion ordered set, so messages come out in the order goals were reached
+        self.stale: Dict[str, None] = {}
+
+    # Condition compilers, keyed by condition 'type'. Each is called with the
+    # condition's params and returns (predicate() -> bool, dependency).
+    def _at_location(self, room_id: str):
+        def predicate() -> bool:
+            return self.get_entity("player", None).current_location == room_id
+
+        return predicate, ("location", room_id)
+
+    def _has_item(self, item_id: str):
+        def predicate() -> bool:
+            return self.get_entity("player", None)._has_item_in_inventory(item_id)
+
+        return predicate, ("inventory", item_id)
+
+    def _item_property(self, item_id: str, property_name: str, condition: str, value):
+        compare = Item.prerequisite_conditions[condition]
+
+        def predicate() -> bool:
+            current = self.get_entity("item", item_id).properties.get(property_name)
+            return current is not None and compare(current, value)
+
+        return predicate, ("item", item_id, property_name)
+
+    condition_compilers = {
+        "at_location": _at_location,
+        "has_item": _has_item,
+        "item_property": _item_property,
+    }
+
+    def reset(self):
+        """Records the goals already reached, without reporting them, ex: after a load."""
+        self.stale.clear()
+        self.reached = {goal_id for goal_id in self.goals if self._evaluate(goal_id)}
+
+    def on_state_change(
+        self, kind, entity_id, field, key, old_value=None, new_value=None
+    ):
+        """
+        Marks goals depending on the changed state stale, see ObservableEntity. A move
+        only affects goals at the rooms left (old_value) and entered (new_value).
+        """
+        if kind == "player":
+            if field == "current_location":
+                dependencies = [("location", old_value), ("location", new_value)]
+            elif field == "inventory":
+                dependencies = [("inventory", key)]
+            else:
+                return
+        elif kind == "item" and field == "properties":
+            dependencies = [("item", entity_id, key)]
+        else:
+            return
+        for dependency in dependencies:
+            goal_ids = self.dependents.get(dependency)
+            if goal_ids:
+                self.stale.update(dict.fromkeys(goal_ids))
+
+    def _evaluate(self, goal_id: str) -> bool:
+        return all(predicate() for predicate in self.predicates[goal_id])
+
+    def check(self) -> List[str]:
+        """Re-evaluates stale goals, returns messages for goals reached since last check."""
+        messages = []
+        for goal_id in self.stale:
+            if not self._evaluate(goal_id):
+                self.reached.discard(goal_id)
+            elif goal_id not in self.reached:
+                self.logger.info("Goal reached: %s", goal_id)
+                self.reached.add(goal_id)
+                messages.append(self.goals[goal_id]["message"])
+        self.stale.clear()
+        return messages
@@ -0,0 +1,161 @@
+"""
+Room graph.
+- RoomGraph: shortest paths and reachability between rooms, built from connections_map.
+"""
+
+from collections import OrderedDict, deque
+import logging
+from typing import Deque, Dict, List, Mapping, Optional, Tuple
+
+# Number of source rooms whose shortest path trees are kept
+MAX_CACHED_SOURCES = 16
+
+# room_id -> (previous room_id, direction taken from it, distance from source)
+PathTree = Dict[str, Tuple[Optional[str], Optional[str], int]]
+
+
+class RoomGraph:
+    """
+    Directed graph of rooms, where each room's connections_map gives its edges:
+    {
+     'start_room': {'w': 'armory', 'n': 'dark_maze_a'},
+     'armory': {'e': 'start_room'}
+    }
+    Shortest paths (fewest moves) come from breadth first search trees, cached per source
+    room (least recently used). A search stops once it reaches the target it was asked
+    for, and later queries from the same source resume it from its frontier, so a path
+    to a nearby room never searches the whole world. Changing a connection only drops
+    the cached trees that the change can affect.
+
+    rooms (ex: WorldTemplate.rooms) is read-only, changed connections are copied into
+    connection_overrides.
+    """
+
+    def __init__(
+        self,
+        rooms: Mapping[str, Mapping],
+        max_cached_sources: int = MAX_CACHED_SOURCES,
+    ):
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        self.rooms = rooms
+        self.max_cached_sources = max_cached_sources
+        self.connection_overrides: Dict[str, Dict[str, str]] = {}
+        self.trees: "OrderedDict[str, PathTree]" = OrderedDict()
+        # Rooms of a cached tree still to be searched from, none once it is complete
+        self.frontiers: Dict[str, Deque[str]] = {}
+
+    def get_connections(self, room_id: str) -> Mapping[str, str]:
+        connections = self.connection_overrides.get(room_id)
+        if connections is None:
+            connections = self.rooms[room_id]["connections_map"]
+        return connections
+
+    # Queries
+    def get_path_tree(self, source: str, target: Optional[str] = None) -> PathTree:
+        """
+        Shortest path tree from source, searched at least until it holds target. With
+        target None (or unreachable) it holds every room reachable from source.
+        """
+        tree = self.trees.get(source)
+        if tree is None:
+            tree = {source: (None, None, 0)}
+            self.trees[source] = tree
+            self.frontiers[source] = deque([source])
+            while len(self.trees) > self.max_cached_sources:
+                evicted_source, _ = self.trees.popitem(last=False)
+                self.frontiers.pop(evicted_source, None)
+        else:
+            self.trees.move_to_end(source)
+        if target not in tree:
+            self._search(source, tree, target)
+        return tree
+
+    def _search(self, source: str, tree: PathTree, target: Optional[str]):
+        """Continues the breadth first search of tree until target is in it."""
+        queue = self.frontiers.get(source)
+        if queue is None:
+            return
+        while queue:
+            room_id = queue.popleft()
+            distance = tree[room_id][2] + 1
+            for direction, next_room_id in self.get_connections(room_id).items():
+                if next_room_id not in tree:
+                    tree[next_room_id] = (room_id, direction, distance)
+                    queue.append(next_room_id)
+            # Only after all of room_id's exits are in tree, the search resumes after it
+            if target in tree:
+                return
+        del self.frontiers[source]
+
+    def find_path(self, source: str, target: str) -> Optional[List[Tuple[str, str]]]:
+        """
+        Fewest moves from source to target, None if target can't be reached.
+        Example return -> [('n', 'dark_maze_a'), ('n', 'dark_maze_b')]
+        """
+        tree = self.get_path_tree(source, target)
+        if target not in tree:
+            return None
+        path = []
+        room_id = target
+        while room_id != source:
+            previous_room_id, direction, _ = tree[room_id]
+            path.append((direction, room_id))
+            room_id = previous_room_id
+        path.reverse()
+        return path
+
+    def get_distance(self, source: str, target: str) -> Optional[int]:
+        entry = self.get_path_tree(source, target).get(target)
+        return entry[2] if entry else None
+
+    def is_reachable(self, source: str, target: str) -> bool:
+        return target in self.get_path_tree(source, target)
+
+    def get_reachable_rooms(self, source: str) -> List[str]:
+        """Rooms reachable from source (including source), nearest first."""
+        return list(self.get_path_tree(source))
+
+    # Updates
+    def set_connection(self, room_id: str, direction: str, target: Optional[str]):
+        """Connects room_id to target via direction, or removes the connection if target is None."""
+        connections = dict(self.get_connections(room_id))
+        old_target = connections.get(direction)
+        if old_target == target:
+            return
+        if target is None:
+            del connections[direction]
+        else:
+            connections[direction] = target
+        self.connection_overrides[room_id] = connections
+        self._invalidate(room_id, direction, old_target, target)
+
+    def _invalidate(self, room_id, direction, old_target, new_target):
+        """
+        Drops cached trees that used the old edge or that the new edge would shorten.
+        Trees not searched to the end are dropped whenever room_id is in them and the
+        new edge leads outside them, its target may just not be searched yet.
+        """
+        stale_sources = []
+        for source, tree in self.trees.items():
+            if room_id not in tree:
+                continue
+            if old_target is not None and tree.get(old_target, (None, None))[:2] == (
+                room_id,
+                direction,
+            ):
+                stale_sources.append(source)
+            elif new_target is not None and (
+                new_target not in tree or tree[room_id][2] + 1 < tree[new_target][2]
+            ):
+                stale_sources.append(source)
+
+        for source in stale_sources:
+            del self.trees[source]
+            self.frontiers.pop(source, None)
+        if stale_sources:
+            self.logger.info(
+                "Connection %s:%s changed, dropped %s path trees",
+                room_id,
+                direction,
+                len(stale_sources),
+            )
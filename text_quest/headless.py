@@ -0,0 +1,165 @@
+"""
+Headless game sessions.
+- HeadlessSession: drives a GameCoordinator from a command script or stream
+  without a TTY, returning the output of every command.
+
+Usage:
+    python -m text_quest.headless path/to/script.txt
+"""
+
+from text_quest.core import GameCoordinator
+from text_quest.output import BufferSink
+from dataclasses import dataclass, field
+import logging
+import sys
+import time
+from typing import Callable, Iterable, List, Optional
+
+
+class ConfirmationPending(Exception):
+    """Raised when a command needs a yes/no answer that has not been provided yet."""
+
+    def __init__(self, prompt: str):
+        super().__init__(prompt)
+        self.prompt = prompt
+
+
+@dataclass
+class CommandResult:
+    command: str
+    output: str
+    elapsed: float
+
+
+@dataclass
+class SessionReport:
+    results: List[CommandResult] = field(default_factory=list)
+    elapsed: float = 0.0
+    finished: bool = False
+
+    @property
+    def num_commands(self) -> int:
+        return len(self.results)
+
+    @property
+    def commands_per_second(self) -> float:
+        if self.elapsed <= 0:
+            return 0.0
+        return self.num_commands / self.elapsed
+
+    def get_outputs(self) -> List[str]:
+        return [result.output for result in self.results]
+
+
+class HeadlessSession:
+    """
+    Feeds commands through GameCoordinator.handle_command and captures everything
+    the game prints in a BufferSink. Prompts (ex: restart confirmation) are answered by the next
+    command, and quitting ends the session instead of exiting the process.
+    """
+
+    def __init__(
+        self,
+        game: Optional[GameCoordinator] = None,
+        game_factory: Callable[..., GameCoordinator] = GameCoordinator,
+    ):
+        """
+        game: existing game to drive, its output is redirected to this session.
+        game_factory: creates the game otherwise, called with output=BufferSink().
+        """
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        self.output = BufferSink()
+        if game is None:
+            game = game_factory(output=self.output)
+        else:
+            game.output.flush()
+            game.output = self.output
+        # Output printed while the game loads, ex: the starting room.
+        self.intro = self.output.take()
+        self.game = game
+        self.game.confirm = self._confirm
+        self.finished = False
+        self._awaiting_args: Optional[List[str]] = None
+        self._answer: Optional[str] = None
+
+    @property
+    def awaiting_confirmation(self) -> bool:
+        return self._awaiting_args is not None
+
+    def _confirm(self, prompt: str) -> str:
+        if self._answer is None:
+            raise ConfirmationPending(prompt)
+        answer, self._answer = self._answer, None
+        return answer
+
+    def execute(self, command: str) -> str:
+        """Runs a single line of input and returns the output it produced."""
+        if self.finished:
+            return ""
+
+        if self._awaiting_args is not None:
+            args, self._awaiting_args = self._awaiting_args, None
+            self._answer = command.strip()
+        else:
+            args = self.game.parse_command(command)
+
+        try:
+            self.game.handle_command(args=args)
+        except ConfirmationPending as e:
+            self._awaiting_args = args
+            self.output.print(e.prompt, end="")
+        except SystemExit:
+            self.finished = True
+        return self.output.take()
+
+    def run_script(self, commands: Iterable[str]) -> SessionReport:
+        """Executes commands in order until they run out or the game is quit."""
+        report = SessionReport()
+        start = time.perf_counter()
+        for command in commands:
+            command_start = time.perf_counter()
+            output = self.execute(command)
+            report.results.append(
+                CommandResult(
+                    command=command.rstrip("\r\n"),
+                    output=output,
+                    elapsed=time.perf_counter() - command_start,
+                )
+            )
+            if self.finished:
+                break
+        report.elapsed = time.perf_counter() - start
+        report.finished = self.finished
+        self.logger.info(
+            "Ran %s commands at %.0f cmd/s",
+            report.num_commands,
+            report.commands_per_second,
+        )
+        return report
+
+
+def run_script_file(path: str, game: Optional[GameCoordinator] = None):
+    """Runs every line of the file at path as a command in a new headless session."""
+    with open(path, mode="r", encoding="utf-8") as f:
+        return HeadlessSession(game=game).run_script(f)
+
+
+def main(argv: Optional[List[str]] = None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        report = run_script_file(argv[0])
+    else:
+        report = HeadlessSession().run_script(sys.stdin)
+
+    for result in report.results:
+        print(f"> {result.command}")
+        if result.output:
+            print(result.output, end="" if result.output.endswith("\n") else "\n")
+    print(
+        f"\n{report.num_commands} commands in {report.elapsed:.4f}s "
+        f"({report.commands_per_second:.0f} cmd/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Undo history.
+- UndoHistory: changes made by each of the last max_turns commands, as diff records,
+  so they can be undone.
+
+Only changed values are kept (see entities.ObservableEntity), so memory grows with
+what each turn changed rather than the size of the world.
+"""
+
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+DEFAULT_UNDO_TURNS = 1000
+
+# (kind, entity_id, field, key), ex: ('item', 'lamp', 'properties', 'is_lit')
+ChangeKey = Tuple[str, Optional[str], str, Any]
+
+
+class UndoHistory:
+    """
+    Turns are recorded between begin_turn and end_turn, ex:
+    {('player', None, 'current_location', None): 'start_room',
+     ('room', 'maze', 'num_player_visits', None): 0}
+    holding the value each changed field had before the turn. Turns that changed
+    nothing are not kept, and the oldest turns are dropped after max_turns.
+    """
+
+    def __init__(self, max_turns: int = DEFAULT_UNDO_TURNS):
+        self.turns: Deque[Dict[ChangeKey, Any]] = deque(maxlen=max_turns)
+        # Changes of the turn in progress, None outside a turn
+        self.current: Optional[Dict[ChangeKey, Any]] = None
+
+    def __len__(self) -> int:
+        return len(self.turns)
+
+    def begin_turn(self):
+        self.current = {}
+
+    def record(self, kind, entity_id, field, key, old_value, new_value):
+        """Keeps the value from before the turn when a field changes more than once."""
+        if self.current is not None:
+            self.current.setdefault((kind, entity_id, field, key), old_value)
+
+    def end_turn(self):
+        if self.current:
+            self.turns.append(self.current)
+        self.current = None
+
+    def cancel_turn(self):
+        """Stops recording the turn in progress, ex: while it undoes earlier turns."""
+        self.current = None
+
+    def pop(self, n: int = 1) -> List[Dict[ChangeKey, Any]]:
+        """Removes and returns up to n of the latest turns, latest first."""
+        return [self.turns.pop() for _ in range(min(n, len(self.turns)))]
+
+    def clear(self):
+        """Called after loads and restarts, earlier turns no longer apply."""
+        self.turns.clear()
+        self.current = None
@@ -2,17 +2,114 @@
 """
 Centralized logging configuration module.
 Import this module in your main application to set up logging.
+- setup_logging: console and file handlers, by default behind a queue so records are
+  written on a listener thread instead of the game thread.
+- JsonFormatter: one JSON object per record, for log shippers.
+- RateLimitFilter: caps records per second for chosen loggers.
+
+Log calls should use lazy formatting, ex: logger.info("Moved to %s", room_id), so
+records below the configured level cost a level check and nothing else.
 """
+import atexit
+import json
 import logging
 import logging.config
+from logging.handlers import QueueHandler, QueueListener
+import queue
 import sys
+import time
 from pathlib import Path
+from typing import Dict, Mapping, Optional
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats records as single line JSON, ex:
+    {"time": "2024-01-01 12:00:00", "level": "INFO", "logger": "text_quest.core...",
+     "message": "Game save: PROT01", "module": "core", "function": "save_game_to_file",
+     "line": 301}
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno,
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Token bucket per logger: each logger named in rates (or a child of one) passes at
+    most rate records per second, with bursts of up to one second's worth. Other
+    loggers are not limited, ex:
+        RateLimitFilter({"text_quest.core": 50})
+    Dropped records are counted in self.dropped.
+    """
 
+    def __init__(self, rates: Mapping[str, float]):
+        super().__init__()
+        self.rates = dict(rates)
+        # logger name -> [tokens, last refill time, rate], None if not limited
+        self.buckets: Dict[str, Optional[list]] = {}
+        self.dropped = 0
 
-def setup_logging(log_level=logging.INFO, log_file="app.log"):
+    def _get_bucket(self, name: str) -> Optional[list]:
+        if name not in self.buckets:
+            limited = name
+            while limited and limited not in self.rates:
+                limited = limited.rpartition(".")[0]
+            self.buckets[name] = (
+                [self.rates[limited], time.monotonic(), self.rates[limited]]
+                if limited
+                else None
+            )
+        return self.buckets[name]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # Shared by several handlers, so each record is only charged once
+        passed = getattr(record, "rate_limit_passed", None)
+        if passed is None:
+            passed = record.rate_limit_passed = self._take_token(record.name)
+        return passed
+
+    def _take_token(self, name: str) -> bool:
+        bucket = self._get_bucket(name)
+        if bucket is None:
+            return True
+        tokens, last_refill, rate = bucket
+        now = time.monotonic()
+        tokens = min(rate, tokens + (now - last_refill) * rate)
+        if tokens < 1:
+            bucket[0], bucket[1] = tokens, now
+            self.dropped += 1
+            return False
+        bucket[0], bucket[1] = tokens - 1, now
+        return True
+
+
+def setup_logging(
+    log_level=logging.INFO,
+    log_file="app.log",
+    use_queue: bool = True,
+    json_format: bool = False,
+    rate_limits: Optional[Mapping[str, float]] = None,
+) -> Optional[QueueListener]:
     """
     Set up logging configuration for the entire application.
     Call this once at the start of your application.
+
+    use_queue: log calls only enqueue records, a QueueListener thread formats and
+        writes them. Returns the listener, it is stopped (and the queue drained) at exit.
+    json_format: write the log file as JSON lines, see JsonFormatter.
+    rate_limits: logger name -> max records per second, see RateLimitFilter.
     """
 
     # Create logs directory if it doesn't exist
@@ -33,6 +130,10 @@ def setup_logging(log_level=logging.INFO, log_file="app.log"):
                 "format": "%(asctime)s - %(name)s - %(levelname)s - %(module)s - %(funcName)s:%(lineno)d - %(message)s",
                 "datefmt": "%Y-%m-%d %H:%M:%S",
             },
+            "json": {
+                "()": JsonFormatter,
+                "datefmt": "%Y-%m-%d %H:%M:%S",
+            },
         },
         "handlers": {
             "console": {
@@ -44,7 +145,7 @@ def setup_logging(log_level=logging.INFO, log_file="app.log"):
             "file": {
                 "class": "logging.FileHandler",
                 "level": "DEBUG",
-                "formatter": "detailed",
+                "formatter": "json" if json_format else "detailed",
                 "filename": log_file,
                 "mode": "a",
             },
@@ -60,6 +161,31 @@ def setup_logging(log_level=logging.INFO, log_file="app.log"):
 
     logging.config.dictConfig(logging_config)
 
+    root_logger = logging.getLogger()
+    listener = None
+    if use_queue:
+        # Records are queued by the game thread and written by the listener's thread
+        handlers = list(root_logger.handlers)
+        for handler in handlers:
+            root_logger.removeHandler(handler)
+        log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        root_logger.addHandler(QueueHandler(log_queue))
+        listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        atexit.register(stop_logging, listener)
+    if rate_limits:
+        # Filters run where records are created, so dropped records are never queued
+        rate_limit_filter = RateLimitFilter(rate_limits)
+        for handler in root_logger.handlers:
+            handler.addFilter(rate_limit_filter)
+
     # Log that logging has been configured
     logger = logging.getLogger(__name__)
     logger.info("Logging configuration initialized")
+    return listener
+
+
+def stop_logging(listener: Optional[QueueListener]):
+    """Writes out queued records and stops the listener, safe to call more than once."""
+    if listener is not None and listener._thread is not None:
+        listener.stop()
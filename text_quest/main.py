@@ -1,14 +1,35 @@
 """
 The main game execution.
+
+Usage:
+    python ./text_quest/main.py
+    # Run a command script under cProfile and tracemalloc, see profiling.py
+    python ./text_quest/main.py --profile path/to/commands.txt --top 15 --pstats out.prof
 """
 
+import argparse
 from core import GameCoordinator
 import logging
 from logger_config import setup_logging
+from profiling import profile_script_file
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Play text_quest.")
+    parser.add_argument(
+        "--profile",
+        metavar="SCRIPT",
+        default=None,
+        help="profile a command script (one command per line) instead of playing",
+    )
+    parser.add_argument("--top", type=int, default=15, help="rows per report section")
+    parser.add_argument("--pstats", default=None, help="also save raw cProfile stats")
+    args = parser.parse_args()
+
     setup_logging(log_level=logging.ERROR, log_file="logs/text_quest.log")
+    if args.profile:
+        profile_script_file(args.profile, top=args.top, pstats_path=args.pstats)
+        return
     game = GameCoordinator()
     game.run_game()
 
@@ -0,0 +1,204 @@
+"""
+Process wide metrics.
+- Histogram: bucketed observations (ex: latencies), with count and sum.
+- MetricsRegistry: counters and histograms by name and labels, rendered for the
+  stats command or as Prometheus text format.
+- metrics: registry shared by every session in the process.
+
+Recording is a dict lookup, a bisect and a few additions, cheap enough to leave on.
+"""
+
+from bisect import bisect_left
+import os
+from pathlib import Path
+import threading
+from typing import Dict, List, Sequence, Tuple
+
+# Upper bounds (seconds) of latency buckets, from 10us to 2.5s
+LATENCY_BUCKETS = (
+    0.00001,
+    0.000025,
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+
+# (metric name, ((label, value), ...))
+MetricKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+class Histogram:
+    """Counts observations per bucket, the last bucket catches values above every bound."""
+
+    __slots__ = ("bounds", "bucket_counts", "count", "sum")
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.bucket_counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.bucket_counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the quantile, inf if above every bound."""
+        rank = fraction * self.count
+        cumulative = 0
+        for bound, bucket_count in zip(self.bounds, self.bucket_counts):
+            cumulative += bucket_count
+            if cumulative >= rank:
+                return bound
+        return float("inf")
+
+
+class MetricsRegistry:
+    """
+    Counters and histograms keyed by name and labels, ex:
+        metrics.inc("text_quest_command_errors_total", handler="handle_load")
+        metrics.observe("text_quest_command_seconds", 0.0002, handler="handle_move")
+    Label values should come from a small fixed set (handler names, not player input).
+    Safe to record from several threads, ex: the BackgroundSaver.
+    """
+
+    def __init__(self):
+        self.counters: Dict[MetricKey, float] = {}
+        self.histograms: Dict[MetricKey, Histogram] = {}
+        self.help: Dict[str, str] = {}
+        # Added to every rendered series, ex: (("worker", "2"),) in pre-forked servers
+        self.const_labels: Tuple[Tuple[str, str], ...] = ()
+        self.lock = threading.Lock()
+
+    def describe(self, name: str, help_text: str):
+        self.help[name] = help_text
+
+    def inc(self, name: str, n: float = 1, **labels: str):
+        key = (name, tuple(labels.items()))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    def observe(self, name: str, value: float, **labels: str):
+        key = (name, tuple(labels.items()))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def clear(self):
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Example return ->
+        {'text_quest_command_seconds{handler="handle_move"}':
+            {'count': 12, 'mean_ms': 0.04, 'p50_ms': 0.05, 'p95_ms': 0.1, 'p99_ms': 0.1},
+         'text_quest_command_errors_total{handler="handle_load"}': {'value': 1}}
+        """
+        summary = {}
+        with self.lock:
+            for key, histogram in sorted(self.histograms.items()):
+                summary[_format_key(*key)] = {
+                    "count": histogram.count,
+                    "mean_ms": histogram.sum / histogram.count * 1000,
+                    "p50_ms": histogram.quantile(0.50) * 1000,
+                    "p95_ms": histogram.quantile(0.95) * 1000,
+                    "p99_ms": histogram.quantile(0.99) * 1000,
+                }
+            for key, value in sorted(self.counters.items()):
+                summary[_format_key(*key)] = {"value": value}
+        return summary
+
+    def render_prometheus(self) -> str:
+        """Every metric in Prometheus text exposition format."""
+        lines: List[str] = []
+        with self.lock:
+            described = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                if name not in described:
+                    self._describe_lines(lines, name, "counter")
+                    described.add(name)
+                labels = self.const_labels + labels
+                lines.append(f"{_format_key(name, labels)} {_format_value(value)}")
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                if name not in described:
+                    self._describe_lines(lines, name, "histogram")
+                    described.add(name)
+                labels = self.const_labels + labels
+                cumulative = 0
+                for bound, bucket_count in zip(
+                    histogram.bounds + (float("inf"),), histogram.bucket_counts
+                ):
+                    cumulative += bucket_count
+                    bucket_labels = labels + (("le", _format_value(bound)),)
+                    lines.append(
+                        f"{_format_key(name + '_bucket', bucket_labels)} {cumulative}"
+                    )
+                lines.append(
+                    f"{_format_key(name + '_sum', labels)} {_format_value(histogram.sum)}"
+                )
+                lines.append(
+                    f"{_format_key(name + '_count', labels)} {histogram.count}"
+                )
+        return "".join(line + "\n" for line in lines)
+
+    def _describe_lines(self, lines: List[str], name: str, metric_type: str):
+        if name in self.help:
+            lines.append(f"# HELP {name} {self.help[name]}")
+        lines.append(f"# TYPE {name} {metric_type}")
+
+    def write_prometheus(self, file_path):
+        """
+        Writes render_prometheus() to file_path (ex: for a node_exporter textfile
+        collector). Written to a temporary file and renamed, so scrapers never read a
+        partial file.
+        """
+        file_path = Path(file_path)
+        temp_path = file_path.with_suffix(f".{os.getpid()}.tmp")
+        temp_path.write_text(self.render_prometheus(), encoding="utf-8")
+        os.replace(temp_path, file_path)
+
+
+def _format_key(name: str, labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return name
+    label_text = ",".join(f'{label}="{_escape(str(value))}"' for label, value in labels)
+    return f"{name}{{{label_text}}}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+metrics = MetricsRegistry()
+metrics.describe("text_quest_command_seconds", "Time spent handling a command.")
+metrics.describe(
+    "text_quest_command_errors_total", "Commands that failed or were not understood."
+)
+metrics.describe("text_quest_load_seconds", "Time spent loading a game or save.")
+metrics.describe("text_quest_load_bytes_total", "Bytes of game files and saves loaded.")
+metrics.describe("text_quest_save_seconds", "Time spent writing a save.")
+metrics.describe("text_quest_save_bytes_total", "Bytes of saves written.")
+metrics.describe("text_quest_save_errors_total", "Save writes that failed.")
@@ -0,0 +1,62 @@
+"""
+Output sinks, where the game's responses go.
+- OutputSink: collects everything a command prints and writes it out in one go on flush,
+  subclasses implement _write.
+- StdoutSink: writes to sys.stdout, for play in a terminal.
+- BufferSink: keeps output in memory, ex: for headless sessions and servers.
+
+GameCoordinator flushes its sink once per command, so a command costs one write
+however many lines it prints.
+There is no socket sink: server.GameServer takes each command's output from the
+session's BufferSink and writes it to the connection itself, with the prompt and
+without blocking the event loop.
+"""
+
+from abc import ABC, abstractmethod
+import sys
+from typing import List
+
+
+class OutputSink(ABC):
+    def __init__(self):
+        # Text printed since the last flush
+        self.parts: List[str] = []
+
+    def print(self, *values, sep: str = " ", end: str = "\n"):
+        """Same arguments as the print builtin, but only buffers the text."""
+        self.parts.append(sep.join(map(str, values)) + end)
+
+    def flush(self):
+        if not self.parts:
+            return
+        data = "".join(self.parts)
+        self.parts.clear()
+        self._write(data)
+
+    @abstractmethod
+    def _write(self, data: str):
+        """Writes out everything printed since the last flush, in one go."""
+
+
+class StdoutSink(OutputSink):
+    def _write(self, data: str):
+        # Looked up on every write, so redirect_stdout still works
+        sys.stdout.write(data)
+        sys.stdout.flush()
+
+
+class BufferSink(OutputSink):
+    def __init__(self):
+        super().__init__()
+        # Flushed text not yet taken
+        self.flushed: List[str] = []
+
+    def _write(self, data: str):
+        self.flushed.append(data)
+
+    def take(self) -> str:
+        """Returns and clears everything printed so far, flushed or not."""
+        self.flush()
+        data = "".join(self.flushed)
+        self.flushed.clear()
+        return data
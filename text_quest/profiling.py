@@ -0,0 +1,212 @@
+"""
+Profiling mode, runs a command script under cProfile and tracemalloc together.
+- profile_script: profiles loading a game and running commands through it.
+- ProfileReport: CPU time and allocations grouped by GameCoordinator handle_* method
+  and entity method, plus the top allocation sites.
+
+Usage:
+    python ./text_quest/main.py --profile path/to/commands.txt --top 15
+"""
+
+from text_quest import entities
+from text_quest.core import GameCoordinator
+from text_quest.headless import HeadlessSession
+import cProfile
+from dataclasses import dataclass, field
+import inspect
+import os
+import pstats
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+TRACEBACK_FRAMES = 32
+# Directory holding the text_quest package, stripped from reported file names
+SOURCE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@dataclass
+class GroupStats:
+    calls: int = 0
+    cpu_seconds: float = 0.0
+    # Memory allocated under the group still alive when the script ended
+    allocated_bytes: int = 0
+    allocations: int = 0
+
+
+@dataclass
+class ProfileReport:
+    num_commands: int
+    elapsed: float
+    peak_bytes: int
+    handlers: Dict[str, GroupStats] = field(default_factory=dict)
+    entity_methods: Dict[str, GroupStats] = field(default_factory=dict)
+    # (file:line, bytes, allocations)
+    top_sites: List[Tuple[str, int, int]] = field(default_factory=list)
+    stats: Optional[pstats.Stats] = None
+
+    def format(self, top: int = 15) -> str:
+        lines = [
+            f"{self.num_commands} commands in {self.elapsed:.3f}s (profiled), "
+            f"peak traced memory {self.peak_bytes / 1024:.1f}KiB",
+            "NOTE: timings include profiler overhead, compare them with each other only.",
+        ]
+        for title, groups in [
+            ("Handlers", self.handlers),
+            ("Entity methods", self.entity_methods),
+        ]:
+            lines.append("")
+            lines.append(
+                f"{title:<40} {'calls':>8} {'cpu ms':>10} {'live KiB':>10} {'allocs':>8}"
+            )
+            ordered = sorted(
+                groups.items(), key=lambda group: group[1].cpu_seconds, reverse=True
+            )
+            for name, group in ordered[:top]:
+                lines.append(
+                    f"{name:<40} {group.calls:>8} {group.cpu_seconds * 1000:>10.2f} "
+                    f"{group.allocated_bytes / 1024:>10.1f} {group.allocations:>8}"
+                )
+        lines.append("")
+        lines.append(f"{'Top allocation sites':<60} {'live KiB':>10} {'allocs':>8}")
+        for site, size, allocations in self.top_sites[:top]:
+            lines.append(f"{site:<60} {size / 1024:>10.1f} {allocations:>8}")
+        return "\n".join(lines)
+
+
+def _function_ranges(cls) -> Iterable[Tuple[str, str, int, int]]:
+    """(filename, 'Class.method', first line, last line) of every method of cls."""
+    for name, member in vars(cls).items():
+        function = inspect.unwrap(getattr(member, "__func__", member))
+        code = getattr(function, "__code__", None)
+        if code is None:
+            continue
+        line_numbers = [line for _, _, line in code.co_lines() if line is not None]
+        yield (
+            code.co_filename,
+            f"{cls.__name__}.{name}",
+            code.co_firstlineno,
+            max(line_numbers, default=code.co_firstlineno),
+        )
+
+
+class FunctionIndex:
+    """Finds the handler or entity method a line of code belongs to."""
+
+    def __init__(self):
+        self.ranges: Dict[str, List[Tuple[int, int, str, str]]] = {}
+        # (filename, first line) -> (name, kind), ex: to match cProfile entries
+        self.functions: Dict[Tuple[str, int], Tuple[str, str]] = {}
+        for filename, name, first, last in _function_ranges(GameCoordinator):
+            # handle_command wraps every other handler, so it isn't reported
+            if name.startswith("GameCoordinator.handle_") and not name.endswith(
+                ".handle_command"
+            ):
+                self._add(filename, name, first, last, "handler")
+        for _, cls in inspect.getmembers(entities, inspect.isclass):
+            if cls.__module__ == entities.__name__:
+                for filename, name, first, last in _function_ranges(cls):
+                    self._add(filename, name, first, last, "entity")
+
+    def _add(self, filename: str, name: str, first: int, last: int, kind: str):
+        self.ranges.setdefault(filename, []).append((first, last, name, kind))
+        self.functions[(filename, first)] = (name, kind)
+
+    def lookup(self, filename: str, line: int) -> Optional[Tuple[str, str]]:
+        """(name, 'handler'|'entity'), the innermost match for nested definitions."""
+        match = None
+        for first, last, name, kind in self.ranges.get(filename, ()):
+            if first <= line <= last and (match is None or first > match[0]):
+                match = (first, name, kind)
+        return match[1:] if match else None
+
+
+def profile_script(
+    commands: Iterable[str],
+    game_factory: Callable[..., GameCoordinator] = GameCoordinator,
+) -> ProfileReport:
+    """
+    Loads a game with game_factory and runs commands through it (see HeadlessSession),
+    both under cProfile and tracemalloc.
+    """
+    commands = list(commands)
+    index = FunctionIndex()
+    profiler = cProfile.Profile()
+
+    tracemalloc.start(TRACEBACK_FRAMES)
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        session = HeadlessSession(game_factory=game_factory)
+        report = session.run_script(commands)
+    finally:
+        profiler.disable()
+        elapsed = time.perf_counter() - start
+        snapshot = tracemalloc.take_snapshot()
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    profile = ProfileReport(
+        num_commands=report.num_commands, elapsed=elapsed, peak_bytes=peak_bytes
+    )
+    groups = {"handler": profile.handlers, "entity": profile.entity_methods}
+
+    stats = pstats.Stats(profiler)
+    profile.stats = stats
+    for (filename, line, _), (_, calls, _, cumulative, _) in stats.stats.items():
+        # Exact matches only, time in nested functions is already in cumulative
+        match = index.functions.get((filename, line))
+        if match is not None:
+            name, kind = match
+            group = groups[kind].setdefault(name, GroupStats())
+            group.calls += calls
+            group.cpu_seconds += cumulative
+
+    snapshot = snapshot.filter_traces(
+        [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ]
+    )
+    for statistic in snapshot.statistics("traceback"):
+        # Charged to the innermost handler, and innermost entity method, on the stack
+        charged_kinds = set()
+        for frame in reversed(statistic.traceback):
+            match = index.lookup(frame.filename, frame.lineno)
+            if match is None or match[1] in charged_kinds:
+                continue
+            name, kind = match
+            charged_kinds.add(kind)
+            group = groups[kind].setdefault(name, GroupStats())
+            group.allocated_bytes += statistic.size
+            group.allocations += statistic.count
+    for statistic in snapshot.statistics("lineno"):
+        frame = statistic.traceback[0]
+        profile.top_sites.append(
+            (
+                f"{_short_path(frame.filename)}:{frame.lineno}",
+                statistic.size,
+                statistic.count,
+            )
+        )
+    return profile
+
+
+def _short_path(filename: str) -> str:
+    """ex: '/repo/text_quest/world.py' -> 'text_quest/world.py', 'json/encoder.py'"""
+    if filename.startswith(SOURCE_ROOT + os.sep):
+        return filename[len(SOURCE_ROOT) + 1 :]
+    return (
+        os.path.join(*filename.split(os.sep)[-2:]) if os.sep in filename else filename
+    )
+
+
+def profile_script_file(path: str, top: int = 15, pstats_path: Optional[str] = None):
+    """Profiles the commands in path (one per line) and prints the report."""
+    with open(path, mode="r", encoding="utf-8") as f:
+        profile = profile_script(f.read().splitlines())
+    print(profile.format(top=top))
+    if pstats_path:
+        profile.stats.dump_stats(pstats_path)
+        print(f"\nFull cProfile stats written to {pstats_path}")
+    return profile
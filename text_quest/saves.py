@@ -0,0 +1,648 @@
+"""
+Journaled saves.
+- SaveJournal: changes made since the last save, coalesced per entity field.
+- Snapshot/journal file helpers.
+- SaveStore: interface of where saves are kept, FileSaveStore (save_files/ directory) or
+  SqliteSaveStore (one database shared by many sessions, see SqliteSaveDatabase).
+- BackgroundSaver: writes saves on a worker thread, off the game loop.
+
+A save is a full snapshot ('<name>.json', same format as game files) plus an
+append-only journal ('<name>.<generation>.journal') of changes made after the
+snapshot, one JSON record per line:
+    [kind, entity_id, field, key, value]
+ex: ["item", "lamp", "current_location", null, "player_inventory"]
+Records of removed properties have no value, ex: ["player", null, "properties", "poisoned"]
+Saves append to the journal until it grows past compact_after records, then the
+journal is compacted into a new snapshot. Snapshots of worlds served from a WorldStore
+only hold the entities changed since the game file, see world.OverlayWorld.
+
+Every snapshot gets a new generation id (stored in the snapshot as 'generation'), and
+only the journal of that generation is replayed onto it. Journals left by an older
+snapshot are ignored, and appends to them fail with StaleSaveError, ex: when another
+session replaced the snapshot since this session last wrote it.
+
+Writes are crash safe: snapshots are written to a temporary file, fsynced and renamed
+over the old one before older journals are removed, and journal appends are fsynced.
+A crash leaves either the previous snapshot with its journal or the new snapshot with
+its own (possibly empty) journal, never a mix. Saves are written in the background
+though, so a crash loses every save not yet written: those still queued on the
+BackgroundSaver, and for SqliteSaveDatabase those batched but not yet committed.
+
+Slots come from players, so every store only accepts names matching SAVE_SLOT_PATTERN
+(ex: no path separators), see SaveStore.check_slot.
+"""
+
+from text_quest.entities import ABSENT
+from text_quest.world import (
+    AnyWorld,
+    WorldTemplate,
+    load_save_world,
+    load_world_template,
+)
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+import json
+import logging
+import os
+from pathlib import Path
+import queue
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+import uuid
+
+COMPACT_AFTER_RECORDS = 1000
+DEFAULT_PLAYER_ID = "player"
+SAVE_SLOT_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+logger = logging.getLogger(__name__)
+
+
+class StaleSaveError(Exception):
+    """The save's snapshot is not the generation the journal records were made for."""
+
+
+class InvalidSlotError(ValueError):
+    """The slot name doesn't match SAVE_SLOT_PATTERN, ex: '../game_files/escaped'."""
+
+
+def new_generation() -> str:
+    return uuid.uuid4().hex
+
+
+class SaveJournal:
+    """
+    Records entity changes (see entities.ObservableEntity) until the next save. Only
+    the latest value of each (kind, entity_id, field, key) is kept, so pending records
+    grow with the state that changed rather than the number of commands.
+    """
+
+    def __init__(self, compact_after: int = COMPACT_AFTER_RECORDS):
+        self.compact_after = compact_after
+        self.pending: Dict[Tuple[str, Optional[str], str, Any], Any] = {}
+        # Save (see SaveStore.get_save_id) and snapshot generation the journal on disk
+        # extends, None if state matches no save.
+        self.checkpoint: Optional[str] = None
+        self.generation: Optional[str] = None
+        self.records_on_disk = 0
+        # Writes to the checkpoint not known to have succeeded, see track
+        self.writes: List[Future] = []
+
+    def record(self, kind, entity_id, field, key, old_value, new_value):
+        self.pending[(kind, entity_id, field, key)] = new_value
+
+    def reset(
+        self,
+        checkpoint=None,
+        generation: Optional[str] = None,
+        records_on_disk: int = 0,
+    ):
+        """Called after loads, restarts and snapshots, once disk and memory agree."""
+        self.pending.clear()
+        self.checkpoint = str(checkpoint) if checkpoint else None
+        self.generation = generation
+        self.records_on_disk = records_on_disk
+        self.writes = []
+
+    def track(self, future: Future):
+        """Keeps a snapshot or journal write of the checkpoint, see needs_snapshot."""
+        self.writes.append(future)
+
+    def needs_snapshot(self, save_id) -> bool:
+        """
+        True unless the changes can be appended to the checkpoint's journal. Once a
+        write to the checkpoint fails (ex: StaleSaveError) the changes it held are
+        only on disk again after a full snapshot.
+        """
+        self.writes = [
+            future
+            for future in self.writes
+            if not future.done() or future.exception() is not None
+        ]
+        return (
+            self.checkpoint != str(save_id)
+            # Saves from before generations were recorded, rewritten in the new format
+            or self.generation is None
+            or self.records_on_disk + len(self.pending) > self.compact_after
+            or any(future.done() for future in self.writes)
+        )
+
+    def drain(self) -> List[list]:
+        """Returns pending changes as journal records and clears them."""
+        records = [
+            (
+                [kind, entity_id, field, key]
+                if value is ABSENT
+                else [kind, entity_id, field, key, value]
+            )
+            for (kind, entity_id, field, key), value in self.pending.items()
+        ]
+        self.pending.clear()
+        return records
+
+
+def get_journal_path(snapshot_path, generation: Optional[str]) -> Path:
+    """ex: 'SLOT1.json', '3f2a...' -> 'SLOT1.3f2a....journal', None -> 'SLOT1.journal'"""
+    suffix = f".{generation}.journal" if generation else ".journal"
+    return Path(snapshot_path).with_suffix(suffix)
+
+
+def _iter_journal_paths(snapshot_path) -> Iterator[Path]:
+    """Journals of every generation of the snapshot, including legacy ones."""
+    snapshot_path = Path(snapshot_path)
+    legacy_path = get_journal_path(snapshot_path, None)
+    if legacy_path.exists():
+        yield legacy_path
+    for path in snapshot_path.parent.glob(f"{snapshot_path.stem}.*.journal"):
+        generation = path.name[len(snapshot_path.stem) + 1 : -len(".journal")]
+        if len(generation) == 32 and all(c in "0123456789abcdef" for c in generation):
+            yield path
+
+
+def _fsync_dir(dir_path):
+    """Makes a rename or removal in dir_path durable (not supported on Windows)."""
+    if os.name != "posix":
+        return
+    dir_fd = os.open(dir_path, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+def write_snapshot(snapshot_path, game_state: dict) -> int:
+    """
+    Writes game_state (with its 'generation') as compact JSON, next to an empty journal
+    for the generation. Returns bytes written. Journals of older generations are only
+    removed once the new snapshot is in place, until then they still belong to the
+    snapshot on disk, and afterwards they are ignored.
+    """
+    snapshot_path = Path(snapshot_path)
+    temp_path = snapshot_path.with_suffix(f".{os.getpid()}.tmp")
+    journal_path = get_journal_path(snapshot_path, game_state["generation"])
+    data = json.dumps(game_state, separators=(",", ":"))
+    try:
+        with open(temp_path, mode="w", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        with open(journal_path, mode="wb") as f:
+            os.fsync(f.fileno())
+        os.replace(temp_path, snapshot_path)
+    except BaseException:
+        if journal_path.exists():
+            os.remove(journal_path)
+        raise
+    finally:
+        if temp_path.exists():
+            os.remove(temp_path)
+    _fsync_dir(snapshot_path.parent)
+    for stale_path in _iter_journal_paths(snapshot_path):
+        if stale_path != journal_path:
+            os.remove(stale_path)
+    return len(data)
+
+
+def append_journal(snapshot_path, records: List[list], generation: str) -> int:
+    """
+    Appends records to the journal of the snapshot's generation. Returns bytes written.
+    Raises StaleSaveError if that journal is gone, ie: the snapshot was replaced.
+    """
+    data = "".join(
+        json.dumps(record, separators=(",", ":")) + "\n" for record in records
+    ).encode("utf-8")
+    try:
+        f = open(get_journal_path(snapshot_path, generation), mode="r+b")
+    except FileNotFoundError:
+        raise StaleSaveError(
+            f"{snapshot_path} was replaced since generation {generation}"
+        ) from None
+    with f:
+        f.seek(0, os.SEEK_END)
+        # Terminate a torn line left by a crash, so it doesn't swallow the next record
+        if f.tell() > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                data = b"\n" + data
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    return len(data)
+
+
+def read_journal(snapshot_path, generation: Optional[str]) -> List[list]:
+    """
+    Returns every complete record in the journal of the snapshot's generation. A torn
+    final line (ex: crash mid-append) is skipped.
+    """
+    journal_path = get_journal_path(snapshot_path, generation)
+    if not journal_path.exists():
+        return []
+
+    records = []
+    with open(journal_path, mode="r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                logger.warning(
+                    "Skipping journal record %s:%s", journal_path, line_number
+                )
+    return records
+
+
+class BackgroundSaver:
+    """
+    Runs save writes on one worker thread, in the order they were submitted, so a
+    command never waits on serialization or disk I/O. Shared by every session in the
+    process (see background_saver).
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        self.executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="text_quest-save"
+        )
+        self.pending: Set[Future] = set()
+        self.lock = threading.Lock()
+
+    def submit(self, func: Callable, *args) -> Future:
+        future = self.executor.submit(func, *args)
+        with self.lock:
+            self.pending.add(future)
+        future.add_done_callback(self._discard)
+        return future
+
+    def _discard(self, future: Future):
+        with self.lock:
+            self.pending.discard(future)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Waits for every save submitted so far, False if timeout expired first."""
+        with self.lock:
+            futures = list(self.pending)
+        _, not_done = wait(futures, timeout=timeout)
+        return not not_done
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+background_saver = BackgroundSaver()
+
+
+class SaveStore(ABC):
+    """
+    Where saves are kept. A save is identified by its slot (the name given to the save
+    and load commands) and holds a snapshot plus a journal of later changes.
+    Stores call check_slot on every slot they are given.
+    """
+
+    @staticmethod
+    def check_slot(slot: str) -> str:
+        """Returns slot, raises InvalidSlotError unless it matches SAVE_SLOT_PATTERN."""
+        if not isinstance(slot, str) or not SAVE_SLOT_PATTERN.fullmatch(slot):
+            raise InvalidSlotError(
+                f"Invalid save name '{slot}', use up to 64 letters, digits, '_' or '-'"
+            )
+        return slot
+
+    @abstractmethod
+    def get_save_id(self, slot: str) -> str:
+        """Identifies the save across stores, ex: for SaveJournal.checkpoint."""
+
+    @abstractmethod
+    def read(self, slot: str) -> Tuple[AnyWorld, List[list]]:
+        """
+        Snapshot and the journal records of its generation (see AnyWorld.generation)
+        of the save in slot.
+        """
+
+    @abstractmethod
+    def get_size(self, slot: str) -> int:
+        """Bytes held by the save in slot, snapshot and journal."""
+
+    @abstractmethod
+    def write_snapshot(self, slot: str, game_state: dict) -> int:
+        """
+        Replaces the save in slot with game_state, which holds the new snapshot's
+        'generation'. Returns bytes written.
+        """
+
+    @abstractmethod
+    def append_journal(self, slot: str, records: List[list], generation: str) -> int:
+        """
+        Adds records to the save in slot. Returns bytes written. Raises StaleSaveError
+        if the snapshot in slot is no longer of generation.
+        """
+
+    @abstractmethod
+    def list_slots(self) -> List[str]:
+        """Slots holding a save, ex: ['PROT01', 'SLOT1']."""
+
+
+class FileSaveStore(SaveStore):
+    """Saves as '<slot>.json' snapshots and '<slot>.<generation>.journal' files in save_dir."""
+
+    def __init__(self, save_dir):
+        self.save_dir = Path(save_dir)
+
+    def get_snapshot_path(self, slot: str) -> Path:
+        return self.save_dir / f"{self.check_slot(slot)}.json"
+
+    def get_save_id(self, slot: str) -> str:
+        return str(self.get_snapshot_path(slot))
+
+    def read(self, slot: str) -> Tuple[AnyWorld, List[list]]:
+        snapshot_path = self.get_snapshot_path(slot)
+        world = load_save_world(load_world_template(snapshot_path))
+        return world, read_journal(snapshot_path, world.generation)
+
+    def get_size(self, slot: str) -> int:
+        snapshot_path = self.get_snapshot_path(slot)
+        size = snapshot_path.stat().st_size
+        for journal_path in _iter_journal_paths(snapshot_path):
+            size += journal_path.stat().st_size
+        return size
+
+    def write_snapshot(self, slot: str, game_state: dict) -> int:
+        snapshot_path = self.get_snapshot_path(slot)
+        # ex: a player's own directory, see server.get_player_save_store
+        self.save_dir.mkdir(parents=True, exist_ok=True)
+        return write_snapshot(snapshot_path, game_state)
+
+    def append_journal(self, slot: str, records: List[list], generation: str) -> int:
+        return append_journal(self.get_snapshot_path(slot), records, generation)
+
+    def list_slots(self) -> List[str]:
+        return sorted(path.stem for path in self.save_dir.glob("*.json"))
+
+
+SAVE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS saves (
+    player_id TEXT NOT NULL,
+    slot TEXT NOT NULL,
+    snapshot TEXT NOT NULL,
+    saved_at REAL NOT NULL,
+    generation TEXT,
+    PRIMARY KEY (player_id, slot)
+);
+CREATE TABLE IF NOT EXISTS journal (
+    id INTEGER PRIMARY KEY,
+    player_id TEXT NOT NULL,
+    slot TEXT NOT NULL,
+    record TEXT NOT NULL,
+    generation TEXT
+);
+CREATE INDEX IF NOT EXISTS journal_by_save ON journal (player_id, slot, id);
+"""
+# Columns added since the first schema, added to existing databases on open
+SAVE_SCHEMA_COLUMNS = [("saves", "generation TEXT"), ("journal", "generation TEXT")]
+
+
+class SqliteConnectionPool:
+    """
+    Reusable connections to one SQLite database in WAL mode, so readers never wait on
+    the writer. Up to max_connections are opened, acquire() blocks once all are in use.
+    """
+
+    def __init__(self, db_path, max_connections: int = 4, timeout: float = 30.0):
+        self.db_path = str(db_path)
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self.num_connections = 0
+        self.lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(
+            self.db_path, timeout=self.timeout, check_same_thread=False
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        # WAL keeps the database consistent on power loss, at worst the last
+        # transactions are lost
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    @contextmanager
+    def acquire(self) -> Iterator[sqlite3.Connection]:
+        try:
+            connection = self.idle.get_nowait()
+        except queue.Empty:
+            with self.lock:
+                can_open = self.num_connections < self.max_connections
+                if can_open:
+                    self.num_connections += 1
+            if can_open:
+                connection = self._connect()
+            else:
+                connection = self.idle.get(timeout=self.timeout)
+        try:
+            yield connection
+        finally:
+            self.idle.put(connection)
+
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                break
+            self.num_connections -= 1
+
+
+class SqliteSaveDatabase:
+    """
+    Saves of every player in one SQLite database, indexed by (player_id, slot).
+    Sessions get their own SqliteSaveStore through get_store(player_id).
+
+    Writes from all sessions are queued and committed together in one transaction once
+    max_batch writes are pending or the oldest has waited batch_delay seconds (checked
+    on every write, and by flush() which servers can call on a timer). With the default
+    batch_delay=0 every write is committed immediately. Reads flush first, so a session
+    always sees its own saves. Batches are committed one at a time, in the order their
+    writes were queued.
+    """
+
+    def __init__(
+        self,
+        db_path,
+        max_connections: int = 4,
+        max_batch: int = 256,
+        batch_delay: float = 0.0,
+    ):
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        self.db_path = str(db_path)
+        self.pool = SqliteConnectionPool(db_path, max_connections=max_connections)
+        self.max_batch = max_batch
+        self.batch_delay = batch_delay
+        # Queued writes, (statement, parameters) in the order they were made
+        self.pending: List[Tuple[str, tuple]] = []
+        self.oldest_pending_at = 0.0
+        self.lock = threading.Lock()
+        # Held from taking a batch until it is committed, see flush
+        self.commit_lock = threading.Lock()
+        # (player_id, slot) -> generation of the latest snapshot written or read by
+        # this process, so appends are checked without a query
+        self.generations: Dict[Tuple[str, str], Optional[str]] = {}
+        with self.pool.acquire() as connection:
+            connection.executescript(SAVE_SCHEMA)
+            for table, column in SAVE_SCHEMA_COLUMNS:
+                columns = [
+                    row[1] for row in connection.execute(f"PRAGMA table_info({table})")
+                ]
+                if column.split(" ")[0] not in columns:
+                    connection.execute(f"ALTER TABLE {table} ADD COLUMN {column}")
+
+    def get_store(self, player_id: str = DEFAULT_PLAYER_ID) -> "SqliteSaveStore":
+        return SqliteSaveStore(self, player_id)
+
+    def queue_writes(self, writes: List[Tuple[str, tuple]]):
+        with self.lock:
+            if not self.pending:
+                self.oldest_pending_at = time.monotonic()
+            self.pending.extend(writes)
+            should_flush = (
+                len(self.pending) >= self.max_batch
+                or time.monotonic() - self.oldest_pending_at >= self.batch_delay
+            )
+        if should_flush:
+            self.flush()
+
+    def flush(self) -> int:
+        """Commits every queued write in one transaction. Returns the number written."""
+        # A batch taken later can't commit before an earlier one, ex: a journal insert
+        # before the snapshot that clears the journal
+        with self.commit_lock:
+            with self.lock:
+                writes, self.pending = self.pending, []
+            if not writes:
+                return 0
+            with self.pool.acquire() as connection:
+                with connection:
+                    for statement, parameters in writes:
+                        connection.execute(statement, parameters)
+        self.logger.debug("Committed %s save writes", len(writes))
+        return len(writes)
+
+    def get_generation(self, player_id: str, slot: str) -> Optional[str]:
+        key = (player_id, slot)
+        if key not in self.generations:
+            rows = self.query(
+                "SELECT generation FROM saves WHERE player_id = ? AND slot = ?", key
+            )
+            self.generations[key] = rows[0][0] if rows else None
+        return self.generations[key]
+
+    def query(self, statement: str, parameters: tuple = ()) -> List[tuple]:
+        self.flush()
+        with self.pool.acquire() as connection:
+            return connection.execute(statement, parameters).fetchall()
+
+    def close(self):
+        self.flush()
+        self.pool.close()
+
+
+class SqliteSaveStore(SaveStore):
+    """One player's saves in a SqliteSaveDatabase."""
+
+    def __init__(
+        self, database: SqliteSaveDatabase, player_id: str = DEFAULT_PLAYER_ID
+    ):
+        self.database = database
+        self.player_id = player_id
+
+    def get_save_id(self, slot: str) -> str:
+        return (
+            f"sqlite:{self.database.db_path}#{self.player_id}/{self.check_slot(slot)}"
+        )
+
+    def read(self, slot: str) -> Tuple[AnyWorld, List[list]]:
+        self.check_slot(slot)
+        rows = self.database.query(
+            "SELECT snapshot, generation FROM saves WHERE player_id = ? AND slot = ?",
+            (self.player_id, slot),
+        )
+        if not rows:
+            raise FileNotFoundError(f"No save '{slot}' for player '{self.player_id}'")
+        snapshot, generation = rows[0]
+        self.database.generations[(self.player_id, slot)] = generation
+        records = [
+            json.loads(record)
+            for (record,) in self.database.query(
+                "SELECT record FROM journal WHERE player_id = ? AND slot = ? "
+                "AND generation IS ? ORDER BY id",
+                (self.player_id, slot, generation),
+            )
+        ]
+        world = load_save_world(
+            WorldTemplate(game_data=json.loads(snapshot), source=self.get_save_id(slot))
+        )
+        return world, records
+
+    def get_size(self, slot: str) -> int:
+        self.check_slot(slot)
+        rows = self.database.query(
+            "SELECT length(snapshot) + (SELECT COALESCE(SUM(length(record)), 0) "
+            "FROM journal WHERE player_id = ? AND slot = ?) "
+            "FROM saves WHERE player_id = ? AND slot = ?",
+            (self.player_id, slot, self.player_id, slot),
+        )
+        return rows[0][0] if rows else 0
+
+    def write_snapshot(self, slot: str, game_state: dict) -> int:
+        self.check_slot(slot)
+        generation = game_state["generation"]
+        data = json.dumps(game_state, separators=(",", ":"))
+        self.database.generations[(self.player_id, slot)] = generation
+        self.database.queue_writes(
+            [
+                (
+                    "INSERT OR REPLACE INTO saves "
+                    "(player_id, slot, snapshot, saved_at, generation) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (self.player_id, slot, data, time.time(), generation),
+                ),
+                (
+                    "DELETE FROM journal WHERE player_id = ? AND slot = ? "
+                    "AND generation IS NOT ?",
+                    (self.player_id, slot, generation),
+                ),
+            ]
+        )
+        return len(data)
+
+    def append_journal(self, slot: str, records: List[list], generation: str) -> int:
+        self.check_slot(slot)
+        if self.database.get_generation(self.player_id, slot) != generation:
+            raise StaleSaveError(
+                f"{self.get_save_id(slot)} was replaced since generation {generation}"
+            )
+        rows = [json.dumps(record, separators=(",", ":")) for record in records]
+        # Skipped if another process replaced the snapshot since, ignored on read
+        self.database.queue_writes(
+            [
+                (
+                    "INSERT INTO journal (player_id, slot, record, generation) "
+                    "SELECT ?, ?, ?, ? WHERE EXISTS (SELECT 1 FROM saves "
+                    "WHERE player_id = ? AND slot = ? AND generation = ?)",
+                    (self.player_id, slot, row, generation)
+                    + (self.player_id, slot, generation),
+                )
+                for row in rows
+            ]
+        )
+        return sum(len(row) for row in rows)
+
+    def list_slots(self) -> List[str]:
+        return [
+            slot
+            for (slot,) in self.database.query(
+                "SELECT slot FROM saves WHERE player_id = ? ORDER BY slot",
+                (self.player_id,),
+            )
+        ]
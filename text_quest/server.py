@@ -0,0 +1,495 @@
+"""
+Asyncio game server.
+- GameServer: hosts one HeadlessSession per connection over TCP or a Unix socket.
+- LatencyRecorder: per-command latency samples and percentiles.
+- PreforkServer: forks GameServer workers from a warm parent process, see warm_up.
+- get_player_save_store: where a player's saves are kept.
+
+Usage:
+    python -m text_quest.server --port 8023
+    python -m text_quest.server --unix /tmp/text_quest.sock
+    python -m text_quest.server --save-db save_files/saves.sqlite --save-batch-ms 20
+    python -m text_quest.server --metrics-file /var/lib/node_exporter/text_quest.prom
+    python -m text_quest.server --port 8023 --workers 4
+"""
+
+from text_quest.config import BASE_DIR, TUTORIAL_GAME_FILENAME
+from text_quest.core import PROMPT, GameCoordinator
+from text_quest.headless import HeadlessSession
+from text_quest.logger_config import setup_logging, stop_logging
+from text_quest.metrics import metrics
+from text_quest.output import BufferSink, OutputSink
+from text_quest.saves import (
+    FileSaveStore,
+    SaveStore,
+    SqliteSaveDatabase,
+    background_saver,
+)
+from text_quest.world import load_world_template
+import argparse
+import asyncio
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+import gc
+import logging
+import os
+from pathlib import Path
+import signal
+import socket
+import stat
+import threading
+import time
+from logging.handlers import QueueListener
+from typing import Callable, Deque, Dict, Optional
+import uuid
+
+
+class LatencyRecorder:
+    """Keeps the most recent latency samples (in seconds) for each command verb."""
+
+    def __init__(self, max_samples: int = 10000):
+        self.max_samples = max_samples
+        self.samples: Dict[str, Deque[float]] = defaultdict(
+            lambda: deque(maxlen=self.max_samples)
+        )
+        self.counts: Dict[str, int] = defaultdict(int)
+
+    def record(self, command: str, elapsed: float):
+        verb = command.split(" ", 1)[0].strip() or "<blank>"
+        self.samples[verb].append(elapsed)
+        self.counts[verb] += 1
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Example return ->
+        {'move': {'count': 12, 'p50_ms': 0.04, 'p95_ms': 0.09, 'p99_ms': 0.11, 'max_ms': 0.12}}
+        """
+        summary = {}
+        for verb, samples in self.samples.items():
+            ordered = sorted(samples)
+            summary[verb] = {
+                "count": self.counts[verb],
+                "p50_ms": _percentile(ordered, 0.50) * 1000,
+                "p95_ms": _percentile(ordered, 0.95) * 1000,
+                "p99_ms": _percentile(ordered, 0.99) * 1000,
+                "max_ms": ordered[-1] * 1000,
+            }
+        return summary
+
+
+def _percentile(ordered_samples, fraction: float) -> float:
+    index = min(len(ordered_samples) - 1, int(len(ordered_samples) * fraction))
+    return ordered_samples[index]
+
+
+class GameServer:
+    """
+    Each connection gets its own game session. Commands are line based and every
+    response is followed by the game prompt. Sessions never block on input() or
+    exit the process, so one player quitting or restarting leaves the others running.
+    Each session is built and runs its commands on its own thread, in order, so a slow
+    command (ex: a load waiting on the disk) only delays that player, never the loop.
+    """
+
+    def __init__(
+        self, session_factory: Callable[[], HeadlessSession] = HeadlessSession
+    ):
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        self.session_factory = session_factory
+        self.latency = LatencyRecorder()
+        self.active_sessions = 0
+        self.total_sessions = 0
+        self.server: Optional[asyncio.AbstractServer] = None
+        # Game file sessions start from, loaded by start before the first connection
+        self.game_filename = TUTORIAL_GAME_FILENAME
+        self.base_dir: Optional[str] = None
+        # Shared by every session when saves go to a database, see flush_saves_every
+        self.save_database: Optional[SqliteSaveDatabase] = None
+        # Prometheus text file rewritten every metrics_interval seconds, if set
+        self.metrics_file: Optional[str] = None
+        self.metrics_interval = 15.0
+        # Writes this process's queued log records, see logger_config.setup_logging
+        self.log_listener: Optional[QueueListener] = None
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="session")
+        self.active_sessions += 1
+        self.total_sessions += 1
+        try:
+            session = await loop.run_in_executor(executor, self.session_factory)
+            writer.write((session.intro + PROMPT).encode("utf-8"))
+            await writer.drain()
+            while not session.finished:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode("utf-8", errors="replace").rstrip("\r\n")
+                start = time.perf_counter()
+                output = await loop.run_in_executor(executor, session.execute, command)
+                self.latency.record(command, time.perf_counter() - start)
+                if not session.finished and not session.awaiting_confirmation:
+                    output += PROMPT
+                writer.write(output.encode("utf-8"))
+                await writer.drain()
+        except ConnectionError as e:
+            self.logger.info("Connection lost: %s", e)
+        finally:
+            # A command still running finishes on its thread, the loop doesn't wait
+            executor.shutdown(wait=False)
+            self.active_sessions -= 1
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def start(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8023,
+        unix_path: Optional[str] = None,
+        sock: Optional[socket.socket] = None,
+    ) -> asyncio.AbstractServer:
+        """sock: already listening socket to accept from, ex: one shared by workers."""
+        # Parsed (or indexed) now rather than by the first session, which would wait on it
+        game_file = Path(self.base_dir or BASE_DIR) / "game_files"
+        load_world_template(game_file / f"{self.game_filename}.json", use_sidecar=True)
+        if sock is not None:
+            self.server = await asyncio.start_server(self.handle_connection, sock=sock)
+        elif unix_path:
+            self.server = await asyncio.start_unix_server(
+                self.handle_connection, path=unix_path
+            )
+        else:
+            self.server = await asyncio.start_server(
+                self.handle_connection, host=host, port=port
+            )
+        self.logger.info(
+            "GameServer listening on %s",
+            [s.getsockname() for s in self.server.sockets],
+        )
+        return self.server
+
+    async def serve_forever(self, **start_kwargs):
+        server = await self.start(**start_kwargs)
+        tasks = []
+        if self.save_database is not None and self.save_database.batch_delay > 0:
+            tasks.append(
+                asyncio.create_task(
+                    self.flush_saves_every(self.save_database.batch_delay)
+                )
+            )
+        if self.metrics_file:
+            tasks.append(
+                asyncio.create_task(self.write_metrics_every(self.metrics_interval))
+            )
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def flush_saves_every(self, interval: float):
+        """
+        Commits saves queued by all sessions together, see SqliteSaveDatabase. Commits
+        run on the saver's thread after the writes queued before them, not on the loop.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            await asyncio.wrap_future(background_saver.submit(self.save_database.flush))
+
+    async def write_metrics_every(self, interval: float):
+        """Dumps metrics for a local agent to scrape, see MetricsRegistry.write_prometheus."""
+        while True:
+            await asyncio.sleep(interval)
+            self.write_metrics()
+
+    def write_metrics(self):
+        try:
+            metrics.write_prometheus(self.metrics_file)
+        except OSError as e:
+            self.logger.error("Unable to write metrics to %s: %s", self.metrics_file, e)
+
+    def log_latency_summary(self):
+        for verb, stats in sorted(self.latency.summary().items()):
+            self.logger.info("%s: %s", verb, stats)
+
+    def shutdown(self):
+        """Writes out pending saves and metrics, call once the server has stopped."""
+        self.log_latency_summary()
+        background_saver.flush()
+        if self.metrics_file:
+            self.write_metrics()
+        if self.save_database is not None:
+            self.save_database.close()
+        # Workers exit without running atexit handlers, see PreforkServer.spawn_worker
+        stop_logging(self.log_listener)
+
+
+def warm_up(filename: str = TUTORIAL_GAME_FILENAME, base_dir: Optional[str] = None):
+    """
+    Imports, parses and builds the game once in this process, so processes forked from
+    it afterwards start sessions from the cached WorldTemplate (see world.py) instead of
+    the game file. Everything allocated so far is moved out of the garbage collector's
+    reach (gc.freeze), so collections in the children don't write to, and copy, the
+    pages they share with this process. Returns the seconds taken.
+    """
+    start = time.perf_counter()
+    GameCoordinator(filename=filename, base_dir=base_dir, output=BufferSink())
+    # Workers should only report their own loads
+    metrics.clear()
+    gc.collect()
+    gc.freeze()
+    return time.perf_counter() - start
+
+
+class PreforkServer:
+    """
+    Binds the listening socket once and forks num_workers processes that each run a
+    GameServer (from server_factory(worker_index)) on it, every connection is accepted
+    by one of them. Call warm_up first so workers share the parsed world copy-on-write
+    and a new session costs a GameCoordinator built from the template, with no imports
+    or parsing. Workers that exit are replaced until stop() is called.
+    NOTE: workers are plain forks, so no threads may be running when they are started
+    (ex: start logging without a queue, see main), spawn_worker raises otherwise.
+    """
+
+    def __init__(
+        self,
+        server_factory: Callable[[int], GameServer] = lambda worker: GameServer(),
+        num_workers: int = 2,
+    ):
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        self.server_factory = server_factory
+        self.num_workers = num_workers
+        # pid -> worker index
+        self.workers: Dict[int, int] = {}
+        self.sock: Optional[socket.socket] = None
+        self.stopping = False
+        self.restart_delay = 1.0
+
+    def bind(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8023,
+        unix_path: Optional[str] = None,
+    ) -> socket.socket:
+        if unix_path:
+            try:
+                if stat.S_ISSOCK(os.stat(unix_path).st_mode):
+                    os.unlink(unix_path)
+            except FileNotFoundError:
+                pass
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.bind(unix_path)
+            self.sock.listen(socket.SOMAXCONN)
+        else:
+            self.sock = socket.create_server((host, port), backlog=socket.SOMAXCONN)
+        self.sock.setblocking(False)
+        self.logger.info("PreforkServer listening on %s", self.sock.getsockname())
+        return self.sock
+
+    def start(self):
+        for worker in range(self.num_workers):
+            self.spawn_worker(worker)
+
+    def spawn_worker(self, worker: int) -> int:
+        # A child only gets the forking thread, locks held by the others stay locked
+        if threading.active_count() != 1:
+            raise RuntimeError(
+                f"Can't fork worker {worker}, threads are running: "
+                f"{[thread.name for thread in threading.enumerate()]}"
+            )
+        pid = os.fork()
+        if pid == 0:
+            status = 0
+            try:
+                self.run_worker(worker)
+            except BaseException:
+                self.logger.exception("Worker %s failed", worker)
+                status = 1
+            finally:
+                logging.shutdown()
+                # Skips the parent's cleanup (atexit, finally blocks) in the child
+                os._exit(status)
+        self.workers[pid] = worker
+        self.logger.info("Started worker %s (pid %s)", worker, pid)
+        return pid
+
+    def run_worker(self, worker: int):
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        game_server = self.server_factory(worker)
+
+        async def serve():
+            asyncio.get_running_loop().add_signal_handler(
+                signal.SIGTERM, asyncio.current_task().cancel
+            )
+            await game_server.serve_forever(sock=self.sock)
+
+        try:
+            asyncio.run(serve())
+        except (asyncio.CancelledError, KeyboardInterrupt):
+            pass
+        finally:
+            game_server.shutdown()
+
+    def supervise(self):
+        """Waits on the workers, restarting any that exit until stop() is called."""
+        while self.workers:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            worker = self.workers.pop(pid, None)
+            if worker is None or self.stopping:
+                continue
+            self.logger.warning(
+                "Worker %s (pid %s) exited with status %s, restarting",
+                worker,
+                pid,
+                os.waitstatus_to_exitcode(status),
+            )
+            time.sleep(self.restart_delay)
+            if not self.stopping:
+                self.spawn_worker(worker)
+        self.workers.clear()
+
+    def stop(self, *_):
+        """Asks every worker to finish, usable as a signal handler."""
+        self.stopping = True
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self, **bind_kwargs):
+        """Binds, starts the workers and supervises them until SIGINT or SIGTERM."""
+        self.bind(**bind_kwargs)
+        self.start()
+        previous_handlers = {
+            signum: signal.signal(signum, self.stop)
+            for signum in (signal.SIGINT, signal.SIGTERM)
+        }
+        try:
+            self.supervise()
+        finally:
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+            self.stop()
+            self.supervise()
+            self.sock.close()
+
+
+def get_player_save_store(
+    player_id: str,
+    save_database: Optional[SqliteSaveDatabase] = None,
+    base_dir: Optional[str] = None,
+) -> SaveStore:
+    """
+    Saves of player_id only, in save_database or else their own directory under
+    save_files/, so players can't read or overwrite each other's slots.
+    """
+    if save_database is not None:
+        return save_database.get_store(player_id)
+    return FileSaveStore(Path(base_dir or BASE_DIR) / "save_files" / player_id)
+
+
+def get_worker_path(file_path: str, worker: int) -> str:
+    """ex: ('metrics/text_quest.prom', 2) -> 'metrics/text_quest.worker2.prom'"""
+    path = Path(file_path)
+    return str(path.with_name(f"{path.stem}.worker{worker}{path.suffix}"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host text_quest sessions.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8023)
+    parser.add_argument("--unix", dest="unix_path", default=None)
+    parser.add_argument("--save-db", default=None, help="SQLite database for saves")
+    parser.add_argument(
+        "--save-batch-ms",
+        type=float,
+        default=0,
+        help="commit saves from all sessions together at most this often",
+    )
+    parser.add_argument(
+        "--metrics-file", default=None, help="Prometheus text file to write metrics to"
+    )
+    parser.add_argument("--metrics-interval", type=float, default=15.0)
+    parser.add_argument(
+        "--admin", action="store_true", help="allow players to use admin commands"
+    )
+    parser.add_argument("--log-file", default="logs/text_quest_server.log")
+    parser.add_argument(
+        "--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"]
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="fork this many worker processes from a warm world (0: serve in-process)",
+    )
+    args = parser.parse_args()
+
+    log_kwargs = {"log_level": args.log_level, "log_file": args.log_file}
+    # No listener thread in a parent that forks, workers start their own after the fork
+    log_listener = setup_logging(use_queue=args.workers == 0, **log_kwargs)
+
+    def game_server_factory(worker: Optional[int] = None) -> GameServer:
+        game_server = GameServer()
+        game_server.log_listener = log_listener
+        if worker is not None:
+            game_server.log_listener = setup_logging(**log_kwargs)
+        game_server.metrics_file = args.metrics_file
+        game_server.metrics_interval = args.metrics_interval
+        if worker is not None and args.metrics_file:
+            # One file per worker, told apart by a worker label
+            game_server.metrics_file = get_worker_path(args.metrics_file, worker)
+            metrics.const_labels = (("worker", str(worker)),)
+        save_database = None
+        if args.save_db:
+            # Opened in each worker, SQLite connections can't be shared across a fork
+            save_database = SqliteSaveDatabase(
+                args.save_db, batch_delay=args.save_batch_ms / 1000
+            )
+            game_server.save_database = save_database
+
+        def game_factory(player_id: str, output: OutputSink) -> GameCoordinator:
+            save_store = get_player_save_store(player_id, save_database)
+            return GameCoordinator(
+                save_store=save_store, admin=args.admin, output=output
+            )
+
+        def session_factory() -> HeadlessSession:
+            # NOTE: each connection is its own player until connections are authenticated
+            player_id = uuid.uuid4().hex
+            return HeadlessSession(
+                game_factory=lambda output: game_factory(player_id, output)
+            )
+
+        game_server.session_factory = session_factory
+        return game_server
+
+    bind_kwargs = {"host": args.host, "port": args.port, "unix_path": args.unix_path}
+    if args.workers > 0:
+        logging.getLogger(__name__).info("Warmed up in %.1fms", warm_up() * 1000)
+        PreforkServer(game_server_factory, num_workers=args.workers).run(**bind_kwargs)
+        return
+
+    game_server = game_server_factory()
+    try:
+        asyncio.run(game_server.serve_forever(**bind_kwargs))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        game_server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
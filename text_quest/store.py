@@ -0,0 +1,399 @@
+"""
+SQLite indexed worlds, for game files too large to parse into memory.
+- WorldStore: same read-only interface as WorldTemplate, but entity data is read from
+  an index database when first needed.
+- build_world_index: streams a game file into an index database.
+- JsonStreamReader: reads a JSON document one value at a time.
+
+The index is built once per game file version and reused by every later process, so
+startup cost and memory depend on the entities a session touches, not the world size.
+"""
+
+from collections import OrderedDict
+from collections.abc import ItemsView
+import json
+import logging
+import os
+from pathlib import Path
+import sqlite3
+import threading
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, Mapping, Optional, Tuple
+
+# Bump when the index schema changes so stale indexes are rebuilt.
+STORE_FORMAT_VERSION = 1
+READ_CHUNK_CHARS = 1 << 20
+INSERT_BATCH_SIZE = 10000
+# Decoded rows kept per table, shared by every session using the store
+MAX_CACHED_ROWS = 4096
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE rooms (id TEXT PRIMARY KEY, data TEXT NOT NULL);
+CREATE TABLE items (id TEXT PRIMARY KEY, location TEXT NOT NULL, data TEXT NOT NULL);
+"""
+# Created after the bulk insert, which is faster than maintaining it row by row
+LOCATION_INDEX = "CREATE INDEX items_by_location ON items (location)"
+
+
+logger = logging.getLogger(__name__)
+
+
+class JsonStreamReader:
+    """
+    Reads a JSON document from a text file without loading all of it, ex:
+        for section in reader.iter_members():  # top level object
+            for room_id, room_data, room_text in reader.iter_entries():  # 'rooms' object
+                ...
+    The caller must read each member's value (read_value, iter_members or
+    iter_entries) before asking for the next key.
+    """
+
+    decoder = json.JSONDecoder()
+
+    def __init__(self, f):
+        self.f = f
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        """Appends the next chunk to the unread part of the buffer, False at end of file."""
+        chunk = self.f.read(READ_CHUNK_CHARS)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def _skip_whitespace(self):
+        while True:
+            buffer = self.buffer
+            while self.pos < len(buffer) and buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(buffer) or not self._fill():
+                return
+
+    def peek_char(self) -> str:
+        self._skip_whitespace()
+        return self.buffer[self.pos] if self.pos < len(self.buffer) else ""
+
+    def read_char(self) -> str:
+        char = self.peek_char()
+        if not char:
+            raise ValueError("Unexpected end of JSON document")
+        self.pos += 1
+        return char
+
+    def read_value(self) -> Any:
+        return self.read_value_and_text()[0]
+
+    def read_value_and_text(self) -> Tuple[Any, str]:
+        """The next value, and its JSON text as it appears in the file."""
+        self._skip_whitespace()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                # Value continues in the next chunk
+                if self._fill():
+                    continue
+                raise
+            # A number ending the buffer may also continue in the next chunk
+            if end == len(self.buffer) and not self.eof and self._fill():
+                continue
+            text = self.buffer[self.pos : end]
+            self.pos = end
+            return value, text
+
+    def iter_members(self) -> Iterator[str]:
+        """Yields the keys of the object starting at the current position."""
+        if self.read_char() != "{":
+            raise ValueError("Expected a JSON object")
+        if self.peek_char() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.read_value()
+            if self.read_char() != ":":
+                raise ValueError(f"Expected ':' after {key!r}")
+            yield key
+            separator = self.read_char()
+            if separator == "}":
+                return
+            if separator != ",":
+                raise ValueError(f"Expected ',' or '}}' after {key!r}")
+
+    def iter_entries(self) -> Iterator[Tuple[str, Any, str]]:
+        """
+        Yields the (key, value, value's JSON text) members of the object starting at
+        the current position.
+        """
+        for key in self.iter_members():
+            yield (key, *self.read_value_and_text())
+
+
+def _encode(data) -> str:
+    return json.dumps(data, separators=(",", ":"))
+
+
+def build_world_index(file_path, index_path, stamp: Tuple[int, int]):
+    """
+    Streams the game file at file_path into a new index database. The index is built
+    in a temporary file and renamed into place, so readers never see a partial index.
+    """
+    index_path = Path(index_path)
+    temp_path = index_path.with_suffix(f".{os.getpid()}.tmp")
+    if temp_path.exists():
+        os.remove(temp_path)
+
+    connection = sqlite3.connect(temp_path)
+    try:
+        connection.executescript(SCHEMA)
+        with open(file_path, mode="r", encoding="utf-8") as f:
+            reader = JsonStreamReader(f)
+            for section in reader.iter_members():
+                if section == "rooms":
+                    _insert_batches(
+                        connection,
+                        "INSERT INTO rooms VALUES (?, ?)",
+                        (
+                            (room_id, room_text)
+                            for room_id, _, room_text in reader.iter_entries()
+                        ),
+                    )
+                elif section == "items":
+                    _insert_batches(
+                        connection,
+                        "INSERT INTO items VALUES (?, ?, ?)",
+                        (
+                            (item_id, item_data["current_location"], item_text)
+                            for item_id, item_data, item_text in reader.iter_entries()
+                        ),
+                    )
+                else:
+                    connection.execute(
+                        "INSERT INTO meta VALUES (?, ?)",
+                        (section, _encode(reader.read_value())),
+                    )
+        connection.execute(LOCATION_INDEX)
+        connection.executemany(
+            "INSERT INTO meta VALUES (?, ?)",
+            [("version", _encode(STORE_FORMAT_VERSION)), ("stamp", _encode(stamp))],
+        )
+        connection.commit()
+    finally:
+        connection.close()
+    os.replace(temp_path, index_path)
+
+
+def _insert_batches(connection, statement: str, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= INSERT_BATCH_SIZE:
+            connection.executemany(statement, batch)
+            batch.clear()
+    if batch:
+        connection.executemany(statement, batch)
+
+
+class _RowCache(OrderedDict):
+    """Least recently used decoded rows, shared by sessions on different threads."""
+
+    def __init__(self, max_entries: int):
+        super().__init__()
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+
+    def get_entry(self, key):
+        with self.lock:
+            value = self.get(key)
+            if value is not None:
+                self.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self[key] = value
+            while len(self) > self.max_entries:
+                self.popitem(last=False)
+
+
+class _RowItemsView(ItemsView):
+    """Iterates (id, data) with a single query instead of one lookup per id."""
+
+    def __iter__(self):
+        return self._mapping.iter_rows()
+
+
+class EntityTable(Mapping):
+    """Read-only map of entity_id -> entity data (dict) backed by a store table."""
+
+    def __init__(self, connection: sqlite3.Connection, table: str):
+        self.connection = connection
+        self.table = table
+        self.cache = _RowCache(MAX_CACHED_ROWS)
+        self._len: Optional[int] = None
+
+    def __getitem__(self, entity_id: str) -> Dict[str, Any]:
+        data = self.cache.get_entry(entity_id)
+        if data is None:
+            row = self.connection.execute(
+                f"SELECT data FROM {self.table} WHERE id = ?", (entity_id,)
+            ).fetchone()
+            if row is None:
+                raise KeyError(entity_id)
+            data = json.loads(row[0])
+            self.cache.put(entity_id, data)
+        return data
+
+    def __contains__(self, entity_id) -> bool:
+        if entity_id in self.cache:
+            return True
+        row = self.connection.execute(
+            f"SELECT 1 FROM {self.table} WHERE id = ?", (entity_id,)
+        ).fetchone()
+        return row is not None
+
+    def __iter__(self) -> Iterator[str]:
+        for (entity_id,) in self.connection.execute(
+            f"SELECT id FROM {self.table} ORDER BY rowid"
+        ):
+            yield entity_id
+
+    def __len__(self) -> int:
+        if self._len is None:
+            self._len = self.connection.execute(
+                f"SELECT COUNT(*) FROM {self.table}"
+            ).fetchone()[0]
+        return self._len
+
+    def items(self):
+        return _RowItemsView(self)
+
+    def iter_rows(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        for entity_id, data in self.connection.execute(
+            f"SELECT id, data FROM {self.table} ORDER BY rowid"
+        ):
+            yield entity_id, json.loads(data)
+
+
+class ItemLocationTable(Mapping):
+    """
+    Read-only map of location -> starting item ids, same as WorldTemplate.item_locations:
+    {'start_room': ('lamp',), 'player_inventory': ('blank_map',)}
+    """
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+        self.cache = _RowCache(MAX_CACHED_ROWS)
+
+    def __getitem__(self, location: str) -> Tuple[str, ...]:
+        item_ids = self.cache.get_entry(location)
+        if item_ids is None:
+            item_ids = tuple(
+                item_id
+                for (item_id,) in self.connection.execute(
+                    "SELECT id FROM items WHERE location = ? ORDER BY rowid",
+                    (location,),
+                )
+            )
+            self.cache.put(location, item_ids)
+        if not item_ids:
+            raise KeyError(location)
+        return item_ids
+
+    def __contains__(self, location) -> bool:
+        try:
+            self[location]
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self) -> Iterator[str]:
+        for (location,) in self.connection.execute(
+            "SELECT DISTINCT location FROM items"
+        ):
+            yield location
+
+    def __len__(self) -> int:
+        return self.connection.execute(
+            "SELECT COUNT(DISTINCT location) FROM items"
+        ).fetchone()[0]
+
+
+class WorldStore:
+    """
+    Game data ('rooms', 'items', 'player') served from an index database built from a
+    game file, see build_world_index. Interchangeable with WorldTemplate, sessions must
+    treat all of it as read-only.
+    NOTE: the connection is shared by every session in the process, including sessions
+    on other threads (see server.GameServer). It is only read, and SQLite serializes
+    calls on it (sqlite3.threadsafety == 3).
+    """
+
+    def __init__(self, index_path, source: Optional[str] = None):
+        self.source = source
+        self.index_path = str(index_path)
+        self.connection = sqlite3.connect(
+            f"{Path(index_path).resolve().as_uri()}?mode=ro",
+            uri=True,
+            check_same_thread=False,
+        )
+        meta = dict(self.connection.execute("SELECT key, value FROM meta"))
+        self.stamp = tuple(json.loads(meta["stamp"]))
+        self.rooms: Mapping[str, dict] = EntityTable(self.connection, "rooms")
+        self.items: Mapping[str, dict] = EntityTable(self.connection, "items")
+        self.player: Mapping[str, Any] = MappingProxyType(json.loads(meta["player"]))
+        self.effects: Mapping[str, dict] = MappingProxyType(
+            json.loads(meta.get("effects", "{}"))
+        )
+        self.goals: Mapping[str, dict] = MappingProxyType(
+            json.loads(meta.get("goals", "{}"))
+        )
+        self.generation: Optional[str] = json.loads(meta.get("generation", "null"))
+        # Game file of a save holding only changed entities, see world.OverlayWorld
+        self.base_info: Optional[dict] = json.loads(meta.get("base", "null"))
+        self.item_locations: Mapping[str, Tuple[str, ...]] = ItemLocationTable(
+            self.connection
+        )
+
+    @property
+    def game_data(self) -> Dict[str, Any]:
+        game_data = {"rooms": self.rooms, "items": self.items, "player": self.player}
+        if self.base_info is not None:
+            game_data["base"] = self.base_info
+        return game_data
+
+    def close(self):
+        self.connection.close()
+
+    @staticmethod
+    def read_index_stamp(index_path) -> Optional[Tuple[int, int]]:
+        """Stamp of the game file the index was built from, None if unusable."""
+        try:
+            connection = sqlite3.connect(
+                f"{Path(index_path).resolve().as_uri()}?mode=ro", uri=True
+            )
+        except sqlite3.Error:
+            return None
+        try:
+            meta = dict(connection.execute("SELECT key, value FROM meta"))
+            if json.loads(meta["version"]) != STORE_FORMAT_VERSION:
+                return None
+            return tuple(json.loads(meta["stamp"]))
+        except (sqlite3.Error, KeyError, ValueError):
+            return None
+        finally:
+            connection.close()
+
+    @classmethod
+    def open(cls, file_path, index_path, stamp: Tuple[int, int]) -> "WorldStore":
+        """Opens the index for file_path, (re)building it if missing or out of date."""
+        if not Path(index_path).exists() or cls.read_index_stamp(index_path) != stamp:
+            logger.info("Building world index: %s", index_path)
+            Path(index_path).parent.mkdir(exist_ok=True)
+            build_world_index(file_path, index_path, stamp)
+        return cls(index_path, source=str(file_path))
@@ -0,0 +1,432 @@
+"""
+Shared world data and per-session views of it.
+- WorldTemplate: read-only game data parsed once per process and shared by sessions.
+- WorldTemplateCache: LRU of templates invalidated by file mtime, with optional
+  on-disk pickle sidecars so new processes skip JSON parsing too. Very large game
+  files are served from a store.WorldStore index instead.
+- OverlayWorld: a save holding only changed entities, over the world it was made from.
+- EntityMap: per-session map that builds live entities from template data on first
+  access and evicts unchanged entities that were not used recently.
+"""
+
+from text_quest.store import WorldStore
+from collections import OrderedDict
+import json
+import logging
+import os
+from pathlib import Path
+import pickle
+import threading
+from types import MappingProxyType
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+import weakref
+
+# Bump when the sidecar contents change so stale sidecars are rebuilt.
+SIDECAR_FORMAT_VERSION = 1
+SIDECAR_DIR = "__cache__"
+# Files at least this large are indexed into a WorldStore instead of parsed
+STORE_MIN_BYTES = 64 * 1024 * 1024
+# Unchanged entities a session keeps built, see EntityMap
+MAX_CLEAN_ENTITIES = 4096
+
+
+logger = logging.getLogger(__name__)
+
+
+class WorldTemplate:
+    """
+    Parsed game data ('rooms', 'items', 'player', optional 'effects' and 'goals')
+    shared by every session created from the same game file. Sessions must treat all
+    of it as read-only, live entities copy the fields they change (see
+    Item/Room/Player.from_template).
+    """
+
+    def __init__(
+        self,
+        game_data: Dict[str, Any],
+        source: Optional[str] = None,
+        item_locations: Optional[Dict[str, Tuple[str, ...]]] = None,
+    ):
+        self.source = source
+        self.game_data = game_data
+        self.rooms: Mapping[str, dict] = MappingProxyType(game_data["rooms"])
+        self.items: Mapping[str, dict] = MappingProxyType(game_data["items"])
+        self.player: Mapping[str, Any] = MappingProxyType(game_data["player"])
+        self.effects: Mapping[str, dict] = MappingProxyType(
+            game_data.get("effects", {})
+        )
+        self.goals: Mapping[str, dict] = MappingProxyType(game_data.get("goals", {}))
+        # Set on saves, see saves.write_snapshot
+        self.generation: Optional[str] = game_data.get("generation")
+        if item_locations is None:
+            item_locations = self._index_item_locations()
+        self.item_locations: Mapping[str, Tuple[str, ...]] = MappingProxyType(
+            item_locations
+        )
+
+    def _index_item_locations(self) -> Dict[str, Tuple[str, ...]]:
+        """
+        Starting location of every item, ex:
+        {'start_room': ('lamp',), 'player_inventory': ('blank_map',)}
+        """
+        item_locations: Dict[str, list] = {}
+        for item_id, item_data in self.items.items():
+            item_locations.setdefault(item_data["current_location"], []).append(item_id)
+        return {location: tuple(ids) for location, ids in item_locations.items()}
+
+    @classmethod
+    def from_file(cls, file_path) -> "WorldTemplate":
+        with open(file_path, mode="r", encoding="utf-8") as f:
+            return cls(game_data=json.load(f), source=str(file_path))
+
+
+def get_file_stamp(file_path) -> Tuple[int, int]:
+    """(mtime in ns, size in bytes), changes whenever the file is rewritten."""
+    stat = os.stat(file_path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class WorldTemplateCache:
+    """
+    Least recently used cache of WorldTemplates keyed by resolved file path. Entries are
+    reused until the file's mtime or size changes, so game files and restarts skip JSON
+    parsing and index building after the first load.
+
+    With use_sidecar=True the parsed data is also pickled to '__cache__/<name>.pickle'
+    next to the file, so a fresh process can skip JSON parsing as well.
+    Files of store_min_bytes or more (game files or saves) get a '__cache__/<name>.sqlite'
+    index instead (see store.WorldStore), so entities are only read and parsed when a
+    session uses them.
+    NOTE: sidecars are a local cache and are trusted like the game files themselves.
+    Sessions on different threads share the cache, a file is only loaded by one of them
+    while the others wait for it.
+    """
+
+    def __init__(self, max_entries: int = 8, store_min_bytes: int = STORE_MIN_BYTES):
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        self.max_entries = max_entries
+        self.store_min_bytes = store_min_bytes
+        self.entries: "OrderedDict[str, Tuple[Tuple[int, int], AnyWorld]]" = (
+            OrderedDict()
+        )
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.RLock()
+
+    def get(self, file_path, use_sidecar: bool = False) -> "AnyWorld":
+        with self.lock:
+            return self._get(file_path, use_sidecar)
+
+    def _get(self, file_path, use_sidecar: bool) -> "AnyWorld":
+        key = str(Path(file_path).resolve())
+        stamp = get_file_stamp(key)
+
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == stamp:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry[1]
+
+        self.misses += 1
+        world = None
+        if stamp[1] >= self.store_min_bytes:
+            world = WorldStore.open(
+                key, self.get_sidecar_path(key, suffix=".sqlite"), stamp
+            )
+        elif use_sidecar:
+            world = self._read_sidecar(key, stamp)
+        if world is None:
+            world = WorldTemplate.from_file(key)
+            if use_sidecar:
+                self._write_sidecar(key, stamp, world)
+
+        self.entries[key] = (stamp, world)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return world
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    @staticmethod
+    def get_sidecar_path(file_path, suffix: str = ".pickle") -> Path:
+        file_path = Path(file_path)
+        return file_path.parent / SIDECAR_DIR / f"{file_path.stem}{suffix}"
+
+    def _read_sidecar(self, file_path: str, stamp) -> Optional[WorldTemplate]:
+        sidecar_path = self.get_sidecar_path(file_path)
+        try:
+            with open(sidecar_path, mode="rb") as f:
+                sidecar = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            self.logger.warning("Unreadable world sidecar: %s, %s", sidecar_path, e)
+            return None
+
+        if (
+            sidecar.get("version") != SIDECAR_FORMAT_VERSION
+            or sidecar.get("stamp") != stamp
+        ):
+            return None
+        return WorldTemplate(
+            game_data=sidecar["game_data"],
+            source=file_path,
+            item_locations=sidecar["item_locations"],
+        )
+
+    def _write_sidecar(self, file_path: str, stamp, world: WorldTemplate):
+        sidecar_path = self.get_sidecar_path(file_path)
+        temp_path = sidecar_path.with_suffix(f".{os.getpid()}.tmp")
+        sidecar = {
+            "version": SIDECAR_FORMAT_VERSION,
+            "stamp": stamp,
+            "game_data": world.game_data,
+            "item_locations": dict(world.item_locations),
+        }
+        try:
+            sidecar_path.parent.mkdir(exist_ok=True)
+            with open(temp_path, mode="wb") as f:
+                pickle.dump(sidecar, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, sidecar_path)
+        except OSError as e:
+            self.logger.warning(
+                "Unable to write world sidecar: %s, %s", sidecar_path, e
+            )
+
+
+class OverlayMap(Mapping):
+    """Read-only map of entity_id -> data where entities in overrides replace base's."""
+
+    def __init__(self, overrides: Mapping[str, dict], base: Mapping[str, dict]):
+        self.overrides = overrides
+        self.base = base
+
+    def __getitem__(self, entity_id: str) -> dict:
+        data = self.overrides.get(entity_id)
+        if data is None:
+            return self.base[entity_id]
+        return data
+
+    def __contains__(self, entity_id) -> bool:
+        return entity_id in self.overrides or entity_id in self.base
+
+    def __iter__(self) -> Iterator[str]:
+        # Saves only change entities, so every overridden id is also in base
+        return iter(self.base)
+
+    def __len__(self) -> int:
+        return len(self.base)
+
+
+class OverlayItemLocations(Mapping):
+    """
+    Starting item locations of base, with the items in overrides moved to their
+    'current_location', same format as WorldTemplate.item_locations.
+    """
+
+    def __init__(
+        self, overrides: Mapping[str, dict], base: Mapping[str, Tuple[str, ...]]
+    ):
+        self.overrides = overrides
+        self.base = base
+        moved: Dict[str, list] = {}
+        for item_id, item_data in overrides.items():
+            moved.setdefault(item_data["current_location"], []).append(item_id)
+        self.moved = {location: tuple(ids) for location, ids in moved.items()}
+
+    def __getitem__(self, location: str) -> Tuple[str, ...]:
+        item_ids = tuple(
+            item_id
+            for item_id in self.base.get(location, ())
+            if item_id not in self.overrides
+        )
+        item_ids += self.moved.get(location, ())
+        if not item_ids:
+            raise KeyError(location)
+        return item_ids
+
+    def __contains__(self, location) -> bool:
+        try:
+            self[location]
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self) -> Iterator[str]:
+        return (
+            location
+            for location in dict.fromkeys([*self.base, *self.moved])
+            if location in self
+        )
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+class OverlayWorld:
+    """
+    A save of a world too large to snapshot whole (see GameCoordinator.get_game_state):
+    game_data holds the player and the entities the session changed, the rest is read
+    from base, the world of the game file named in game_data['base']. Interchangeable
+    with WorldTemplate.
+    """
+
+    def __init__(
+        self, game_data: Dict[str, Any], base: "AnyWorld", source: Optional[str] = None
+    ):
+        self.source = source
+        self.game_data = game_data
+        self.base = base
+        self.rooms: Mapping[str, dict] = OverlayMap(game_data["rooms"], base.rooms)
+        self.items: Mapping[str, dict] = OverlayMap(game_data["items"], base.items)
+        self.player: Mapping[str, Any] = MappingProxyType(game_data["player"])
+        self.effects: Mapping[str, dict] = MappingProxyType(
+            game_data.get("effects", {})
+        )
+        self.goals: Mapping[str, dict] = MappingProxyType(game_data.get("goals", {}))
+        self.generation: Optional[str] = game_data.get("generation")
+        self.item_locations: Mapping[str, Tuple[str, ...]] = OverlayItemLocations(
+            game_data["items"], base.item_locations
+        )
+
+
+AnyWorld = Union[WorldTemplate, WorldStore, OverlayWorld]
+
+world_template_cache = WorldTemplateCache()
+
+
+def load_world_template(file_path, use_sidecar: bool = False) -> AnyWorld:
+    """
+    Returns the WorldTemplate for file_path, shared by every caller in the process until
+    the file changes on disk.
+    """
+    return world_template_cache.get(file_path, use_sidecar=use_sidecar)
+
+
+def load_save_world(world: AnyWorld) -> AnyWorld:
+    """
+    World to play a save from. Saves holding only changed entities are layered over
+    the world of their game file (see OverlayWorld), other saves are returned as-is.
+    """
+    base_info = world.game_data.get("base")
+    if base_info is None:
+        return world
+    base = load_world_template(base_info["source"], use_sidecar=True)
+    if list(getattr(base, "stamp", ())) != base_info["stamp"]:
+        logger.warning("Game file changed since save: %s", base_info["source"])
+    return OverlayWorld(game_data=world.game_data, base=base, source=world.source)
+
+
+class EntityMap(Mapping):
+    """
+    Map of entity_id -> live entity for a single session. Entities are built from the
+    template data on first access, so a session only holds the entities it has touched:
+    {
+     'entity_id_A': <template data, not built yet>,
+     'entity_id_B': Entity_B  # built on first access
+    }
+    Entities the session changed (see mark_dirty, dirty) are kept for the life of the map.
+    Unchanged ones are identical to their template data, so only the max_clean most
+    recently used are kept and older ones are rebuilt when needed again. An evicted
+    entity that is still referenced elsewhere (ex: current_room) is reused rather than
+    rebuilt, so there is never more than one live copy of an entity.
+    """
+
+    def __init__(
+        self,
+        template_data: Mapping[str, dict],
+        factory: Callable[[Mapping[str, Any]], Any],
+        max_clean: Optional[int] = MAX_CLEAN_ENTITIES,
+    ):
+        self.template_data = template_data
+        self.factory = factory
+        self.live: Dict[str, Any] = {}
+        self.max_clean = max_clean
+        # Unchanged live entity ids, least recently used first
+        self.clean: "OrderedDict[str, None]" = OrderedDict()
+        self.evicted: "weakref.WeakValueDictionary[str, Any]" = (
+            weakref.WeakValueDictionary()
+        )
+        # Ids of entities the session changed
+        self.dirty: Set[str] = set()
+
+    def __getitem__(self, entity_id: str):
+        entity = self.live.get(entity_id)
+        if entity is None:
+            entity = self.evicted.pop(entity_id, None)
+            if entity is None:
+                entity = self.factory(self.template_data[entity_id])
+            self.live[entity_id] = entity
+            if self.max_clean is not None:
+                self.clean[entity_id] = None
+                self._evict()
+        elif entity_id in self.clean:
+            self.clean.move_to_end(entity_id)
+        return entity
+
+    def __setitem__(self, entity_id: str, entity):
+        if entity_id not in self.template_data:
+            raise KeyError(entity_id)
+        self.live[entity_id] = entity
+        self.clean.pop(entity_id, None)
+        self.dirty.add(entity_id)
+
+    def __contains__(self, entity_id) -> bool:
+        return entity_id in self.template_data
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.template_data)
+
+    def __len__(self) -> int:
+        return len(self.template_data)
+
+    def mark_dirty(self, entity_id: str):
+        """Keeps entity_id built from now on, called whenever the session changes it."""
+        self.dirty.add(entity_id)
+        self.clean.pop(entity_id, None)
+        if entity_id not in self.live:
+            entity = self.evicted.pop(entity_id, None)
+            if entity is not None:
+                self.live[entity_id] = entity
+
+    def _evict(self):
+        while len(self.clean) > self.max_clean:
+            entity_id, _ = self.clean.popitem(last=False)
+            self.evicted[entity_id] = self.live.pop(entity_id)
+
+    def to_dict(self, entity_ids: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Serializable state for entity_ids, every entity by default. Untouched entities
+        reuse the template data as-is, so the result must not be modified.
+        """
+        if entity_ids is not None:
+            return {
+                entity_id: (
+                    self.live[entity_id].to_dict()
+                    if entity_id in self.live
+                    else self.template_data[entity_id]
+                )
+                for entity_id in entity_ids
+            }
+        return {
+            entity_id: (
+                self.live[entity_id].to_dict()
+                if entity_id in self.live
+                else entity_data
+            )
+            for entity_id, entity_data in self.template_data.items()
+        }
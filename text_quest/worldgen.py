@@ -0,0 +1,269 @@
+"""
+Synthetic world generator.
+- WorldSpec: size and shape of a generated world.
+- generate_world: game data ('rooms', 'items', 'player') as a dict.
+- write_world: the same data streamed to a game file one entity at a time.
+
+Worlds use the TUTORIAL_GAME.json schema and are reproducible from WorldSpec.seed.
+Rooms are connected by paired exits (n/s, e/w), every room is reachable from
+'room_0' and the player starts there.
+
+Usage:
+    python -m text_quest.worldgen game_files/BIG_WORLD.json --rooms 1000000 --seed 7
+"""
+
+from text_quest.config import VALID_DIRECTIONS
+import argparse
+from array import array
+from dataclasses import dataclass
+import json
+import random
+from typing import Any, Dict, Iterator, List, Tuple
+
+OPPOSITE_DIRECTIONS = {"n": "s", "s": "n", "e": "w", "w": "e"}
+NO_ROOM = -1
+
+ROOM_ADJECTIVES = ["DAMP", "NARROW", "FLOODED", "SILENT", "CRUMBLING", "GILDED"]
+ROOM_NOUNS = ["CELLAR", "CORRIDOR", "VAULT", "CHAPEL", "ARMORY", "GALLERY"]
+ROOM_DESCRIPTIONS = [
+    "Water drips from the ceiling into shallow puddles.",
+    "Cobwebs hang thick across the corners of the room.",
+    "Faded banners line the walls, their colors long gone.",
+    "The floor is uneven, cut straight from the bedrock.",
+]
+ITEM_NOUNS = ["lantern", "key", "coin", "scroll", "dagger", "bottle"]
+
+
+@dataclass
+class WorldSpec:
+    """
+    - branching: average number of exits per room, between 2 (a tree) and 4
+    - conditional_fraction: share of rooms with an item dependent description
+    - thresholds_per_item: numeric state descriptions on each item's 'charge'
+    """
+
+    num_rooms: int = 100
+    branching: float = 2.5
+    items_per_room: int = 1
+    conditional_fraction: float = 0.5
+    thresholds_per_item: int = 2
+    seed: int = 0
+
+
+def build_connections(spec: WorldSpec, rng: random.Random) -> array:
+    """
+    Flat array of exits, connections[room_index * 4 + direction_index] -> room_index.
+    A random spanning tree keeps every room reachable, extra edges are then added
+    until rooms average spec.branching exits. Uses 16 bytes per room.
+    """
+    num_directions = len(VALID_DIRECTIONS)
+    direction_indexes = {d: i for i, d in enumerate(VALID_DIRECTIONS)}
+    opposite_indexes = [
+        direction_indexes[OPPOSITE_DIRECTIONS[d]] for d in VALID_DIRECTIONS
+    ]
+    connections = array("i", [NO_ROOM]) * (spec.num_rooms * num_directions)
+
+    def free_directions(room_index: int) -> List[int]:
+        offset = room_index * num_directions
+        return [i for i in range(num_directions) if connections[offset + i] == NO_ROOM]
+
+    def connect(room_index: int, direction_index: int, other_index: int):
+        connections[room_index * num_directions + direction_index] = other_index
+        connections[
+            other_index * num_directions + opposite_indexes[direction_index]
+        ] = room_index
+
+    # Rooms with at least one free exit, new rooms attach to one of them
+    open_rooms = [0]
+    for room_index in range(1, spec.num_rooms):
+        position = rng.randrange(len(open_rooms))
+        parent_index = open_rooms[position]
+        connect(parent_index, rng.choice(free_directions(parent_index)), room_index)
+        if not free_directions(parent_index):
+            open_rooms[position] = open_rooms[-1]
+            open_rooms.pop()
+        open_rooms.append(room_index)
+
+    extra_edges = int(spec.num_rooms * min(spec.branching, 4) / 2) - (
+        spec.num_rooms - 1
+    )
+    # Random pairs may have no matching free exits, so allow a few misses per edge
+    for _ in range(max(0, extra_edges) * 4):
+        if extra_edges <= 0:
+            break
+        room_index = rng.randrange(spec.num_rooms)
+        other_index = rng.randrange(spec.num_rooms)
+        if room_index == other_index:
+            continue
+        other_free = set(free_directions(other_index))
+        candidates = [
+            i for i in free_directions(room_index) if opposite_indexes[i] in other_free
+        ]
+        if candidates:
+            connect(room_index, rng.choice(candidates), other_index)
+            extra_edges -= 1
+    return connections
+
+
+def iter_rooms(
+    spec: WorldSpec, connections: array, rng: random.Random
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    num_directions = len(VALID_DIRECTIONS)
+    for room_index in range(spec.num_rooms):
+        offset = room_index * num_directions
+        connections_map = {
+            direction: f"room_{connections[offset + i]}"
+            for i, direction in enumerate(VALID_DIRECTIONS)
+            if connections[offset + i] != NO_ROOM
+        }
+        conditional_descriptions = {
+            "first_visit": {
+                "condition": {"type": "visit_count_less", "params": [2]},
+                "description_modifier": "The air feels stale, as if no one has been here in ages.",
+            }
+        }
+        if spec.items_per_room and rng.random() < spec.conditional_fraction:
+            item_id = f"item_{room_index}_{rng.randrange(spec.items_per_room)}"
+            conditional_descriptions["item_present"] = {
+                "condition": {"type": "has_item", "params": [item_id]},
+                "description_modifier": f"Something glints nearby: the {item_id}.",
+            }
+
+        room_id = f"room_{room_index}"
+        yield room_id, {
+            "id": room_id,
+            "name": f"{rng.choice(ROOM_ADJECTIVES)} {rng.choice(ROOM_NOUNS)}",
+            "base_description": rng.choice(ROOM_DESCRIPTIONS),
+            "num_player_visits": 0,
+            "connections_map": connections_map,
+            "properties": {"conditional_descriptions": conditional_descriptions},
+        }
+
+
+def build_state_descriptions(
+    thresholds_per_item: int, rng: random.Random
+) -> Dict[str, str]:
+    """ex: {'less_than_12': 'It is nearly spent.', 'greater_than_57': 'It holds a charge above 57.'}"""
+    thresholds = sorted(rng.sample(range(1, 100), min(thresholds_per_item, 99)))
+    state_descriptions = {}
+    for level, threshold in enumerate(thresholds):
+        if level == 0:
+            state_descriptions[f"less_than_{threshold}"] = "It is nearly spent."
+        else:
+            state_descriptions[f"greater_than_{threshold}"] = (
+                f"It holds a charge above {threshold}."
+            )
+    return state_descriptions
+
+
+def iter_items(
+    spec: WorldSpec, rng: random.Random
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    for room_index in range(spec.num_rooms):
+        for item_index in range(spec.items_per_room):
+            item_id = f"item_{room_index}_{item_index}"
+            yield item_id, {
+                "id": item_id,
+                "name": item_id,
+                "base_description": f"A worn {rng.choice(ITEM_NOUNS)}.",
+                "current_location": f"room_{room_index}",
+                "commands": ["inspect"],
+                "properties": {"is_lit": False, "charge": rng.randrange(100)},
+                "property_constraints": {
+                    "is_lit": {
+                        "type": "bool",
+                        "state_descriptions": {
+                            "true": "It glows with a warm, flickering light.",
+                            "false": "It sits dark and unlit.",
+                        },
+                    },
+                    "charge": {
+                        "type": "int",
+                        "state_descriptions": build_state_descriptions(
+                            spec.thresholds_per_item, rng
+                        ),
+                    },
+                },
+                "cmd_to_config_map": {},
+            }
+
+
+def build_player() -> Dict[str, Any]:
+    return {
+        "health": 100,
+        "total_moves": 0,
+        "inventory": [],
+        "properties": {},
+        "current_location": "room_0",
+    }
+
+
+def generate_world(spec: WorldSpec) -> Dict[str, Any]:
+    """Game data for spec, held in memory. Use write_world for very large worlds."""
+    rng = random.Random(spec.seed)
+    connections = build_connections(spec, rng)
+    return {
+        "rooms": dict(iter_rooms(spec, connections, rng)),
+        "items": dict(iter_items(spec, rng)),
+        "player": build_player(),
+    }
+
+
+def _write_entities(f, entities: Iterator[Tuple[str, Dict[str, Any]]]):
+    f.write("{")
+    for position, (entity_id, entity_data) in enumerate(entities):
+        if position:
+            f.write(",")
+        f.write(json.dumps(entity_id))
+        f.write(":")
+        f.write(json.dumps(entity_data, separators=(",", ":")))
+    f.write("}")
+
+
+def write_world(file_path, spec: WorldSpec):
+    """
+    Writes the same game data as generate_world(spec), one entity at a time, so only
+    the room connections are held in memory.
+    """
+    rng = random.Random(spec.seed)
+    connections = build_connections(spec, rng)
+    with open(file_path, mode="w", encoding="utf-8") as f:
+        f.write('{"rooms":')
+        _write_entities(f, iter_rooms(spec, connections, rng))
+        f.write(',"items":')
+        _write_entities(f, iter_items(spec, rng))
+        f.write(',"player":')
+        f.write(json.dumps(build_player(), separators=(",", ":")))
+        f.write("}")
+
+
+def main():
+    defaults = WorldSpec()
+    parser = argparse.ArgumentParser(description="Generate a synthetic game file.")
+    parser.add_argument("file_path")
+    parser.add_argument("--rooms", type=int, default=defaults.num_rooms)
+    parser.add_argument("--branching", type=float, default=defaults.branching)
+    parser.add_argument("--items-per-room", type=int, default=defaults.items_per_room)
+    parser.add_argument(
+        "--conditional-fraction", type=float, default=defaults.conditional_fraction
+    )
+    parser.add_argument(
+        "--thresholds-per-item", type=int, default=defaults.thresholds_per_item
+    )
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    args = parser.parse_args()
+
+    spec = WorldSpec(
+        num_rooms=args.rooms,
+        branching=args.branching,
+        items_per_room=args.items_per_room,
+        conditional_fraction=args.conditional_fraction,
+        thresholds_per_item=args.thresholds_per_item,
+        seed=args.seed,
+    )
+    write_world(args.file_path, spec)
+    print(f"Wrote {spec} to {args.file_path}")
+
+
+if __name__ == "__main__":
+    main()